@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Count
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from apps.curtains.admin_scale import LargeTableAdminMixin
+from apps.curtains.counters import counter_targets, recount_curtains
+from apps.curtains.invalidation import invalidate_curtains
 from apps.curtains.models import Category, Color, Curtain, CurtainImage
 
 
@@ -32,23 +34,16 @@ class CategoryAdmin(admin.ModelAdmin):
     list_per_page = 25
     ordering = ('-created_date',)
     
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        queryset = queryset.annotate(
-            _curtains_count=Count("curtains", distinct=True)
-        )
-        return queryset
-
     def curtains_count(self, obj):
-        count = obj._curtains_count
+        count = obj.active_curtains_count
         url = (
             reverse("admin:curtains_curtain_changelist")
             + "?"
-            + f"category__id__exact={obj.id}"
+            + f"category__id__exact={obj.id}&is_active__exact=1"
         )
         return format_html('<a href="{}">{} ta parda</a>', url, count)
-    curtains_count.short_description = 'Pardalar soni'
-    curtains_count.admin_order_field = '_curtains_count'
+    curtains_count.short_description = 'Faol pardalar soni'
+    curtains_count.admin_order_field = 'active_curtains_count'
 
 
 @admin.register(Color)
@@ -63,13 +58,6 @@ class ColorAdmin(admin.ModelAdmin):
     fields = ('title', 'hex_code', 'created_date')
     readonly_fields = ('created_date',)
     
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        queryset = queryset.annotate(
-            _curtains_count=Count("curtains", distinct=True)
-        )
-        return queryset
-    
     def color_preview(self, obj):
         if obj.hex_code:
             return format_html(
@@ -80,19 +68,19 @@ class ColorAdmin(admin.ModelAdmin):
     color_preview.short_description = 'Rang'
     
     def curtains_count(self, obj):
-        count = obj._curtains_count
+        count = obj.active_curtains_count
         url = (
             reverse("admin:curtains_curtain_changelist")
             + "?"
-            + f"colors__id__exact={obj.id}"
+            + f"colors__id__exact={obj.id}&is_active__exact=1"
         )
         return format_html('<a href="{}">{} ta parda</a>', url, count)
-    curtains_count.short_description = 'Pardalar soni'
-    curtains_count.admin_order_field = '_curtains_count'
+    curtains_count.short_description = 'Faol pardalar soni'
+    curtains_count.admin_order_field = 'active_curtains_count'
 
 
 @admin.register(Curtain)
-class CurtainAdmin(admin.ModelAdmin):
+class CurtainAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         'id', 'title', 'category', 'price_display', 'status', 
         'is_featured', 'is_active', 'views', 'stock_quantity', 'created_date'
@@ -103,6 +91,7 @@ class CurtainAdmin(admin.ModelAdmin):
         'category', 'created_date', 'modified_date'
     )
     list_editable = ('is_featured', 'is_active', 'status', 'stock_quantity')
+    list_select_related = ('category',)
     search_fields = ('title', 'content', 'category__title')
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_date'
@@ -133,6 +122,7 @@ class CurtainAdmin(admin.ModelAdmin):
     readonly_fields = ('views', 'created_date', 'modified_date')
     filter_horizontal = ('colors',)
     inlines = [CurtainImageInline]
+    large_table_autocomplete_fields = ('category',)
     
     def price_display(self, obj):
         if obj.is_on_sale:
@@ -146,26 +136,37 @@ class CurtainAdmin(admin.ModelAdmin):
     
     def make_featured(self, request, queryset):
         count = queryset.update(is_featured=True)
+        # update() signallarni chaqirmaydi - kesh shu yerda bekor qilinadi
+        invalidate_curtains(queryset)
         self.message_user(request, f'{count} ta parda asosiyga qo\'shildi.')
     make_featured.short_description = 'Tanlangan pardalarni asosiyga qo\'shish'
     
     def remove_featured(self, request, queryset):
         count = queryset.update(is_featured=False)
+        invalidate_curtains(queryset)
         self.message_user(request, f'{count} ta parda asosiydan olib tashlandi.')
     remove_featured.short_description = 'Tanlangan pardalarni asosiydan olib tashlash'
     
     def make_active(self, request, queryset):
+        # update() signallarni chaqirmaydi - hisoblagichlar keyin qayta hisoblanadi
+        category_ids, color_ids = counter_targets(queryset)
         count = queryset.update(is_active=True)
+        recount_curtains(category_ids, color_ids)
+        invalidate_curtains(queryset)
         self.message_user(request, f'{count} ta parda faollashtirildi.')
     make_active.short_description = 'Tanlangan pardalarni faollashtirish'
     
     def make_inactive(self, request, queryset):
+        category_ids, color_ids = counter_targets(queryset)
         count = queryset.update(is_active=False)
+        recount_curtains(category_ids, color_ids)
+        invalidate_curtains(queryset)
         self.message_user(request, f'{count} ta parda nofaol qilindi.')
     make_inactive.short_description = 'Tanlangan pardalarni nofaol qilish'
     
     def mark_available(self, request, queryset):
         count = queryset.update(status='available')
+        invalidate_curtains(queryset)
         self.message_user(request, f'{count} ta parda mavjud deb belgilandi.')
     mark_available.short_description = 'Tanlangan pardalarni mavjud deb belgilash'
 
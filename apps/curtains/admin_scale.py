@@ -0,0 +1,171 @@
+"""Katta jadvallar uchun admin changelist rejimi.
+
+ADMIN_LARGE_TABLE_MODE yoqilganda to'liq COUNT so'rovlari o'rniga taxminiy
+yoki cheklangan sanoq ishlatiladi, date_hierarchy o'chiriladi, FK
+maydonlari uchun autocomplete vidjetlari qo'llanadi, FK list_filter'lari esa
+ADMIN_FILTER_CHOICES_LIMIT ta variant bilan cheklanadi. Sozlama har bir
+so'rovda o'qiladi.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+
+def large_table_mode():
+    return getattr(settings, 'ADMIN_LARGE_TABLE_MODE', False)
+
+
+def estimated_row_count(model, using='default'):
+    """Jadvaldagi qatorlar sonini COUNT(*) siz taxmin qilish"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    # Boshqa bazalarda: birlamchi kalit oralig'i (indeks orqali, yuqori chegara)
+    bounds = model._default_manager.using(using).aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+    return bounds['last'] - bounds['first'] + 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Filtrsiz ro'yxatda taxminiy, filtrlanganda ADMIN_COUNT_LIMIT bilan cheklangan sanoq.
+
+    Sanoq aniq bo'lmagani uchun chegaradan tashqaridagi sahifa so'ralsa
+    xato o'rniga oxirgi mavjud sahifa ko'rsatiladi.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate > self.limit:
+                return estimate
+        return self.capped_count()
+
+    @property
+    def limit(self):
+        return getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+
+    def capped_count(self):
+        return self.object_list.order_by()[:self.limit].count()
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if int(number) < 1:
+                raise
+            return self.num_pages
+
+    def page(self, number):
+        page = super().page(number)
+        if page.number > 1 and not len(page.object_list):
+            # Taxmin haqiqiy sondan katta (o'chirilgan qatorlar) - aniq cheklangan sanoqqa o'tiladi
+            self.__dict__['count'] = self.capped_count()
+            self.__dict__.pop('num_pages', None)
+            page = super().page(self.validate_number(number))
+        return page
+
+
+class StaffUserListFilter(admin.RelatedFieldListFilter):
+    """Foydalanuvchi FK filtri - barcha foydalanuvchilar emas, faqat xodimlar ro'yxati"""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        return field.get_choices(
+            include_blank=False, ordering=ordering, limit_choices_to={'is_staff': True}
+        )
+
+
+class LimitedRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """FK filtri: butun jadval emas, ko'pi bilan ADMIN_FILTER_CHOICES_LIMIT ta variant.
+
+    Tanlangan qiymat ro'yxatda bo'lmasa ham qo'shiladi; qolganlari uchun
+    URL'dagi ?maydon__id__exact= yoki qidiruv ishlatiladi.
+    """
+
+    def field_choices(self, field, request, model_admin):
+        limit = getattr(settings, 'ADMIN_FILTER_CHOICES_LIMIT', 100)
+        queryset = field.remote_field.model._default_manager.complex_filter(field.get_limit_choices_to())
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        objects = list(queryset[:limit])
+        if self.lookup_val:
+            shown = {str(obj.pk) for obj in objects}
+            try:
+                objects += queryset.filter(pk__in=[pk for pk in self.lookup_val if pk not in shown])
+            except (ValueError, ValidationError):
+                # Noto'g'ri qiymat - xatoni changelist o'zi ko'rsatadi
+                pass
+        return [(obj.pk, str(obj)) for obj in objects]
+
+
+class LargeTableChangeList(ChangeList):
+    """date_hierarchy'siz changelist: sana bo'yicha drill-down butun jadval bo'ylab
+    SELECT DISTINCT bajaradi, o'rniga list_filter'dagi sana oralig'i filtri ishlatiladi"""
+
+    def __init__(self, request, model, list_display, list_display_links, list_filter, date_hierarchy,
+                 *args, **kwargs):
+        super().__init__(request, model, list_display, list_display_links, list_filter, None, *args, **kwargs)
+
+
+class LargeTableAdminMixin:
+    """ModelAdmin uchun katta jadval rejimi.
+
+    large_table_autocomplete_fields - rejim yoqilganda autocomplete bo'ladigan FK'lar,
+    large_table_list_filters - list_filter elementlarini almashtirish ({maydon: filtr klassi});
+    qolgan FK filtrlari LimitedRelatedFieldListFilter bo'ladi.
+    """
+    large_table_autocomplete_fields = ()
+    large_table_list_filters = {}
+
+    @property
+    def show_full_result_count(self):
+        # Filtrsiz jami sanoq - butun jadval bo'ylab COUNT(*)
+        return not large_table_mode()
+
+    def get_changelist(self, request, **kwargs):
+        if large_table_mode():
+            return LargeTableChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if large_table_mode():
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if not large_table_mode():
+            return list_filter
+        return [self._large_table_list_filter(item) for item in list_filter]
+
+    def _large_table_list_filter(self, item):
+        if not isinstance(item, str):
+            return item
+        if item in self.large_table_list_filters:
+            return item, self.large_table_list_filters[item]
+        if get_fields_from_path(self.model, item)[-1].is_relation:
+            return item, LimitedRelatedFieldListFilter
+        return item
+
+    def get_autocomplete_fields(self, request):
+        fields = tuple(super().get_autocomplete_fields(request))
+        if large_table_mode():
+            fields += tuple(f for f in self.large_table_autocomplete_fields if f not in fields)
+        return fields
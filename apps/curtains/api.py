@@ -0,0 +1,221 @@
+"""Mobil ilova uchun faqat o'qiladigan JSON katalog API (v1).
+
+Ro'yxat products() bilan bir xil filtr va saralash parametrlarini qabul
+qiladi (filters.filter_curtains). Sahifalash kursor bilan: kursorda oxirgi
+qatorning saralash qiymati va id'si saqlanadi, keyingi sahifa indeks orqali
+shu joydan davom etadi (OFFSET ishlatilmaydi).
+
+Qatorlar model obyektlarisiz values() bilan o'qiladi. Asosiy rasm shu
+so'rovning o'zida subquery bilan olinadi. ?fields= bilan faqat kerakli
+ustunlar so'raladi. Javob orjson bilan kodlanadi.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+import orjson
+from django.db.models import OuterRef, Q, Subquery
+from django.http import HttpResponse
+from django.urls import reverse
+
+from .filters import DEFAULT_SORT, SORT_ORDERING, filter_curtains
+from .models import Category, Color, Curtain, CurtainImage
+
+DEFAULT_LIMIT = 24
+MAX_LIMIT = 100
+
+# Javob maydoni -> values() ustuni
+CURTAIN_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'price': 'price',
+    'discount_price': 'discount_price',
+    'final_price': 'effective_price',
+    'on_sale': 'on_sale',
+    'category': 'category_id',
+    'fabric': 'fabric_type',
+    'width': 'width',
+    'height': 'height',
+    'status': 'status',
+    'stock': 'stock_quantity',
+    'views': 'views',
+    'created': 'created_date',
+    'modified': 'modified_date',
+    'image': 'main_image',
+}
+# Alohida so'rov talab qiladigan maydonlar
+EXTRA_FIELDS = {'colors', 'url'}
+# Teg avlodlarini oshirmasdan o'zgaradigan qiymatlar (increment_views update() bilan yozadi).
+# ETag ularni qamramaydi, shuning uchun ular so'ralgan javob validatorsiz beriladi
+VOLATILE_FIELDS = {'views'}
+VOLATILE_SORTS = {'views'}
+DEFAULT_FIELDS = ['id', 'slug', 'title', 'price', 'final_price', 'on_sale', 'category', 'image']
+DETAIL_FIELDS = [name for name in (*CURTAIN_FIELDS, 'colors', 'url') if name not in VOLATILE_FIELDS]
+
+
+class InvalidParameter(ValueError):
+    pass
+
+
+def json_response(data, status=200):
+    return HttpResponse(orjson.dumps(data), content_type='application/json', status=status)
+
+
+def parse_fields(value, default=DEFAULT_FIELDS):
+    if not value:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in CURTAIN_FIELDS and name not in EXTRA_FIELDS]
+    if unknown:
+        raise InvalidParameter(f"Noma'lum maydonlar: {', '.join(unknown)}")
+    return fields
+
+
+def is_volatile(params, detail=False):
+    """Javobda ETag qamramaydigan qiymat (ko'rishlar soni yoki u bo'yicha tartib) bormi"""
+    if not detail and params.get('sort') in VOLATILE_SORTS:
+        return True
+    try:
+        fields = parse_fields(params.get('fields'), default=DETAIL_FIELDS if detail else DEFAULT_FIELDS)
+    except InvalidParameter:
+        return False
+    return not VOLATILE_FIELDS.isdisjoint(fields)
+
+
+def main_image_subquery(curtain='pk'):
+    """Asosiy rasm yo'li; curtain - tashqi so'rovdagi parda id'si ustuni"""
+    return Subquery(
+        CurtainImage.objects.filter(curtain=OuterRef(curtain))
+        .order_by('-is_main', 'order', '-created_date')
+        .values('image')[:1]
+    )
+
+
+def _columns(fields, sort_column=None):
+    columns = {'id', *(CURTAIN_FIELDS[name] for name in fields if name in CURTAIN_FIELDS)}
+    if 'url' in fields:
+        columns.add('slug')
+    if sort_column:
+        columns.add(sort_column)
+    return columns
+
+
+def _rows(queryset, fields, sort_column=None):
+    columns = _columns(fields, sort_column)
+    if 'main_image' in columns:
+        queryset = queryset.annotate(main_image=main_image_subquery())
+    return list(queryset.values(*columns))
+
+
+def _serialize(rows, fields):
+    colors = {}
+    if 'colors' in fields and rows:
+        for curtain_id, color_id in Curtain.colors.through.objects.filter(
+            curtain_id__in=[row['id'] for row in rows]
+        ).order_by('color_id').values_list('curtain_id', 'color_id'):
+            colors.setdefault(curtain_id, []).append(color_id)
+
+    storage = CurtainImage._meta.get_field('image').storage
+    result = []
+    for row in rows:
+        item = {}
+        for name in fields:
+            if name == 'colors':
+                item[name] = colors.get(row['id'], [])
+            elif name == 'url':
+                item[name] = reverse('curtains:product_detail', kwargs={'slug': row['slug']})
+            elif name == 'image':
+                item[name] = storage.url(row['main_image']) if row['main_image'] else None
+            else:
+                item[name] = row[CURTAIN_FIELDS[name]]
+        result.append(item)
+    return result
+
+
+def encode_cursor(sort, value, pk):
+    raw = orjson.dumps([sort, value, pk])
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, pk = orjson.loads(raw)
+        pk = int(pk)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise InvalidParameter("Noto'g'ri kursor")
+    if cursor_sort != sort:
+        raise InvalidParameter('Kursor boshqa saralash uchun berilgan')
+    if sort == 'created_date':
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidParameter("Noto'g'ri kursor")
+    elif isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise InvalidParameter("Noto'g'ri kursor")
+    return value, pk
+
+
+def curtain_list(params):
+    """Filtrlangan sahifa: (pardalar, keyingi kursor yoki None)"""
+    sort = params.get('sort') if params.get('sort') in SORT_ORDERING else DEFAULT_SORT
+    ordering = SORT_ORDERING[sort]
+    column = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+    try:
+        limit = max(1, min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+    except (TypeError, ValueError):
+        raise InvalidParameter("limit butun son bo'lishi kerak")
+    fields = parse_fields(params.get('fields'))
+
+    curtains = filter_curtains(Curtain.objects.filter(is_active=True), params)
+    # Teng qiymatlar orasida tartib id bo'yicha - kursor aniq bitta joyni ko'rsatadi
+    curtains = curtains.order_by(ordering, '-pk' if descending else 'pk')
+    if params.get('cursor'):
+        value, pk = decode_cursor(params['cursor'], sort)
+        beyond = 'lt' if descending else 'gt'
+        curtains = curtains.filter(
+            Q(**{f'{column}__{beyond}': value}) | Q(**{column: value, f'pk__{beyond}': pk})
+        )
+
+    rows = _rows(curtains[:limit + 1], fields, column)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        value = last[column]
+        next_cursor = encode_cursor(sort, value.isoformat() if isinstance(value, datetime) else value, last['id'])
+    return _serialize(rows, fields), next_cursor
+
+
+def curtain_detail(slug, fields=None):
+    fields = parse_fields(fields, default=DETAIL_FIELDS)
+    rows = _rows(Curtain.objects.filter(slug=slug, is_active=True), fields)
+    if not rows:
+        return None
+    item = _serialize(rows, fields)[0]
+    storage = CurtainImage._meta.get_field('image').storage
+    item['images'] = [
+        {'url': storage.url(image), 'alt': alt, 'main': is_main}
+        for image, alt, is_main in CurtainImage.objects.filter(curtain_id=rows[0]['id'])
+        .order_by('-is_main', 'order', '-created_date')
+        .values_list('image', 'alt_text', 'is_main')
+    ]
+    return item
+
+
+def category_list():
+    return [
+        {'id': pk, 'title': title, 'curtains': count}
+        for pk, title, count in Category.objects.order_by('title').values_list(
+            'id', 'title', 'active_curtains_count'
+        )
+    ]
+
+
+def color_list():
+    return [
+        {'id': pk, 'title': title, 'hex': hex_code}
+        for pk, title, hex_code in Color.objects.order_by('title').values_list('id', 'title', 'hex_code')
+    ]
@@ -0,0 +1,210 @@
+"""'Birga xarid qilinadi' indeksi.
+
+OrderItem'lardan parda x parda co-occurrence sanog'i (CurtainPair) oxirgi
+qayta ishlangan buyurtma id'sidan boshlab bosqichma-bosqich to'ldiriladi.
+Har bir parda uchun lift bo'yicha eng yaxshi juftliklar Curtain.bought_together
+ro'yxatiga yoziladi. Sahifalar uni tayyor holda o'qiydi, so'rov vaqtida
+hech qanday agregatsiya bajarilmaydi.
+
+lift(a, b) = N * c(a, b) / (c(a) * c(b)), bu yerda N - hisobga olingan
+buyurtmalar soni, c(a) - a qatnashgan buyurtmalar, c(a, b) - ikkalasi birga.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import combinations, islice
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .invalidation import invalidate_curtains
+from .models import Curtain, CurtainPair, CurtainPairState
+
+TOP_PAIRS = 8
+MIN_ORDERS = 2
+BATCH_SIZE = 2000
+# Juda katta buyurtmalar juftliklar sonini kvadratik oshiradi
+MAX_ORDER_CURTAINS = 30
+# Elementlari hali yozilayotgan yangi buyurtmalar keyingi ishga qoldiriladi
+SETTLE_SECONDS = 300
+
+
+def _chunks(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _order_baskets(after_id, until):
+    """(buyurtma id, pardalar to'plami) - id bo'yicha tartibda, bekor qilinganlarsiz"""
+    from apps.orders.models import OrderItem
+
+    rows = (
+        OrderItem.objects.filter(order_id__gt=after_id, order__created_date__lt=until)
+        .exclude(order__status='cancelled')
+        .order_by('order_id', 'curtain_id')
+        .values_list('order_id', 'curtain_id')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    current, basket = None, []
+    for order_id, curtain_id in rows:
+        if order_id != current:
+            if basket:
+                yield current, basket
+            current, basket = order_id, []
+        if len(basket) < MAX_ORDER_CURTAINS:
+            basket.append(curtain_id)
+    if basket:
+        yield current, basket
+
+
+def count_pairs(after_id, until):
+    """Yangi buyurtmalardagi juftliklar sanog'i: (Counter, buyurtmalar soni, oxirgi id)"""
+    counts = Counter()
+    orders = 0
+    last_id = after_id
+    for order_id, basket in _order_baskets(after_id, until):
+        basket = sorted(set(basket))
+        for curtain_id in basket:
+            counts[curtain_id, curtain_id] += 1
+        counts.update(combinations(basket, 2))
+        orders += 1
+        last_id = order_id
+    return counts, orders, last_id
+
+
+def merge_counts(counts):
+    """Sanoqlarni CurtainPair jadvaliga qo'shish (mavjudlari yangilanadi, yangilari yaratiladi)"""
+    for chunk in _chunks(counts.items()):
+        keys = dict(chunk)
+        candidates = CurtainPair.objects.filter(
+            first_id__in={first for first, second in keys},
+            second_id__in={second for first, second in keys},
+        )
+        # first/second ro'yxatlari kesishmasi ortiqcha juftliklarni ham qaytarishi mumkin
+        existing = {
+            (pair.first_id, pair.second_id): pair
+            for pair in candidates
+            if (pair.first_id, pair.second_id) in keys
+        }
+        for key, pair in existing.items():
+            pair.orders_count += keys[key]
+        CurtainPair.objects.bulk_update(existing.values(), ['orders_count'], batch_size=BATCH_SIZE)
+        CurtainPair.objects.bulk_create(
+            [
+                CurtainPair(first_id=first, second_id=second, orders_count=count)
+                for (first, second), count in keys.items()
+                if (first, second) not in existing
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def rank_pairs(curtain_ids, total_orders, limit=TOP_PAIRS, min_orders=MIN_ORDERS):
+    """Berilgan pardalar uchun lift bo'yicha eng yaxshi sheriklar: {parda id: [id, ...]}"""
+    curtain_ids = set(curtain_ids)
+    partners = defaultdict(list)
+    singles = {}
+    for first, second, together in CurtainPair.objects.filter(
+        Q(first_id__in=curtain_ids) | Q(second_id__in=curtain_ids)
+    ).values_list('first_id', 'second_id', 'orders_count').iterator(chunk_size=BATCH_SIZE):
+        if first == second:
+            singles[first] = together
+        elif together >= min_orders:
+            partners[first].append((second, together))
+            partners[second].append((first, together))
+
+    # Sheriklarning o'z sanog'i ham kerak (ular curtain_ids'da bo'lmasligi mumkin)
+    missing = {other for pairs in partners.values() for other, _ in pairs} - singles.keys()
+    if missing:
+        singles.update(
+            CurtainPair.objects.filter(first_id__in=missing, second_id=F('first_id'))
+            .values_list('first_id', 'orders_count')
+        )
+
+    ranking = {}
+    for curtain_id in curtain_ids:
+        own = singles.get(curtain_id)
+        scored = [
+            (total_orders * together / (own * singles[other]), together, other)
+            for other, together in partners.get(curtain_id, ())
+            if own and singles.get(other)
+        ]
+        scored.sort(key=lambda row: (-row[0], -row[1], row[2]))
+        ranking[curtain_id] = [other for lift, together, other in scored[:limit]]
+    return ranking
+
+
+def affected_curtains(counts):
+    """Reytingi o'zgarishi mumkin bo'lgan pardalar: yangi sanoqdagilar va ularning sheriklari"""
+    touched = {curtain_id for pair in counts for curtain_id in pair}
+    affected = set(touched)
+    for chunk in _chunks(touched):
+        for first, second in CurtainPair.objects.filter(
+            Q(first_id__in=chunk) | Q(second_id__in=chunk)
+        ).values_list('first_id', 'second_id').iterator(chunk_size=BATCH_SIZE):
+            affected.update((first, second))
+    return affected
+
+
+def save_rankings(ranking):
+    changed = []
+    for curtain in Curtain.objects.filter(pk__in=list(ranking)).only('id', 'bought_together'):
+        if curtain.bought_together != ranking[curtain.pk]:
+            curtain.bought_together = ranking[curtain.pk]
+            changed.append(curtain)
+    Curtain.objects.bulk_update(changed, ['bought_together'], batch_size=BATCH_SIZE)
+    invalidate_curtains([curtain.pk for curtain in changed])
+    return len(changed)
+
+
+def build_bought_together(full=False, limit=TOP_PAIRS, min_orders=MIN_ORDERS):
+    """Indeksni yangi buyurtmalar bilan yangilash. full=True - noldan qayta qurish.
+
+    (qayta ishlangan buyurtmalar, reytingi o'zgargan pardalar) qaytariladi.
+    """
+    until = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    with transaction.atomic():
+        state, _ = CurtainPairState.objects.select_for_update().get_or_create(pk=1)
+        if full:
+            CurtainPair.objects.all().delete()
+            state.last_order_id = state.orders_count = 0
+
+        counts, orders, last_id = count_pairs(state.last_order_id, until)
+        if not orders and not full:
+            return 0, 0
+
+        merge_counts(counts)
+        state.last_order_id = last_id
+        state.orders_count += orders
+        state.save()
+
+        if full:
+            Curtain.objects.exclude(bought_together=[]).update(bought_together=[])
+            affected = {curtain_id for pair in counts for curtain_id in pair}
+        else:
+            affected = affected_curtains(counts)
+        ranking = rank_pairs(affected, state.orders_count, limit=limit, min_orders=min_orders)
+        return orders, save_rankings(ranking)
+
+
+def bought_together_for(curtains, limit=4):
+    """Bir yoki bir nechta parda uchun tayyor ro'yxatlardan tavsiyalar (bitta so'rov).
+
+    Bir nechta parda (savat) bo'lsa, ro'yxatlardagi o'rni bo'yicha ball
+    yig'iladi; pardalarning o'zi natijaga kirmaydi.
+    """
+    scores = Counter()
+    own_ids = {curtain.pk for curtain in curtains}
+    for curtain in curtains:
+        ranked = curtain.bought_together or []
+        for position, other_id in enumerate(ranked):
+            if other_id not in own_ids:
+                scores[other_id] += len(ranked) - position
+    if not scores:
+        return []
+
+    ids = [curtain_id for curtain_id, score in sorted(scores.items(), key=lambda item: (-item[1], item[0]))]
+    found = Curtain.objects.filter(pk__in=ids[:limit * 2], is_active=True).prefetch_related('images')
+    found = {curtain.pk: curtain for curtain in found}
+    return [found[curtain_id] for curtain_id in ids if curtain_id in found][:limit]
@@ -0,0 +1,125 @@
+"""Ko'rinishlar va shablon bo'laklari uchun kesh yordamchisi.
+
+Oddiy cache.get/set bilan qiymat muddati tugaganda unga murojaat qilgan
+barcha worker'lar uni bir vaqtda qayta hisoblaydi. Bu bazaga to'satdan
+yuklama beradi (thundering herd). Bu yerda:
+
+* single-flight - qayta hisoblashni cache.add() orqali qulf olgan bitta
+  jarayon bajaradi;
+* stale-while-revalidate - qolganlar shu vaqtda eski qiymatni qaytaradi.
+  Qiymat keshda muddatidan keyin yana ``stale`` soniya saqlanadi;
+* muddatidan oldin ehtimoliy yangilash (XFetch) - muddat yaqinlashgan sari
+  va hisoblash qancha uzoq davom etsa, shuncha katta ehtimol bilan qiymat
+  muddati tugashidan oldin yangilanadi;
+* muddatga tasodifiy siljish (jitter) - bir vaqtda yozilgan kalitlar bir
+  vaqtda eskirmaydi;
+* teglar (invalidation) - qiymat bog'liq teglardan biri bekor qilinsa,
+  u eski qiymat sifatida ham berilmaydi.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+
+from . import invalidation
+
+LOCK_TIMEOUT = 30
+# Kesh bo'sh bo'lsa, boshqa jarayon hisoblayotgan qiymatni shuncha kutish
+WAIT_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+JITTER = 0.1
+BETA = 1.0
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _acquire(key):
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(key), token, LOCK_TIMEOUT) else None
+
+
+def _release(key, token):
+    # Qulf muddati o'tib boshqa jarayonga o'tgan bo'lsa, uni o'chirmaslik kerak
+    if cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def _store(key, builder, timeout, stale, jitter, tags):
+    # Avlodlar hisoblashdan oldin olinadi: hisoblash paytidagi o'zgarish qiymatni eskirtiradi
+    depends = invalidation.generations(tags) if tags and not callable(tags) else {}
+    started = time.monotonic()
+    value = builder()
+    if value is None:
+        return None
+    delta = time.monotonic() - started
+    if callable(tags):
+        # Teglari qiymatning o'zidan kelib chiqadi (masalan, sahifadagi pardalar)
+        depends = invalidation.generations(tags(value))
+    ttl = timeout * random.uniform(1 - jitter, 1)
+    cache.set(key, (value, time.time() + ttl, delta, depends), math.ceil(ttl + stale))
+    return value
+
+
+def _current(entry):
+    """Keshdagi yozuv, agar bog'liq teglari bekor qilinmagan bo'lsa"""
+    if entry is None:
+        return None
+    depends = entry[3]
+    if depends and invalidation.generations(depends) != depends:
+        return None
+    return entry
+
+
+def _should_refresh(expires, delta, beta):
+    """XFetch: muddatgacha qolgan vaqt hisoblash vaqtiga nisbatan qisqa bo'lsa True"""
+    return time.time() - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def get_or_set(key, builder, timeout, stale=None, jitter=JITTER, beta=BETA, tags=()):
+    """Keshlangan qiymat yoki builder() natijasi. None qaytarsa keshlanmaydi.
+
+    stale - muddat tugagandan keyin eski qiymat yana necha soniya berilishi
+    mumkin (standart - timeout). Shu vaqt ichida faqat bitta jarayon qiymatni
+    yangilaydi, qolganlari eski qiymatni oladi. tags - qiymat bog'liq teglar
+    ro'yxati yoki qiymatdan teglarni qaytaruvchi funksiya.
+    """
+    stale = timeout if stale is None else stale
+    entry = _current(cache.get(key))
+    if entry is not None:
+        value, expires, delta, depends = entry
+        if not _should_refresh(expires, delta, beta):
+            return value
+        token = _acquire(key)
+        if token is None:
+            return value
+        try:
+            refreshed = _store(key, builder, timeout, stale, jitter, tags)
+        finally:
+            _release(key, token)
+        return value if refreshed is None else refreshed
+
+    token = _acquire(key)
+    if token is None:
+        # Boshqa jarayon hisoblayapti - natijasini kutish
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = _current(cache.get(key))
+            if entry is not None:
+                return entry[0]
+            if cache.get(_lock_key(key)) is None:
+                break
+        return _store(key, builder, timeout, stale, jitter, tags)
+    try:
+        return _store(key, builder, timeout, stale, jitter, tags)
+    finally:
+        _release(key, token)
+
+
+def refresh(key, builder, timeout, stale=None, jitter=JITTER, tags=()):
+    """Qiymatni darhol qayta hisoblab yozish (masalan, warm_cache uchun)"""
+    return _store(key, builder, timeout, timeout if stale is None else stale, jitter, tags)
@@ -1,65 +1,247 @@
-from .models import Curtain
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .api import main_image_subquery
+from .models import CartItem, Curtain, CurtainImage
 
 CART_SESSION_KEY = 'cart'
+# Savat xulosasi (soni va jami) imzolangan cookie'da: "soni:jami".
+# Nishon (badge) va cart_count uni session'ni yuklamasdan o'qiydi.
+# Foydalanuvchi savati boshqa qurilmada o'zgarishi mumkin: uning cookie'si
+# "soni:jami:u" bo'ladi va faqat nishon uchun ishlatiladi, server uni bazadan hisoblaydi.
+SUMMARY_COOKIE = 'cart_summary'
+SUMMARY_SALT = 'curtains.cart.summary'
+USER_MARK = 'u'
 
 
 class Cart:
-    """Session asosida savat"""
+    """Savat: ro'yxatdan o'tgan foydalanuvchi uchun bazada (CartItem), mehmon uchun session'da.
+
+    Session'da ixcham satr saqlanadi (pack_cart). Ikkala holatda ham
+    mahsulotlar bitta so'rov bilan olinadi: parda, asosiy rasm va joriy narx.
+    price - savatga qo'shilgandagi narx; hisob joriy narx bilan olib boriladi,
+    farq bo'lsa price_changed belgilanadi. Savatni o'zgartirgan so'rov javobida
+    xulosa cookie'si yangilanadi (middleware.CartSummaryMiddleware).
+    """
 
     def __init__(self, request):
+        self.request = request
         self.session = request.session
-        self._cart = self.session.setdefault(CART_SESSION_KEY, {})
+        self.user = request.user if request.user.is_authenticated else None
+        self._items = None
+        self._lines = None
 
-    def _save(self):
-        self.session.modified = True
+    def _session_cart(self):
+        """Mehmon savati: {parda_id: [miqdor, narx]}"""
+        if self._lines is None:
+            self._lines = unpack_cart(self.session.get(CART_SESSION_KEY))
+        return self._lines
+
+    def _changed(self):
+        self._items = None
+        if self.user is None:
+            # Bo'sh savat uchun session'da kalit qoldirilmaydi
+            if self._lines:
+                self.session[CART_SESSION_KEY] = pack_cart(self._lines)
+            else:
+                self.session.pop(CART_SESSION_KEY, None)
+        self.request._cart_summary = self
 
     def add(self, curtain, quantity=1):
-        key = str(curtain.pk)
-        if key in self._cart:
-            self._cart[key]['quantity'] += quantity
+        if self.user is not None:
+            add_items(self.user, {curtain.pk: (quantity, curtain.final_price)})
         else:
-            self._cart[key] = {
-                'quantity': quantity,
-                'price': curtain.final_price,
-            }
-        self._save()
+            cart = self._session_cart()
+            if curtain.pk in cart:
+                cart[curtain.pk][0] += quantity
+            else:
+                cart[curtain.pk] = [quantity, curtain.final_price]
+        self._changed()
 
     def remove(self, curtain_id):
-        key = str(curtain_id)
-        if key in self._cart:
-            del self._cart[key]
-            self._save()
+        if self.user is not None:
+            CartItem.objects.filter(user=self.user, curtain_id=curtain_id).delete()
+        else:
+            cart = self._session_cart()
+            if int(curtain_id) not in cart:
+                return
+            del cart[int(curtain_id)]
+        self._changed()
 
     def update_quantity(self, curtain_id, quantity):
-        key = str(curtain_id)
-        if key in self._cart:
-            if quantity > 0:
-                self._cart[key]['quantity'] = quantity
-            else:
-                del self._cart[key]
-            self._save()
+        if quantity <= 0:
+            return self.remove(curtain_id)
+        if self.user is not None:
+            CartItem.objects.filter(user=self.user, curtain_id=curtain_id).update(quantity=quantity)
+        else:
+            cart = self._session_cart()
+            if int(curtain_id) not in cart:
+                return
+            cart[int(curtain_id)][0] = quantity
+        self._changed()
 
     def clear(self):
-        self.session[CART_SESSION_KEY] = {}
-        self.session.modified = True
-        self._cart = self.session[CART_SESSION_KEY]
+        if self.user is not None:
+            CartItem.objects.filter(user=self.user).delete()
+        else:
+            self._lines = {}
+        self._changed()
+
+    def _hydrate(self):
+        """Savat qatorlari: bitta so'rov, natija so'rov davomida saqlanadi"""
+        storage = CurtainImage._meta.get_field('image').storage
+        if self.user is not None:
+            rows = []
+            for item in (
+                CartItem.objects.filter(user=self.user)
+                .select_related('curtain')
+                .annotate(main_image=main_image_subquery('curtain_id'))
+            ):
+                item.curtain.main_image = item.main_image
+                rows.append((item.curtain, item.quantity, item.price))
+        else:
+            cart = self._session_cart()
+            curtains = Curtain.objects.filter(pk__in=list(cart)).annotate(main_image=main_image_subquery())
+            curtains = {curtain.pk: curtain for curtain in curtains}
+            rows = [
+                (curtains[pk], quantity, price)
+                for pk, (quantity, price) in cart.items() if pk in curtains
+            ]
+        items = []
+        for curtain, quantity, saved_price in rows:
+            items.append({
+                'curtain': curtain,
+                'image': storage.url(curtain.main_image) if curtain.main_image else None,
+                'quantity': quantity,
+                'price': curtain.effective_price,
+                'saved_price': saved_price,
+                'price_changed': curtain.effective_price != saved_price,
+                'total_price': quantity * curtain.effective_price,
+            })
+        return items
 
     def __iter__(self):
-        curtain_ids = list(self._cart.keys())
-        curtains = Curtain.objects.filter(pk__in=curtain_ids).prefetch_related('images')
-        curtain_map = {str(c.pk): c for c in curtains}
-        for key, item in self._cart.items():
-            curtain = curtain_map.get(key)
-            if curtain:
-                yield {
-                    'curtain': curtain,
-                    'quantity': item['quantity'],
-                    'price': item['price'],
-                    'total_price': item['quantity'] * item['price'],
-                }
+        if self._items is None:
+            self._items = self._hydrate()
+            # Boshqa qurilmada o'zgargan savat ko'rilganda cookie ham to'g'rilanadi
+            self.request._cart_summary = self
+        return iter(self._items)
 
     def __len__(self):
-        return sum(item['quantity'] for item in self._cart.values())
+        if self._items is not None:
+            return sum(item['quantity'] for item in self._items)
+        if self.user is not None:
+            return CartItem.objects.filter(user=self.user).aggregate(count=Sum('quantity'))['count'] or 0
+        return sum(quantity for quantity, price in self._session_cart().values())
 
     def get_total(self):
-        return sum(item['quantity'] * item['price'] for item in self._cart.values())
+        return sum(item['total_price'] for item in self)
+
+    @property
+    def price_changed(self):
+        return any(item['price_changed'] for item in self)
+
+    def summary(self):
+        """(mahsulotlar soni, jami summa)"""
+        if self._items is None and self.user is not None:
+            # Savat qatorlarini yuklamasdan bitta agregat so'rov
+            totals = CartItem.objects.filter(user=self.user).aggregate(
+                count=Sum('quantity'), total=Sum(F('quantity') * F('curtain__effective_price')),
+            )
+            return totals['count'] or 0, totals['total'] or 0
+        return len(self), self.get_total()
+
+
+
+def pack_cart(lines):
+    """{parda_id: [miqdor, narx]} -> "id:miqdor:narx;..." (JSON lug'atidan bir necha barobar qisqa)"""
+    return ';'.join(f'{pk}:{quantity}:{price}' for pk, (quantity, price) in lines.items())
+
+
+def unpack_cart(value):
+    """pack_cart teskarisi; eski {id: {'quantity', 'price'}} formatini ham o'qiydi"""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return {int(pk): [item['quantity'], item['price']] for pk, item in value.items()}
+    lines = {}
+    for part in value.split(';'):
+        pk, quantity, price = map(int, part.split(':'))
+        lines[pk] = [quantity, price]
+    return lines
+
+
+def add_items(user, items):
+    """Foydalanuvchi savatiga qo'shish: items - {parda_id: (miqdor, narx)}.
+
+    Savatda bor mahsulotning miqdori oshiriladi, qo'shilgandagi narxi o'zgarmaydi.
+    """
+    with transaction.atomic():
+        existing = set(
+            CartItem.objects.select_for_update()
+            .filter(user=user, curtain_id__in=list(items))
+            .values_list('curtain_id', flat=True)
+        )
+        for curtain_id in existing:
+            CartItem.objects.filter(user=user, curtain_id=curtain_id).update(
+                quantity=F('quantity') + items[curtain_id][0]
+            )
+        CartItem.objects.bulk_create([
+            CartItem(user=user, curtain_id=curtain_id, quantity=quantity, price=price)
+            for curtain_id, (quantity, price) in items.items() if curtain_id not in existing
+        ])
+
+
+def merge_session_cart(request, user):
+    """Kirishda mehmon savatini foydalanuvchi savatiga qo'shish va session'dan olib tashlash"""
+    cart = unpack_cart(request.session.pop(CART_SESSION_KEY, None))
+    if not cart:
+        return
+    ids = set(Curtain.objects.filter(pk__in=list(cart)).values_list('pk', flat=True))
+    add_items(user, {pk: tuple(line) for pk, line in cart.items() if pk in ids})
+
+
+def summary_value(summary, user=False):
+    """Cookie qiymati: "soni:jami" (foydalanuvchi savati uchun oxirida ":u")"""
+    return '%d:%d' % summary + (f':{USER_MARK}' if user else '')
+
+
+def read_summary_value(request):
+    """Imzosi to'g'ri cookie qiymati yoki None"""
+    return request.get_signed_cookie(
+        SUMMARY_COOKIE, default=None, salt=SUMMARY_SALT, max_age=settings.SESSION_COOKIE_AGE
+    )
+
+
+def read_summary(request):
+    """Cookie'dagi (soni, jami) yoki None (cookie yo'q, imzo noto'g'ri yoki foydalanuvchi
+    savatiniki - u boshqa qurilmada o'zgargan bo'lishi mumkin)"""
+    value = read_summary_value(request)
+    try:
+        count, total = map(int, value.split(':'))
+    except (AttributeError, ValueError):
+        return None
+    return count, total
+
+
+def cart_summary(request):
+    """(soni, jami): mehmon uchun cookie'dan, aks holda savatdan (javobda cookie yoziladi)"""
+    summary = read_summary(request)
+    if summary is not None:
+        return summary
+    cart = getattr(request, '_cart_summary', None) or Cart(request)
+    request._cart_summary = cart
+    return cart.summary()
+
+
+def write_summary(response, summary, user=False):
+    """summary - (soni, jami) yoki None (cookie o'chiriladi); user - foydalanuvchi savati"""
+    if summary is None:
+        response.delete_cookie(SUMMARY_COOKIE, samesite='Lax')
+        return
+    response.set_signed_cookie(
+        SUMMARY_COOKIE, summary_value(summary, user), salt=SUMMARY_SALT,
+        max_age=settings.SESSION_COOKIE_AGE, secure=settings.SESSION_COOKIE_SECURE,
+        httponly=False, samesite='Lax',
+    )
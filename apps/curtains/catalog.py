@@ -0,0 +1,133 @@
+"""Katalog sahifalari (bosh sahifa, ro'yxatlar, tafsilotlar) uchun keshlangan ma'lumotlar.
+
+Shablonga beriladigan ro'yxatlar tayyor (prefetch qilingan) holda umumiy
+keshda saqlanadi. Keyingi so'rovlar va boshqa worker jarayonlari ularni bazaga
+murojaat qilmasdan oladi. warm_cache buyrug'i deploy'dan keyin shu
+funksiyalarni refresh=True bilan chaqirib keshni oldindan to'ldiradi.
+
+Har bir kalit o'zi ko'rsatadigan modellar teglariga bog'langan
+(invalidation.py). Katalog o'zgarganda tegishli qiymatlar darhol eskiradi,
+shuning uchun muddat (CATALOG_CACHE_TIMEOUT) uzoq bo'lishi mumkin.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+
+from . import caching
+from .bought_together import bought_together_for
+from .filters import filter_curtains
+from .invalidation import CATALOG
+from .models import Category, Color, Curtain
+
+PER_PAGE = 12
+# Kesh kalitiga faqat natijaga ta'sir qiladigan parametrlar kiradi (utm_* va h.k. emas)
+FILTER_PARAMS = ('category', 'color', 'color_mode', 'fabric', 'min_price', 'max_price', 'search', 'sort')
+
+# Ro'yxatlar istalgan parda, kategoriya yoki rang o'zgarishiga bog'liq
+LIST_TAGS = (CATALOG, 'curtain', 'category', 'color')
+FILTER_TAGS = (CATALOG, 'category', 'color')
+
+
+def cached(key, builder, tags, refresh=False):
+    """Keshdan olish (single-flight, stale-while-revalidate). None keshlanmaydi"""
+    timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600)
+    if refresh:
+        return caching.refresh(key, builder, timeout, tags=tags)
+    return caching.get_or_set(key, builder, timeout, tags=tags)
+
+
+def catalog_curtains():
+    return Curtain.objects.filter(is_active=True).select_related('category').prefetch_related('images', 'colors')
+
+
+def index_sections(refresh=False):
+    """Bosh sahifa bo'limlari: asosiy, yangi, chegirmadagi pardalar va kategoriyalar"""
+    def build():
+        curtains = catalog_curtains()
+        return {
+            'featured_curtains': list(curtains.filter(is_featured=True)[:8]),
+            'new_curtains': list(curtains.order_by('-created_date')[:6]),
+            'sale_curtains': list(curtains.filter(on_sale=True)[:6]),
+            'categories': list(Category.objects.order_by('title')),
+        }
+    return cached('catalog:index', build, LIST_TAGS, refresh)
+
+
+def filter_choices(refresh=False):
+    """Ro'yxat sahifasidagi filtr uchun kategoriyalar va ranglar"""
+    return cached('catalog:filters', lambda: {
+        'categories': list(Category.objects.all()),
+        'colors': list(Color.objects.all()),
+    }, FILTER_TAGS, refresh)
+
+
+def _page(queryset, key, page_number, refresh=False):
+    """Sahifalangan ro'yxat: jami soni va har bir sahifa alohida keshlanadi"""
+    count = cached(f'{key}:count', queryset.count, LIST_TAGS, refresh)
+    # Sahifa raqami tekshiruvi uchun faqat jami son kerak
+    paginator = Paginator(range(count), PER_PAGE)
+    number = paginator.get_page(page_number).number
+    bottom = (number - 1) * PER_PAGE
+    items = cached(
+        f'{key}:page:{number}', lambda: list(queryset[bottom:bottom + PER_PAGE]), LIST_TAGS, refresh
+    )
+    return Page(items, number, paginator)
+
+
+def params_key(params):
+    """Filtr parametrlaridan tartibga bog'liq bo'lmagan qisqa kalit"""
+    pairs = sorted(
+        (name, value)
+        for name in FILTER_PARAMS
+        for value in (params.getlist(name) if hasattr(params, 'getlist') else [params.get(name)])
+        if value
+    )
+    return hashlib.md5(urlencode(pairs).encode()).hexdigest()
+
+
+def products_page(params, page_number=None, refresh=False):
+    return _page(
+        filter_curtains(catalog_curtains(), params),
+        f'catalog:products:{params_key(params)}',
+        page_number,
+        refresh,
+    )
+
+
+def category_page(category, page_number=None, refresh=False):
+    return _page(
+        catalog_curtains().filter(category=category),
+        f'catalog:category:{category.pk}',
+        page_number,
+        refresh,
+    )
+
+
+def curtain_detail(slug, refresh=False):
+    """Tafsilotlar sahifasi uchun parda, o'xshashlar va birga xarid qilinadiganlar; topilmasa None"""
+    def build():
+        curtain = catalog_curtains().filter(slug=slug).first()
+        if curtain is None:
+            return None
+        similar = Curtain.objects.filter(
+            category=curtain.category, is_active=True
+        ).exclude(id=curtain.id).select_related('category').prefetch_related('images')[:4]
+        return {
+            'curtain': curtain,
+            'similar_curtains': list(similar),
+            'bought_together': bought_together_for([curtain]),
+        }
+    key = 'catalog:detail:' + hashlib.md5(slug.encode()).hexdigest()
+    return cached(key, build, detail_tags, refresh)
+
+
+def detail_tags(context):
+    """Tafsilotlar sahifasi ko'rsatadigan barcha pardalar, kategoriya va ranglar teglari"""
+    curtain = context['curtain']
+    shown = [curtain, *context['similar_curtains'], *context['bought_together']]
+    return [
+        CATALOG, 'color', f'category:{curtain.category_id}',
+        *(f'curtain:{other.pk}' for other in shown),
+    ]
@@ -0,0 +1,88 @@
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.lookups import Exact, GreaterThan
+
+# BigIntegerField ishorali, shuning uchun 63-bit ishlatilmaydi
+MAX_COLOR_BITS = 63
+REBUILD_CHUNK_SIZE = 1000
+
+
+def bits_to_mask(bits):
+    mask = 0
+    for bit in bits:
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def next_free_bit(color_model):
+    """Ranglar uchun birinchi bo'sh bit raqami (bo'sh bit qolmasa None)"""
+    used = set(color_model.objects.filter(bit__isnull=False).values_list('bit', flat=True))
+    return next((bit for bit in range(MAX_COLOR_BITS) if bit not in used), None)
+
+
+def rebuild_color_masks(curtain_ids=None):
+    """color_mask ustunini curtains_colors jadvalidan qayta hisoblash.
+
+    curtain_ids berilmasa, barcha pardalar bo'laklab qayta hisoblanadi.
+    """
+    from .models import Curtain
+
+    through = Curtain.colors.through
+    if curtain_ids is None:
+        ids = Curtain.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=REBUILD_CHUNK_SIZE)
+    else:
+        ids = iter(curtain_ids)
+
+    updated = 0
+    while chunk := [pk for pk, _ in zip(ids, range(REBUILD_CHUNK_SIZE))]:
+        masks = dict.fromkeys(chunk, 0)
+        rows = through.objects.filter(
+            curtain_id__in=chunk, color__bit__isnull=False
+        ).values_list('curtain_id', 'color__bit')
+        for curtain_id, bit in rows:
+            masks[curtain_id] |= 1 << bit
+
+        # Bir xil niqobli pardalar bitta UPDATE bilan yangilanadi
+        by_mask = {}
+        for curtain_id, mask in masks.items():
+            by_mask.setdefault(mask, []).append(curtain_id)
+        for mask, pks in by_mask.items():
+            updated += Curtain.objects.filter(pk__in=pks).exclude(color_mask=mask).update(color_mask=mask)
+    return updated
+
+
+def any_color_condition(colors):
+    """Berilgan ranglardan kamida bittasiga ega pardalar sharti.
+
+    colors - (pk, bit) juftliklari. Bitga ega ranglar color_mask orqali
+    JOIN'siz tekshiriladi, qolganlari uchun EXISTS so'rovi ishlatiladi.
+    """
+    from .models import Curtain
+
+    colors = list(colors)
+    if not colors:
+        return Q(pk__in=[])
+
+    mask = bits_to_mask(bit for _, bit in colors)
+    without_bit = [pk for pk, bit in colors if bit is None]
+    condition = Q()
+    if mask:
+        condition |= Q(GreaterThan(F('color_mask').bitand(mask), 0))
+    if without_bit:
+        condition |= Q(Exists(Curtain.colors.through.objects.filter(
+            curtain_id=OuterRef('pk'), color_id__in=without_bit,
+        )))
+    return condition
+
+
+def all_colors_condition(colors):
+    """Berilgan ranglarning barchasiga ega pardalar sharti"""
+    colors = list(colors)
+    mask = bits_to_mask(bit for _, bit in colors)
+    condition = Q()
+    if mask:
+        condition &= Q(Exact(F('color_mask').bitand(mask), mask))
+    for pk, bit in colors:
+        if bit is None:
+            condition &= any_color_condition([(pk, None)])
+    return condition
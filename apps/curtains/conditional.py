@@ -0,0 +1,98 @@
+"""Katalog sahifalari va JSON endpoint'lari uchun shartli GET (ETag / Last-Modified).
+
+Validator'lar sahifani render qilmasdan hisoblanadi: katalog teglarining
+avlodlari (invalidation.generations), pardalarning modified_date qiymati va
+savat holati. Brauzer If-None-Match / If-Modified-Since yuborganda va ular
+mos kelganda django.views.decorators.http.condition view'ni umuman
+chaqirmasdan 304 qaytaradi.
+
+HTML sahifalarda foydalanuvchi menyusi va csrf_token bor. Shu sababli ETag
+foydalanuvchi va CSRF cookie'siga ham bog'liq. Ko'rsatilmagan flash xabarlar
+bo'lsa validator berilmaydi: sahifa to'liq render qilinishi kerak.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+
+from . import api, catalog
+from .cart import cart_summary
+from .invalidation import generations
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _tags_version(tags):
+    found = generations(tags)
+    return [found[tag] for tag in sorted(found)]
+
+
+def page_etag(request, tags, *parts):
+    """HTML sahifa uchun ETag: teglar avlodlari + URL + foydalanuvchi + CSRF cookie"""
+    if len(get_messages(request)):
+        return None
+    return _digest(
+        *_tags_version(tags),
+        *parts,
+        request.get_full_path(),
+        request.user.pk if request.user.is_authenticated else '',
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    )
+
+
+def list_etag(request, *args, **kwargs):
+    return page_etag(request, catalog.LIST_TAGS)
+
+
+def detail_context(request, slug):
+    """Tafsilotlar ma'lumoti so'rov davomida bir marta olinadi (validator va view uchun)"""
+    if not hasattr(request, '_curtain_detail'):
+        request._curtain_detail = catalog.curtain_detail(slug)
+    return request._curtain_detail
+
+
+def counts_detail_view(view):
+    """Ko'rishni @condition tashqarisida hisoblash: 304 javobi ham ko'rish (view tanasi bajarilmaydi)"""
+    @wraps(view)
+    def wrapper(request, slug, *args, **kwargs):
+        response = view(request, slug, *args, **kwargs)
+        if response.status_code in (200, 304) and request.method == 'GET':
+            context = detail_context(request, slug)
+            if context is not None:
+                context['curtain'].increment_views()
+        return response
+    return wrapper
+
+
+def detail_etag(request, slug):
+    context = detail_context(request, slug)
+    if context is None:
+        return None
+    return page_etag(request, catalog.detail_tags(context))
+
+
+def detail_last_modified(request, slug):
+    context = detail_context(request, slug)
+    if context is None:
+        return None
+    shown = [context['curtain'], *context['similar_curtains'], *context['bought_together']]
+    return max(curtain.modified_date for curtain in shown)
+
+
+def autocomplete_etag(request):
+    return _digest(*_tags_version(catalog.LIST_TAGS), request.GET.get('q', ''))
+
+
+def api_etag(request, *args, **kwargs):
+    """Katalog API: javob faqat katalog va so'rov URL'iga bog'liq (views so'ralmagan bo'lsa)"""
+    if api.is_volatile(request.GET, detail='slug' in kwargs):
+        return None
+    return _digest(*_tags_version(catalog.LIST_TAGS), request.get_full_path())
+
+
+def cart_etag(request):
+    """Savat xulosasi xeshi: xulosa cookie'si bo'lsa session yuklanmaydi"""
+    return _digest(*cart_summary(request))
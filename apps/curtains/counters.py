@@ -0,0 +1,63 @@
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+
+def _shift(model, pks, delta):
+    """active_curtains_count'ni delta qadar o'zgartirish (manfiyga tushmaydi)"""
+    pks = [pk for pk in pks if pk is not None]
+    if not pks or not delta:
+        return
+    model.objects.filter(pk__in=pks).update(
+        active_curtains_count=Greatest(F('active_curtains_count') + delta, 0)
+    )
+
+
+def shift_category(category_id, delta):
+    from .models import Category
+    _shift(Category, [category_id], delta)
+
+
+def shift_colors(color_ids, delta):
+    from .models import Color
+    _shift(Color, list(color_ids), delta)
+
+
+def shift_colors_by_curtains(color_id, curtain_ids, sign):
+    """Rangga bog'langan/uzilgan pardalardan faollarini hisoblab, rang hisoblagichini o'zgartirish"""
+    from .models import Curtain
+    active = Curtain.objects.filter(pk__in=curtain_ids, is_active=True).count()
+    shift_colors([color_id], sign * active)
+
+
+def counter_targets(curtains):
+    """queryset.update() dan oldin: ta'sirlanadigan kategoriya va rang id'lari"""
+    from .models import Curtain
+    category_ids = set(curtains.values_list('category_id', flat=True))
+    color_ids = set(
+        Curtain.colors.through.objects.filter(curtain__in=curtains).values_list('color_id', flat=True)
+    )
+    return category_ids - {None}, color_ids
+
+
+def recount_curtains(category_ids=None, color_ids=None):
+    """Hisoblagichlarni haqiqiy qiymatlar bilan solishtirib tuzatish.
+
+    ids berilmasa barcha kategoriya va ranglar tekshiriladi. Tuzatilgan
+    qatorlar soni qaytariladi.
+    """
+    from .models import Category, Color
+
+    fixed = 0
+    for model, ids in ((Category, category_ids), (Color, color_ids)):
+        queryset = model.objects.all()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=list(ids))
+        rows = queryset.annotate(
+            actual=Count('curtains', filter=Q(curtains__is_active=True), distinct=True)
+        ).exclude(active_curtains_count=F('actual')).values_list('pk', 'actual')
+        for pk, actual in rows:
+            fixed += model.objects.filter(pk=pk).update(active_curtains_count=actual)
+    if fixed:
+        from .invalidation import invalidate
+        invalidate('category', 'color')
+    return fixed
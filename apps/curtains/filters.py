@@ -0,0 +1,97 @@
+from django.db.models import Q
+
+from .colors import all_colors_condition, any_color_condition
+from .models import Color
+
+# ?sort= qiymatlari va ularga mos tartiblash (har biri qisman indeks bilan qo'llab-quvvatlanadi)
+SORT_ORDERING = {
+    'price_low': 'effective_price',
+    'price_high': '-effective_price',
+    'name': 'title',
+    'views': '-views',
+    'created_date': '-created_date',
+}
+DEFAULT_SORT = 'created_date'
+
+
+def filter_curtains(queryset, params):
+    """Katalog filtrlari va saralashni GET parametrlari bo'yicha qo'llash"""
+    category_id = params.get('category')
+    fabric_type = params.get('fabric')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    search = params.get('search')
+    sort_by = params.get('sort', DEFAULT_SORT)
+
+    if category_id:
+        # Try to convert to integer first, if fails, try to find by title
+        try:
+            queryset = queryset.filter(category_id=int(category_id))
+        except (ValueError, TypeError):
+            # If not a number, try to find category by title (case-insensitive)
+            queryset = queryset.filter(category__title__icontains=category_id)
+
+    color_tokens = _color_tokens(params)
+    if color_tokens:
+        queryset = queryset.filter(
+            color_condition(color_tokens, match_all=params.get('color_mode') == 'all')
+        )
+
+    if fabric_type:
+        queryset = queryset.filter(fabric_type=fabric_type)
+
+    if min_price:
+        try:
+            queryset = queryset.filter(effective_price__gte=int(min_price))
+        except (ValueError, TypeError):
+            pass
+
+    if max_price:
+        try:
+            queryset = queryset.filter(effective_price__lte=int(max_price))
+        except (ValueError, TypeError):
+            pass
+
+    if search:
+        queryset = queryset.filter(
+            Q(title__icontains=search) |
+            Q(content__icontains=search) |
+            Q(category__title__icontains=search)
+        )
+
+    ordering = SORT_ORDERING.get(sort_by, SORT_ORDERING[DEFAULT_SORT])
+    return queryset.order_by(ordering)
+
+
+def _color_tokens(params):
+    """?color=1&color=2 yoki ?color=1,oq ko'rinishidagi qiymatlarni ro'yxatga aylantirish"""
+    values = params.getlist('color') if hasattr(params, 'getlist') else [params.get('color')]
+    return [token.strip() for value in values if value for token in value.split(',') if token.strip()]
+
+
+def color_condition(tokens, match_all=False):
+    """Rang filtri sharti: JOIN o'rniga color_mask yoki EXISTS ishlatiladi.
+
+    Har bir token rang id'si yoki nomining bir qismi. Nom bir nechta rangga
+    mos kelsa, ulardan istalgani yetarli. match_all=True bo'lsa pardada
+    barcha tokenlarga mos rang bo'lishi kerak, aks holda bittasi yetarli.
+    """
+    ids = [int(token) for token in tokens if token.isdigit()]
+    bits = dict(Color.objects.filter(pk__in=ids).values_list('pk', 'bit')) if ids else {}
+
+    groups = []
+    for token in tokens:
+        if token.isdigit():
+            pk = int(token)
+            groups.append([(pk, bits[pk])] if pk in bits else [])
+        else:
+            groups.append(list(Color.objects.filter(title__icontains=token).values_list('pk', 'bit')))
+
+    if not match_all:
+        return any_color_condition(color for group in groups for color in group)
+
+    condition = all_colors_condition(group[0] for group in groups if len(group) == 1)
+    for group in groups:
+        if len(group) != 1:
+            condition &= any_color_condition(group)
+    return condition
@@ -0,0 +1,89 @@
+import hashlib
+import warnings
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.translation import gettext_lazy as _
+from PIL import Image, ImageOps
+
+CONTENT_ADDRESSED_PREFIX = 'curtains/ca'
+# Rasmni o'qib bo'lmaganda yoki u juda katta bo'lganda chiqadigan xatolar.
+# DecompressionBombError OSError emas; ogohlantirish ham xato deb olinadi (open_image)
+IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError, Image.DecompressionBombWarning)
+
+
+def open_image(file):
+    """Image.open, MAX_IMAGE_PIXELS'dan katta rasm xotiraga yuklanmasdan rad etiladi"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        return Image.open(file)
+
+
+def validate_image(file):
+    """Yuklangan rasmni tekshirish: faqat sarlavha o'qiladi"""
+    file.seek(0)
+    try:
+        with open_image(file):
+            pass
+    except IMAGE_ERRORS:
+        raise ValidationError(_('Rasmni o\'qib bo\'lmadi yoki u juda katta.'), code='invalid_image')
+    finally:
+        file.seek(0)
+
+
+def normalize_image(file):
+    """Rasmni qayta kodlash: EXIF bo'yicha burish, o'lchamni cheklash, metama'lumotlarni olib tashlash.
+
+    Natija har doim EXIF'siz progressiv JPEG baytlari bo'ladi.
+    """
+    max_size = getattr(settings, 'CURTAIN_IMAGE_MAX_SIZE', 1600)
+    quality = getattr(settings, 'CURTAIN_IMAGE_QUALITY', 82)
+
+    file.seek(0)
+    with open_image(file) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # Shaffof fonni oq rangga almashtirish (JPEG alfa kanalni qo'llamaydi)
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+        output = BytesIO()
+        # exif/icc_profile berilmagani uchun metama'lumotlar yozilmaydi
+        image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def content_addressed_name(data, suffix='.jpg'):
+    """Fayl nomini uning SHA-256 xeshidan hosil qilish"""
+    digest = hashlib.sha256(data).hexdigest()
+    return f'{CONTENT_ADDRESSED_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{suffix}'
+
+
+def store_normalized_image(file, storage=None):
+    """Rasmni normallashtirib, kontent xeshi bo'yicha saqlash.
+
+    Bir xil rasm qayta yuklansa, yangi fayl yozilmaydi - mavjud fayl nomi
+    qaytariladi. Shu sababli bitta fayl bir nechta parda tomonidan
+    ishlatilishi mumkin.
+    """
+    storage = storage or default_storage
+    data = normalize_image(file)
+    name = content_addressed_name(data)
+    if not storage.exists(name):
+        saved_name = storage.save(name, ContentFile(data))
+        # Parallel yuklashda boshqa jarayon faylni birinchi yozgan bo'lishi mumkin
+        if saved_name != name:
+            storage.delete(saved_name)
+    return name
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(f'{CONTENT_ADDRESSED_PREFIX}/')
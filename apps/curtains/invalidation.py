@@ -0,0 +1,129 @@
+"""Katalog keshini bog'liqliklar (teglar) bo'yicha bekor qilish.
+
+Teg - model ('curtain', 'category', 'color') yoki obyekt ('curtain:5',
+'category:2') nomi. Har bir teg uchun keshda avlod (generation) hisoblagichi
+saqlanadi. Keshlangan qiymat o'zi bog'liq teglarning o'sha paytdagi
+avlodlari bilan birga yoziladi (caching.get_or_set(tags=...)). O'qishda
+avlodlar solishtiriladi, biri oshgan bo'lsa qiymat eskirgan hisoblanadi.
+
+Avlodlar save/delete, m2m_changed signallarida (track) va signal
+chaqirmaydigan queryset.update() joylarida (invalidate_curtains) oshiriladi.
+Bu tranzaksiya commit qilingandan keyin bajariladi. Shundan keyin
+tags_invalidated signali yuboriladi: CACHE_PURGE_URL berilgan bo'lsa,
+tashqi HTTP kesh (Varnish, CDN) Surrogate-Key bo'yicha tozalanadi.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+# Barcha katalog kalitlari bog'liq bo'lgan umumiy teg
+CATALOG = 'catalog'
+# Bundan ko'p obyekt o'zgarsa har biri o'rniga butun katalog bekor qilinadi
+BULK_LIMIT = 200
+
+tags_invalidated = Signal()
+
+_tracked = {}
+
+
+def _generation_key(tag):
+    return f'gen:{tag}'
+
+
+def _new_generation():
+    # Hisoblagich keshdan chiqib ketsa, qayta yaratilgani eski qiymatga teng bo'lmasligi kerak
+    return time.time_ns()
+
+
+def generations(tags):
+    """Teglarning joriy avlodlari: {teg: avlod}"""
+    keys = {_generation_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    for key in keys.keys() - found.keys():
+        cache.add(key, _new_generation(), None)
+        found[key] = cache.get(key)
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def bump(tags):
+    """Teglar avlodini darhol oshirish va tashqi keshga xabar berish"""
+    tags = sorted(set(tags))
+    for tag in tags:
+        try:
+            cache.incr(_generation_key(tag))
+        except ValueError:
+            cache.set(_generation_key(tag), _new_generation(), None)
+    if tags:
+        tags_invalidated.send(sender=None, tags=tags)
+
+
+def invalidate(*tags):
+    """Commit'dan keyin teglarni bekor qilish (tranzaksiya tashqarisida - darhol)"""
+    tags = set(tags)
+    transaction.on_commit(lambda: bump(tags))
+
+
+def invalidate_all():
+    invalidate(CATALOG)
+
+
+def curtain_tags(curtain_id, *category_ids):
+    return ['curtain', f'curtain:{curtain_id}', *(f'category:{pk}' for pk in category_ids if pk)]
+
+
+def invalidate_curtains(curtains):
+    """Signal chaqirmaydigan o'zgarishlar (queryset.update, bulk_update) uchun.
+
+    curtains - queryset yoki id'lar; update()dan oldin ham, keyin ham chaqirish mumkin.
+    """
+    from .models import Curtain
+
+    if not hasattr(curtains, 'values_list'):
+        curtains = Curtain.objects.filter(pk__in=list(curtains))
+    rows = list(curtains.values_list('pk', 'category_id')[:BULK_LIMIT + 1])
+    if len(rows) > BULK_LIMIT:
+        invalidate_all()
+        return
+    invalidate(*(tag for pk, category_id in rows for tag in curtain_tags(pk, category_id)))
+
+
+def tag_response(response, tags):
+    """Javobni teglar bilan belgilash - tashqi kesh PURGE'da shu teglar bo'yicha tozalaydi"""
+    response['Surrogate-Key'] = ' '.join(sorted(set(tags)))
+    return response
+
+
+def track(model, object_tags):
+    """Model o'zgarganda (save/delete) object_tags(obj) teglarini bekor qilish.
+
+    Teglar saqlashdan oldin ham hisoblanadi: obyekt boshqa kategoriyaga
+    o'tkazilganda eski kategoriya sahifalari ham yangilanadi.
+    """
+    _tracked[model] = object_tags
+    uid = f'invalidation:{model._meta.label}'
+    pre_save.connect(_remember_tags, sender=model, dispatch_uid=uid)
+    post_save.connect(_changed, sender=model, dispatch_uid=uid)
+    post_delete.connect(_changed, sender=model, dispatch_uid=uid)
+
+
+def _remember_tags(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._tags_before_save = set(_tracked[sender](instance))
+
+
+def _changed(sender, instance, **kwargs):
+    tags = set(_tracked[sender](instance)) | getattr(instance, '_tags_before_save', set())
+    instance._tags_before_save = set()
+    invalidate(*tags)
+
+
+@receiver(tags_invalidated)
+def enqueue_purge(sender, tags, **kwargs):
+    if getattr(settings, 'CACHE_PURGE_URL', ''):
+        from .tasks import purge_http_cache
+
+        purge_http_cache.delay(tags=list(tags))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.curtains.bought_together import MIN_ORDERS, TOP_PAIRS, build_bought_together
+
+
+class Command(BaseCommand):
+    help = '"Birga xarid qilinadi" juftliklarini yangi buyurtmalar asosida yangilash'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Indeksni barcha buyurtmalardan noldan qayta qurish')
+        parser.add_argument('--limit', type=int, default=TOP_PAIRS,
+                            help='Har bir parda uchun saqlanadigan juftliklar soni')
+        parser.add_argument('--min-orders', type=int, default=MIN_ORDERS,
+                            help='Juftlik hisobga olinishi uchun kamida nechta buyurtmada birga kelishi kerak')
+
+    def handle(self, *args, **options):
+        orders, changed = build_bought_together(
+            full=options['full'], limit=options['limit'], min_orders=options['min_orders'],
+        )
+        self.stdout.write(f'Qayta ishlangan buyurtmalar: {orders}')
+        self.stdout.write(f'Tavsiyalari yangilangan pardalar: {changed}')
+        self.stdout.write(self.style.SUCCESS('Juftliklar indeksi yangilandi!'))
@@ -0,0 +1,42 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Muddati o\'tgan session qatorlarini kichik partiyalarda o\'chirish '
+            '(cron orqali, masalan har soatda ishga tushiriladi)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Bitta DELETE so\'rovidagi qatorlar soni')
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Partiyalar orasidagi tanaffus (soniya) - jadval uzoq qulflanmasligi uchun')
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # cache / signed_cookies - muddati o'tgan yozuvlar o'zi yo'qoladi
+            store.clear_expired()
+            self.stdout.write(f'{settings.SESSION_ENGINE}: bazada session jadvali yo\'q')
+            return
+
+        model = store.get_model_class()
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Muddati o\'tgan session\'lar o\'chirildi: {deleted} ta'))
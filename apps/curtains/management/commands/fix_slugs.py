@@ -1,42 +1,37 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
 from apps.curtains.models import Curtain
-from django.utils.text import slugify
+from apps.curtains.slugs import SlugAllocator
 
 
 class Command(BaseCommand):
     help = 'Bo\'sh slug maydonlarini tuzatish'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Bitta UPDATE so\'rovidagi pardalar soni')
+
     def handle(self, *args, **options):
         self.stdout.write('Slug maydonlarini tekshirish va tuzatish...')
-        
-        curtains_fixed = 0
-        
-        for curtain in Curtain.objects.all():
-            if not curtain.slug or curtain.slug.strip() == '':
-                # Slug yaratish
-                new_slug = slugify(curtain.title)
-                
-                # Slug unique emasligini tekshirish
-                original_slug = new_slug
-                counter = 1
-                while Curtain.objects.filter(slug=new_slug).exclude(id=curtain.id).exists():
-                    new_slug = f'{original_slug}-{counter}'
-                    counter += 1
-                
-                # Slug yangilash
-                curtain.slug = new_slug
-                curtain.save(update_fields=['slug'])
-                
-                self.stdout.write(f'Tuzatildi: "{curtain.title}" -> "{new_slug}"')
-                curtains_fixed += 1
-            else:
-                self.stdout.write(f'OK: "{curtain.title}" -> "{curtain.slug}"')
-        
-        if curtains_fixed > 0:
+
+        allocator = SlugAllocator(Curtain.objects.all())
+        empty_slug = Q(slug='') | Q(slug__isnull=True) | Q(slug__regex=r'^\s+$')
+
+        fixed = []
+        for curtain in Curtain.objects.filter(empty_slug).only('id', 'title', 'slug').iterator():
+            curtain.slug = allocator.allocate(curtain.title, exclude_pk=curtain.pk)
+            fixed.append(curtain)
+            self.stdout.write(f'Tuzatildi: "{curtain.title}" -> "{curtain.slug}"')
+
+        with transaction.atomic():
+            Curtain.objects.bulk_update(fixed, ['slug'], batch_size=options['batch_size'])
+
+        if fixed:
             self.stdout.write(
-                self.style.SUCCESS(f'{curtains_fixed} ta parda slug maydonlari tuzatildi!')
+                self.style.SUCCESS(f'{len(fixed)} ta parda slug maydonlari tuzatildi!')
             )
         else:
             self.stdout.write(
                 self.style.SUCCESS('Barcha slug maydonlari to\'g\'ri!')
-            )
\ No newline at end of file
+            )
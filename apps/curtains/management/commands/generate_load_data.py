@@ -0,0 +1,362 @@
+import bisect
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from PIL import Image, ImageDraw
+
+from apps.curtains.colors import bits_to_mask
+from apps.curtains.counters import recount_curtains
+from apps.curtains.invalidation import invalidate_all
+from apps.curtains.models import Category, Color, Curtain, CurtainImage
+from apps.curtains.slugs import SlugAllocator
+from apps.orders.models import Order, OrderItem, OrderStatusHistory
+
+User = get_user_model()
+
+CATEGORY_TITLES = [
+    'Klassik Pardalar', 'Zamonaviy Pardalar', 'Hashamatli Pardalar',
+    'Bolalar Xonasi Pardalari', 'Oshxona Pardalari', 'Yotoq Xonasi Pardalari',
+    'Mehmonxona Pardalari', 'Ofis Pardalari',
+]
+
+COLOR_DATA = [
+    ('Oq', '#FFFFFF'), ('Qora', '#000000'), ('Qizil', '#DC143C'), ('Ko\'k', '#0000FF'),
+    ('Yashil', '#228B22'), ('Sariq', '#FFD700'), ('Jigarrang', '#8B4513'),
+    ('Kulrang', '#808080'), ('Bej', '#F5F5DC'), ('Oltin', '#DAA520'),
+    ('Pushti', '#FFC0CB'), ('Binafsha', '#8A2BE2'),
+]
+
+TITLE_STYLES = ['Klassik', 'Zamonaviy', 'Hashamatli', 'Royal', 'Lux', 'Eco', 'Tungi', 'Ofis', 'Bolalar', 'Oshxona']
+TITLE_COLORS = ['Oq', 'Qizil', 'Ko\'k', 'Yashil', 'Sariq', 'Bej', 'Kulrang', 'Oltin', 'Pushti', 'Binafsha']
+
+FIRST_NAMES = ['Aziz', 'Dilnoza', 'Jasur', 'Malika', 'Sardor', 'Nodira', 'Bekzod', 'Gulnora', 'Otabek', 'Zarina']
+LAST_NAMES = ['Karimov', 'Rahimova', 'Tursunov', 'Yusupova', 'Aliyev', 'Nazarova', 'Qodirov', 'Ergasheva']
+CITIES = ['Navoiy', 'Toshkent', 'Samarqand', 'Buxoro', 'Qarshi', 'Zarafshon']
+
+# Yakuniy holatlar taqsimoti (eski buyurtmalar asosan yetkazilgan bo'ladi)
+STATUS_WEIGHTS = {
+    'pending': 6, 'confirmed': 6, 'in_progress': 5, 'ready': 4, 'delivered': 70, 'cancelled': 9,
+}
+STATUS_FLOW = ['pending', 'confirmed', 'in_progress', 'ready', 'delivered']
+
+
+def render_placeholder(args):
+    """Bitta placeholder rasmni JPEG baytlari sifatida chizish (jarayonlar pulida ishlaydi)"""
+    seed, width, height = args
+    rng = random.Random(seed)
+    base = tuple(rng.randint(40, 230) for _ in range(3))
+    accent = tuple(min(255, c + rng.randint(20, 60)) for c in base)
+    image = Image.new('RGB', (width, height), base)
+    draw = ImageDraw.Draw(image)
+    step = rng.choice([30, 40, 60, 80])
+    if rng.random() < 0.5:
+        for x in range(0, width, step):
+            draw.rectangle([x, 0, x + step // 4, height], fill=accent)
+    else:
+        for i in range(-height, width, step):
+            draw.line([(i, 0), (i + height, height)], fill=accent, width=4)
+    output = BytesIO()
+    image.save(output, format='JPEG', quality=80)
+    return output.getvalue()
+
+
+@contextmanager
+def auto_now_disabled(*model_classes):
+    """auto_now/auto_now_add'ni vaqtincha o'chirish (tarixiy sanalarni yozish uchun)"""
+    saved = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def parse_anchor(value):
+    """YYYY-MM-DD -> shu kunning boshi (joriy vaqt zonasida)"""
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise CommandError('Sana YYYY-MM-DD formatida bo\'lishi kerak.')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Yuklama testlari uchun katta hajmdagi sintetik ma\'lumotlar yaratish'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curtains', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--staff', type=int, default=5)
+        parser.add_argument('--orders', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=365,
+                            help='Buyurtmalar necha kunlik davrga taqsimlanadi')
+        parser.add_argument('--images', type=int, default=1,
+                            help='Har bir parda uchun rasmlar soni (0 - rasmsiz)')
+        parser.add_argument('--image-size', default='400x300')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--anchor',
+                            help='Sanalar hisoblanadigan kun (YYYY-MM-DD, standart - bugun). '
+                                 'Bir xil --seed va --anchor bir xil ma\'lumot beradi')
+        parser.add_argument('--tag', default='lt',
+                            help='Yaratilgan foydalanuvchilar va buyurtmalar prefiksi')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        # Sanalar soatga emas, kun boshiga bog'lanadi: --seed takrorlanuvchan bo'lishi uchun
+        self.now = parse_anchor(options['anchor'] or timezone.localdate().isoformat())
+        tag = options['tag']
+
+        # Buyurtma raqami 20 belgiga sig'ishi kerak: TAG-YYYYMMDD-NNNNN
+        if not tag.isalnum() or len(tag) > 4:
+            raise CommandError('--tag 1-4 ta harf yoki raqamdan iborat bo\'lishi kerak.')
+        if User.objects.filter(username__startswith=f'{tag}_').exists():
+            raise CommandError(f'"{tag}" prefiksi bilan ma\'lumotlar allaqachon mavjud. Boshqa --tag tanlang.')
+
+        categories = self.ensure_categories()
+        colors = self.ensure_colors()
+
+        staff_ids = self.create_users(options['staff'], tag, is_staff=True)
+        user_ids = self.create_users(options['users'], tag)
+        curtain_rows = self.create_curtains(options['curtains'], categories, colors)
+        if options['images']:
+            self.create_images(curtain_rows)
+        self.create_orders(options['orders'], curtain_rows, user_ids, staff_ids, tag)
+        # bulk_create signallarni chaqirmaydi - katalog keshi to'liq bekor qilinadi
+        invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS('Sintetik ma\'lumotlar muvaffaqiyatli yaratildi!'))
+
+    def ensure_categories(self):
+        categories = list(Category.objects.all())
+        if not categories:
+            categories = Category.objects.bulk_create(Category(title=t) for t in CATEGORY_TITLES)
+        return categories
+
+    def ensure_colors(self):
+        colors = list(Color.objects.all())
+        if not colors:
+            colors = Color.objects.bulk_create(
+                Color(title=t, hex_code=h, bit=bit) for bit, (t, h) in enumerate(COLOR_DATA)
+            )
+        return colors
+
+    def create_users(self, count, tag, is_staff=False):
+        if not count:
+            return []
+        kind = 'staff' if is_staff else 'user'
+        # Parol xeshi bir marta hisoblanadi - har bir foydalanuvchi uchun hash qilish juda sekin
+        password = make_password('loadtest123')
+        rng = self.rng
+        ids = []
+        for chunk in chunked(range(count), self.batch_size):
+            users = [
+                User(
+                    username=f'{tag}_{kind}_{i:07d}',
+                    email=f'{tag}_{kind}_{i:07d}@example.com',
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    phone=f'+998 9{rng.randint(0, 9)} {rng.randint(100, 999)} '
+                          f'{rng.randint(10, 99)} {rng.randint(10, 99)}',
+                    password=password,
+                    is_staff=is_staff,
+                )
+                for i in chunk
+            ]
+            ids.extend(u.pk for u in User.objects.bulk_create(users))
+        self.stdout.write(f'{len(ids)} ta {kind} yaratildi')
+        return ids
+
+    def create_curtains(self, count, categories, colors):
+        """Pardalarni yaratish; (id, yakuniy narx) juftliklarini qaytaradi"""
+        rng = self.rng
+        allocator = SlugAllocator(Curtain.objects.all())
+        fabrics = [choice for choice, _ in Curtain.FABRIC_CHOICES]
+        color_through = Curtain.colors.through
+        rows = []
+
+        with auto_now_disabled(Curtain):
+            for chunk in chunked(range(count), self.batch_size):
+                curtains, curtain_colors = [], []
+                for _ in chunk:
+                    picked_colors = rng.sample(colors, rng.randint(1, min(3, len(colors))))
+                    curtain_colors.append(picked_colors)
+                    title = f'{rng.choice(TITLE_STYLES)} {rng.choice(TITLE_COLORS)} Parda'
+                    # Narxlar log-normal taqsimlangan: ko'pchiligi arzon, ozchiligi qimmat
+                    price = int(min(5_000_000, max(50_000, rng.lognormvariate(12.7, 0.5))) // 1000 * 1000)
+                    discount_price = None
+                    if rng.random() < 0.2:
+                        discount_price = int(price * rng.uniform(0.7, 0.95)) // 1000 * 1000
+                    created = self.now - timedelta(days=rng.uniform(0, self.options['days'] * 2))
+                    curtains.append(Curtain(
+                        title=title,
+                        slug=allocator.allocate(title),
+                        content=f'{title} - yuklama testi uchun yaratilgan parda.',
+                        price=price,
+                        discount_price=discount_price,
+                        category=rng.choice(categories),
+                        fabric_type=rng.choice(fabrics),
+                        width=rng.choice([120, 150, 180, 200, 250, 300]),
+                        height=rng.choice([150, 200, 250, 280, 300]),
+                        status=rng.choices(['available', 'out_of_stock', 'discontinued'], [90, 7, 3])[0],
+                        is_featured=rng.random() < 0.02,
+                        is_active=rng.random() < 0.95,
+                        # bulk_create m2m_changed signalini chaqirmaydi - niqob shu yerda hisoblanadi
+                        color_mask=bits_to_mask(color.bit for color in picked_colors),
+                        views=int(rng.paretovariate(1.2) * 10),
+                        stock_quantity=rng.randint(0, 50),
+                        created_date=created,
+                        modified_date=created,
+                    ))
+                Curtain.objects.bulk_create(curtains)
+
+                links = [
+                    color_through(curtain_id=curtain.pk, color_id=color.pk)
+                    for curtain, picked_colors in zip(curtains, curtain_colors)
+                    for color in picked_colors
+                ]
+                color_through.objects.bulk_create(links, batch_size=self.batch_size)
+                rows.extend((c.pk, c.final_price) for c in curtains)
+                self.stdout.write(f'  {len(rows)}/{count} parda')
+
+        # bulk_create signallarni chaqirmaydi - faol pardalar hisoblagichlari qayta hisoblanadi
+        recount_curtains()
+        return rows
+
+    def create_images(self, curtain_rows):
+        """Placeholder rasmlarni jarayonlar pulida chizish va saqlash"""
+        width, height = (int(x) for x in self.options['image_size'].split('x'))
+        per_curtain = self.options['images']
+        seed = self.options['seed']
+        jobs = [
+            (curtain_id, index)
+            for curtain_id, _ in curtain_rows
+            for index in range(per_curtain)
+        ]
+        created = 0
+        with ProcessPoolExecutor(max_workers=self.options['workers']) as pool:
+            for chunk in chunked(jobs, self.batch_size):
+                args = [(seed * 1_000_003 + curtain_id * 31 + index, width, height)
+                        for curtain_id, index in chunk]
+                images = []
+                for (curtain_id, index), data in zip(chunk, pool.map(render_placeholder, args, chunksize=64)):
+                    name = default_storage.save(
+                        f'curtains/loadtest/{curtain_id}_{index + 1}.jpg', ContentFile(data)
+                    )
+                    images.append(CurtainImage(
+                        curtain_id=curtain_id, image=name, order=index, is_main=(index == 0),
+                    ))
+                CurtainImage.objects.bulk_create(images)
+                created += len(images)
+                self.stdout.write(f'  {created}/{len(jobs)} rasm')
+
+    def create_orders(self, count, curtain_rows, user_ids, staff_ids, tag):
+        rng = self.rng
+        days = self.options['days']
+        # Mashhurlik Zipf qonuniga yaqin: bir nechta parda ko'p sotiladi
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(curtain_rows))))
+        total_weight = cum_weights[-1] if cum_weights else 0
+        statuses = list(STATUS_WEIGHTS)
+        status_weights = list(STATUS_WEIGHTS.values())
+        day_counters = {}
+        created_total = 0
+
+        if not curtain_rows:
+            return
+
+        with auto_now_disabled(Order, OrderItem, OrderStatusHistory):
+            for chunk in chunked(range(count), self.batch_size):
+                orders, plans = [], []
+                for _ in chunk:
+                    # Yangi kunlarda buyurtmalar ko'proq (o'sish trendi)
+                    age_days = days * (1 - rng.random() ** 0.7)
+                    created = self.now - timedelta(days=age_days)
+                    day = timezone.localtime(created).strftime('%Y%m%d')
+                    day_counters[day] = day_counters.get(day, 0) + 1
+
+                    status = rng.choices(statuses, status_weights)[0]
+                    if age_days < 3 and status == 'delivered':
+                        status = rng.choice(['pending', 'confirmed', 'in_progress'])
+                    path = self.status_path(status)
+                    moments = [created]
+                    for _ in path[1:]:
+                        moments.append(moments[-1] + timedelta(hours=rng.uniform(1, 48)))
+                    moments = [min(m, self.now) for m in moments]
+
+                    user_id = rng.choice(user_ids) if user_ids and rng.random() < 0.4 else None
+                    processed_by_id = rng.choice(staff_ids) if staff_ids and len(path) > 1 else None
+                    orders.append(Order(
+                        order_number=f'{tag.upper()}-{day}-{day_counters[day]:05d}',
+                        status=status,
+                        user_id=user_id,
+                        customer_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                        customer_phone=f'+998 9{rng.randint(0, 9)} {rng.randint(100, 999)} '
+                                       f'{rng.randint(10, 99)} {rng.randint(10, 99)}',
+                        customer_address=f'{rng.choice(CITIES)} sh., {rng.randint(1, 200)}-uy',
+                        created_date=created,
+                        updated_date=moments[-1],
+                        confirmed_date=moments[1] if 'confirmed' in path else None,
+                        processed_by_id=processed_by_id,
+                    ))
+                    plans.append((path, moments, processed_by_id))
+
+                with transaction.atomic():
+                    Order.objects.bulk_create(orders)
+                    items, history = [], []
+                    for order, (path, moments, processed_by_id) in zip(orders, plans):
+                        n_items = min(len(curtain_rows), rng.choices([1, 2, 3, 4], [60, 25, 10, 5])[0])
+                        picked = set()
+                        while len(picked) < n_items:
+                            picked.add(bisect.bisect_left(cum_weights, rng.random() * total_weight))
+                        for index in picked:
+                            curtain_id, price = curtain_rows[min(index, len(curtain_rows) - 1)]
+                            items.append(OrderItem(
+                                order_id=order.pk, curtain_id=curtain_id,
+                                quantity=rng.choices([1, 2, 3, 4], [70, 20, 7, 3])[0],
+                                unit_price=price, created_date=order.created_date,
+                            ))
+                        for old, new, moment in zip(path, path[1:], moments[1:]):
+                            history.append(OrderStatusHistory(
+                                order_id=order.pk, old_status=old, new_status=new,
+                                changed_by_id=processed_by_id, created_date=moment,
+                            ))
+                    OrderItem.objects.bulk_create(items, batch_size=self.batch_size)
+                    OrderStatusHistory.objects.bulk_create(history, batch_size=self.batch_size)
+
+                created_total += len(orders)
+                self.stdout.write(f'  {created_total}/{count} buyurtma')
+
+    def status_path(self, status):
+        """Boshlang'ich holatdan yakuniy holatgacha bo'lgan o'tishlar zanjiri"""
+        if status == 'cancelled':
+            return STATUS_FLOW[:self.rng.randint(1, 2)] + ['cancelled']
+        return STATUS_FLOW[:STATUS_FLOW.index(status) + 1]
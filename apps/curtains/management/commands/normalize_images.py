@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from apps.curtains.images import IMAGE_ERRORS, is_content_addressed, store_normalized_image
+from apps.curtains.models import CurtainImage
+
+
+class Command(BaseCommand):
+    help = 'Mavjud parda rasmlarini normallashtirish va bir xil fayllarni birlashtirish'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--delete-originals', action='store_true',
+                            help='Normallashtirilgandan keyin eski fayllarni o\'chirish')
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Rasmlarni shu yerda emas, run_worker orqali fon vazifasi sifatida qayta ishlash')
+
+    def handle(self, *args, **options):
+        queryset = CurtainImage.objects.exclude(image='').only('id', 'image')
+
+        if options['enqueue']:
+            from apps.curtains.tasks import normalize_curtain_image
+
+            queued = 0
+            for curtain_image in queryset.iterator(chunk_size=options['batch_size']):
+                if not is_content_addressed(curtain_image.image.name):
+                    normalize_curtain_image.delay(
+                        image_id=curtain_image.pk, delete_original=options['delete_originals']
+                    )
+                    queued += 1
+            self.stdout.write(self.style.SUCCESS(f'{queued} ta rasm "images" navbatiga qo\'yildi.'))
+            return
+
+        batch, converted, failed = [], 0, 0
+        originals = set()
+
+        for curtain_image in queryset.iterator(chunk_size=options['batch_size']):
+            old_name = curtain_image.image.name
+            if is_content_addressed(old_name):
+                continue
+            try:
+                with curtain_image.image.open('rb') as file:
+                    curtain_image.image = store_normalized_image(file)
+            except IMAGE_ERRORS as e:
+                failed += 1
+                self.stderr.write(f'Xatolik: {old_name} - {e}')
+                continue
+            originals.add(old_name)
+            batch.append(curtain_image)
+            if len(batch) >= options['batch_size']:
+                CurtainImage.objects.bulk_update(batch, ['image'])
+                converted += len(batch)
+                batch = []
+
+        if batch:
+            CurtainImage.objects.bulk_update(batch, ['image'])
+            converted += len(batch)
+
+        if options['delete_originals']:
+            storage = CurtainImage._meta.get_field('image').storage
+            for name in originals:
+                # Eski fayl boshqa yozuvda hali ishlatilayotgan bo'lishi mumkin
+                if not CurtainImage.objects.filter(image=name).exists():
+                    storage.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{converted} ta rasm normallashtirildi, {failed} ta xatolik.'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from apps.curtains.colors import rebuild_color_masks
+from apps.curtains.counters import recount_curtains
+
+
+class Command(BaseCommand):
+    help = 'Kategoriya/rang hisoblagichlari va ranglar niqobini haqiqiy qiymatlar bilan solishtirish'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--color-masks', action='store_true',
+                            help='Pardalarning color_mask ustunini ham qayta hisoblash')
+
+    def handle(self, *args, **options):
+        fixed = recount_curtains()
+        self.stdout.write(f'Hisoblagichlar: {fixed} ta qator tuzatildi')
+
+        if options['color_masks']:
+            masks_fixed = rebuild_color_masks()
+            self.stdout.write(f'Ranglar niqobi: {masks_fixed} ta parda tuzatildi')
+
+        self.stdout.write(self.style.SUCCESS('Tekshiruv yakunlandi!'))
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+
+from apps.curtains import catalog
+from apps.curtains.models import Category, Curtain
+
+
+class Command(BaseCommand):
+    help = ("Deploy'dan keyin katalog keshini to'ldirish: bosh sahifa, ro'yxat va kategoriya sahifalari, "
+            "eng ko'p ko'rilgan pardalar")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3,
+                            help='Mahsulotlar va har bir kategoriya uchun nechta sahifa tayyorlansin')
+        parser.add_argument('--top', type=int, default=50,
+                            help="Eng ko'p ko'rilgan nechta parda sahifasi tayyorlansin")
+
+    def handle(self, *args, **options):
+        if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+            self.stdout.write(self.style.WARNING(
+                "Kesh locmem: to'ldirilgan qiymatlar faqat shu jarayonda qoladi, "
+                'worker\'lar uchun CACHE_BACKEND=file yoki redis kerak'
+            ))
+
+        catalog.index_sections(refresh=True)
+        catalog.filter_choices(refresh=True)
+        self.stdout.write('Bosh sahifa tayyor')
+
+        pages = self._warm_pages(
+            lambda number: catalog.products_page(QueryDict(), number, refresh=True), options['pages']
+        )
+        self.stdout.write(f'Mahsulotlar sahifalari: {pages}')
+
+        pages = 0
+        for category in Category.objects.order_by('title'):
+            pages += self._warm_pages(
+                lambda number: catalog.category_page(category, number, refresh=True), options['pages']
+            )
+        self.stdout.write(f'Kategoriya sahifalari: {pages}')
+
+        slugs = Curtain.objects.filter(is_active=True).order_by('-views').values_list('slug', flat=True)
+        details = sum(1 for slug in slugs[:options['top']] if catalog.curtain_detail(slug, refresh=True))
+        self.stdout.write(f'Parda sahifalari: {details}')
+        self.stdout.write(self.style.SUCCESS('Kesh to\'ldirildi!'))
+
+    @staticmethod
+    def _warm_pages(load, limit):
+        warmed = 0
+        for number in range(1, limit + 1):
+            page = load(number)
+            warmed += 1
+            if not page.has_next():
+                break
+        return warmed
@@ -0,0 +1,29 @@
+from .cart import SUMMARY_COOKIE, read_summary_value, summary_value, write_summary
+
+
+class CartSummaryMiddleware:
+    """Savat o'zgargan (yoki to'liq o'qilgan) so'rov javobida xulosa cookie'sini yangilash.
+
+    request._cart_summary - Cart obyekti yoki None (chiqishda cookie o'chiriladi).
+    Cookie faqat qiymati o'zgarganda qayta yoziladi. Foydalanuvchi savati xulosasi
+    har safar bazadan olinadi, shuning uchun boshqa qurilmadagi o'zgarish ham
+    keyingi javobda cookie'ga tushadi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not hasattr(request, '_cart_summary'):
+            return response
+        cart = request._cart_summary
+        if cart is None:
+            if SUMMARY_COOKIE in request.COOKIES:
+                write_summary(response, None)
+        else:
+            summary = cart.summary()
+            user = cart.user is not None
+            if summary_value(summary, user) != read_summary_value(request):
+                write_summary(response, summary, user=user)
+        return response
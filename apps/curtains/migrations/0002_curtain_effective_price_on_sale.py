@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curtains', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curtain',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('discount_price__gt', 0), ('discount_price__lt', models.F('price'))), then=models.F('discount_price')), default=models.F('price'), output_field=models.PositiveIntegerField()), output_field=models.PositiveIntegerField(), verbose_name='Yakuniy narx'),
+        ),
+        migrations.AddField(
+            model_name='curtain',
+            name='on_sale',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('discount_price__gt', 0), ('discount_price__lt', models.F('price'))), then=True), default=False, output_field=models.BooleanField()), output_field=models.BooleanField(), verbose_name='Chegirmada'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(fields=['is_active', 'effective_price'], name='curtains_is_acti_408b9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(fields=['is_active', 'on_sale', '-created_date'], name='curtains_is_acti_622806_idx'),
+        ),
+    ]
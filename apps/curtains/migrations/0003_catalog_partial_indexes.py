@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curtains', '0002_curtain_effective_price_on_sale'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='curtain',
+            name='curtains_slug_a8be48_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='curtain',
+            name='curtains_categor_dc1357_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='curtain',
+            name='curtains_is_feat_7d8eda_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='curtain',
+            name='curtains_is_acti_408b9f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='curtain',
+            name='curtains_is_acti_622806_idx',
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_date'], name='curtains_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['effective_price'], name='curtains_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['title'], name='curtains_active_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-views'], name='curtains_active_views_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-created_date'], name='curtains_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['fabric_type', '-created_date'], name='curtains_active_fabric_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['is_featured', '-created_date'], name='curtains_active_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curtain',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['on_sale', '-created_date'], name='curtains_active_sale_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:31
+
+from django.db import migrations, models
+
+MAX_COLOR_BITS = 63
+
+
+def fill_color_masks(apps, schema_editor):
+    Color = apps.get_model('curtains', 'Color')
+    Curtain = apps.get_model('curtains', 'Curtain')
+    through = Curtain.colors.through
+
+    for bit, color in enumerate(Color.objects.order_by('pk')[:MAX_COLOR_BITS]):
+        color.bit = bit
+        color.save(update_fields=['bit'])
+
+    masks = {}
+    rows = through.objects.filter(color__bit__isnull=False).values_list('curtain_id', 'color__bit')
+    for curtain_id, bit in rows.iterator():
+        masks[curtain_id] = masks.get(curtain_id, 0) | (1 << bit)
+
+    by_mask = {}
+    for curtain_id, mask in masks.items():
+        by_mask.setdefault(mask, []).append(curtain_id)
+    for mask, pks in by_mask.items():
+        Curtain.objects.filter(pk__in=pks).update(color_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curtains', '0003_catalog_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='color',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Bit'),
+        ),
+        migrations.AddField(
+            model_name='curtain',
+            name='color_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Ranglar niqobi'),
+        ),
+        migrations.RunPython(fill_color_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counts(apps, schema_editor):
+    for model_name in ('Category', 'Color'):
+        model = apps.get_model('curtains', model_name)
+        rows = model.objects.annotate(
+            actual=Count('curtains', filter=Q(curtains__is_active=True), distinct=True)
+        ).values_list('pk', 'actual')
+        for pk, actual in rows:
+            model.objects.filter(pk=pk).update(active_curtains_count=actual)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curtains', '0004_color_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_curtains_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Faol pardalar soni'),
+        ),
+        migrations.AddField(
+            model_name='color',
+            name='active_curtains_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Faol pardalar soni'),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curtains', '0005_active_curtains_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurtainPairState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_order_id', models.PositiveBigIntegerField(default=0, verbose_name='Oxirgi buyurtma id')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Hisobga olingan buyurtmalar')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Yangilangan sana')),
+            ],
+            options={
+                'verbose_name': 'Juftliklar indeksi holati',
+                'verbose_name_plural': 'Juftliklar indeksi holati',
+                'db_table': 'curtain_pair_state',
+            },
+        ),
+        migrations.AddField(
+            model_name='curtain',
+            name='bought_together',
+            field=models.JSONField(default=list, editable=False, verbose_name='Birga xarid qilinadiganlar'),
+        ),
+        migrations.CreateModel(
+            name='CurtainPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Buyurtmalar soni')),
+                ('first', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='curtains.curtain')),
+                ('second', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='curtains.curtain')),
+            ],
+            options={
+                'verbose_name': 'Pardalar juftligi',
+                'verbose_name_plural': 'Pardalar juftliklari',
+                'db_table': 'curtain_pairs',
+                'constraints': [models.UniqueConstraint(fields=('first', 'second'), name='curtain_pair_unique')],
+            },
+        ),
+    ]
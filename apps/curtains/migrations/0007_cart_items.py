@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curtains', '0006_bought_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Miqdori')),
+                ('price', models.PositiveIntegerField(verbose_name="Qo'shilgandagi narx")),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name="Qo'shilgan sana")),
+                ('modified_date', models.DateTimeField(auto_now=True, verbose_name="O'zgartirilgan sana")),
+                ('curtain', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='curtains.curtain', verbose_name='Parda')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Savatdagi mahsulot',
+                'verbose_name_plural': 'Savatdagi mahsulotlar',
+                'db_table': 'cart_items',
+                'ordering': ['pk'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'curtain'), name='cart_item_unique')],
+            },
+        ),
+    ]
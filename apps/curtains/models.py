@@ -1,11 +1,23 @@
-from django.db import models
-from django.db.models import F
-from django.utils.text import slugify
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, Q, When
 from django.utils.translation import gettext_lazy as _
 
+from .colors import next_free_bit
+from .images import is_content_addressed, store_normalized_image, validate_image
+from .slugs import SlugAllocator
+
+SLUG_SAVE_RETRIES = 3
+# Faqat maxsus yordamchilar .update() orqali yozadigan ustunlar. Oddiy save()
+# ularni yozmaydi: oldin yuklangan obyektdagi eski qiymat bazadagisini qaytarib qo'ymasligi kerak
+DERIVED_FIELDS = ('color_mask', 'bought_together')
+
 
 class Category(models.Model):
     title = models.CharField(_('Nomi'), max_length=225, help_text=_('Kategoriya nomi'))
+    # Faol pardalar soni (signallar orqali yangilanadi, reconcile_counters bilan tekshiriladi)
+    active_curtains_count = models.PositiveIntegerField(_('Faol pardalar soni'), default=0, editable=False)
     created_date = models.DateTimeField(_('Yaratilgan sana'), auto_now_add=True)
 
     class Meta:
@@ -21,6 +33,9 @@ class Category(models.Model):
 class Color(models.Model):
     title = models.CharField(_('Rang nomi'), max_length=225, help_text=_('Rang nomi'))
     hex_code = models.CharField(_('Rang kodi'), max_length=7, blank=True, null=True, help_text=_('#ffffff formatida'))
+    # Curtain.color_mask dagi bit raqami (63 tadan ortiq rang bo'lsa bo'sh qoladi)
+    bit = models.PositiveSmallIntegerField(_('Bit'), null=True, blank=True, unique=True, editable=False)
+    active_curtains_count = models.PositiveIntegerField(_('Faol pardalar soni'), default=0, editable=False)
     created_date = models.DateTimeField(_('Yaratilgan sana'), auto_now_add=True)
 
     class Meta:
@@ -32,6 +47,16 @@ class Color(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.bit is None and self._state.adding:
+            self.bit = next_free_bit(Color)
+        super().save(*args, **kwargs)
+
+
+# Chegirma faqat asl narxdan past bo'lsa amal qiladi
+ON_SALE_CONDITION = Q(discount_price__gt=0, discount_price__lt=F('price'))
+ACTIVE = Q(is_active=True)
+
 
 class Curtain(models.Model):
     FABRIC_CHOICES = [
@@ -66,32 +91,92 @@ class Curtain(models.Model):
     is_featured = models.BooleanField(_('Asosiy'), default=False, 
                                     help_text=_('Asosiy sahifada ko\'rsatish'))
     is_active = models.BooleanField(_('Faol'), default=True)
+    # Ranglar bit niqobi (m2m_changed signali orqali yangilanadi, JOIN'siz filtrlash uchun)
+    color_mask = models.BigIntegerField(_('Ranglar niqobi'), default=0, editable=False)
     views = models.PositiveIntegerField(_('Ko\'rishlar soni'), default=0)
+    # "Birga xarid qilinadi" - lift bo'yicha saralangan parda id'lari (build_bought_together buyrug'i yozadi)
+    bought_together = models.JSONField(_('Birga xarid qilinadiganlar'), default=list, editable=False)
     stock_quantity = models.PositiveIntegerField(_('Ombordagi soni'), default=0)
     created_date = models.DateTimeField(_('Yaratilgan sana'), auto_now_add=True)
     modified_date = models.DateTimeField(_('O\'zgartirilgan sana'), auto_now=True)
 
+    # Ma'lumotlar bazasida hisoblanadigan ustunlar (filtrlash va saralash indeks orqali ishlashi uchun).
+    # Python'dagi is_on_sale / final_price bilan bir xil qoida.
+    on_sale = models.GeneratedField(
+        expression=Case(
+            When(ON_SALE_CONDITION, then=True),
+            default=False,
+            output_field=models.BooleanField(),
+        ),
+        output_field=models.BooleanField(),
+        db_persist=True,
+        verbose_name=_('Chegirmada'),
+    )
+    effective_price = models.GeneratedField(
+        expression=Case(
+            When(ON_SALE_CONDITION, then=F('discount_price')),
+            default=F('price'),
+            output_field=models.PositiveIntegerField(),
+        ),
+        output_field=models.PositiveIntegerField(),
+        db_persist=True,
+        verbose_name=_('Yakuniy narx'),
+    )
+
     class Meta:
         verbose_name = _('Parda')
         verbose_name_plural = _('Pardalar')
         ordering = ['-created_date']
         db_table = 'curtains'
+        # Katalog faqat faol pardalarni ko'rsatadi, shuning uchun indekslar is_active=True
+        # bo'yicha qisman (partial). Har bir saralash va filtr yo'li o'z indeksiga ega.
+        # slug (unique) va category (FK) uchun alohida indekslar Django tomonidan yaratiladi.
         indexes = [
-            models.Index(fields=['slug']),
-            models.Index(fields=['category', 'is_active']),
-            models.Index(fields=['is_featured', 'is_active']),
+            models.Index(fields=['-created_date'], condition=ACTIVE, name='curtains_active_created_idx'),
+            models.Index(fields=['effective_price'], condition=ACTIVE, name='curtains_active_price_idx'),
+            models.Index(fields=['title'], condition=ACTIVE, name='curtains_active_title_idx'),
+            models.Index(fields=['-views'], condition=ACTIVE, name='curtains_active_views_idx'),
+            models.Index(fields=['category', '-created_date'], condition=ACTIVE,
+                         name='curtains_active_category_idx'),
+            models.Index(fields=['fabric_type', '-created_date'], condition=ACTIVE,
+                         name='curtains_active_fabric_idx'),
+            models.Index(fields=['is_featured', '-created_date'], condition=ACTIVE,
+                         name='curtains_active_featured_idx'),
+            models.Index(fields=['on_sale', '-created_date'], condition=ACTIVE,
+                         name='curtains_active_sale_idx'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Hisoblagichlarni yangilash uchun bazadagi holatni eslab qolish
+        instance._counted_state = (instance.__dict__.get('is_active'), instance.__dict__.get('category_id'))
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Curtain.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated
+                and field.name not in DERIVED_FIELDS and field.attname not in deferred
+            ]
+
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # Parallel saqlashda bir xil slug tanlanishi mumkin - unique cheklov
+        # xatosida slug'ni qayta hisoblab, yana urinib ko'ramiz
+        for attempt in range(SLUG_SAVE_RETRIES):
+            self.slug = SlugAllocator(Curtain.objects.all()).allocate(self.title, exclude_pk=self.pk)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = Curtain.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                self.slug = ''
+                if not slug_taken or attempt == SLUG_SAVE_RETRIES - 1:
+                    raise
 
     def __str__(self):
         return self.title
@@ -126,6 +211,81 @@ class CurtainImage(models.Model):
     def __str__(self):
         return f"{self.curtain.title} - {self.order}"
 
+    def clean(self):
+        # Normallashtirish (save) oldidan: o'qilmaydigan yoki juda katta rasm forma xatosi bo'ladi
+        if self.image and not self.image._committed:
+            try:
+                validate_image(self.image)
+            except ValidationError as e:
+                raise ValidationError({'image': e})
 
+    def save(self, *args, **kwargs):
+        # Yangi yuklangan rasm normallashtiriladi va kontent xeshi bo'yicha saqlanadi
+        if self.image and not self.image._committed and not is_content_addressed(self.image.name):
+            self.image = store_normalized_image(self.image)
+        super().save(*args, **kwargs)
 
 
+class CurtainPair(models.Model):
+    """Bir buyurtmada birga kelgan pardalar juftligi.
+
+    Parda x parda co-occurrence matritsasining yuqori uchburchagi (first <= second)
+    siyrak ko'rinishda saqlanadi. first == second qatori - pardaning o'zi
+    qatnashgan buyurtmalar soni (lift hisoblash uchun).
+    """
+    first = models.ForeignKey(Curtain, on_delete=models.CASCADE, related_name='+')
+    second = models.ForeignKey(Curtain, on_delete=models.CASCADE, related_name='+')
+    orders_count = models.PositiveIntegerField(_('Buyurtmalar soni'), default=0)
+
+    class Meta:
+        verbose_name = _('Pardalar juftligi')
+        verbose_name_plural = _('Pardalar juftliklari')
+        db_table = 'curtain_pairs'
+        constraints = [
+            models.UniqueConstraint(fields=['first', 'second'], name='curtain_pair_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_id} + {self.second_id}: {self.orders_count}"
+
+
+class CurtainPairState(models.Model):
+    """Juftliklar indeksi qaysi buyurtmagacha qayta ishlangani (bitta qator)"""
+    last_order_id = models.PositiveBigIntegerField(_('Oxirgi buyurtma id'), default=0)
+    orders_count = models.PositiveIntegerField(_('Hisobga olingan buyurtmalar'), default=0)
+    updated_date = models.DateTimeField(_('Yangilangan sana'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Juftliklar indeksi holati')
+        verbose_name_plural = _('Juftliklar indeksi holati')
+        db_table = 'curtain_pair_state'
+
+    def __str__(self):
+        return f"#{self.last_order_id} ({self.orders_count})"
+
+
+class CartItem(models.Model):
+    """Ro'yxatdan o'tgan foydalanuvchi savatidagi mahsulot (qurilmalar orasida saqlanadi).
+
+    price - savatga qo'shilgan paytdagi narx: joriy narx bilan solishtirib,
+    narx o'zgargani foydalanuvchiga ko'rsatiladi.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart_items',
+                             verbose_name=_('Foydalanuvchi'))
+    curtain = models.ForeignKey(Curtain, on_delete=models.CASCADE, related_name='+', verbose_name=_('Parda'))
+    quantity = models.PositiveIntegerField(_('Miqdori'), default=1)
+    price = models.PositiveIntegerField(_('Qo\'shilgandagi narx'))
+    created_date = models.DateTimeField(_('Qo\'shilgan sana'), auto_now_add=True)
+    modified_date = models.DateTimeField(_('O\'zgartirilgan sana'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('Savatdagi mahsulot')
+        verbose_name_plural = _('Savatdagi mahsulotlar')
+        ordering = ['pk']
+        db_table = 'cart_items'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'curtain'], name='cart_item_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.curtain_id} x {self.quantity}"
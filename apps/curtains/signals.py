@@ -0,0 +1,190 @@
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models import F
+from django.db.models.lookups import GreaterThan
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cart import Cart, merge_session_cart
+from .colors import bits_to_mask
+from .counters import shift_category, shift_colors, shift_colors_by_curtains
+from .invalidation import curtain_tags, invalidate, track
+from .models import Category, Color, Curtain, CurtainImage
+
+
+def _refresh_mask(curtain):
+    """Xotiradagi obyektni yangilash - keyingi save() eski niqobni yozib yubormasligi uchun"""
+    curtain.color_mask = (
+        Curtain.objects.filter(pk=curtain.pk).values_list('color_mask', flat=True).first() or 0
+    )
+
+
+@receiver(m2m_changed, sender=Curtain.colors.through)
+def curtain_colors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Parda ranglari o'zgarganda color_mask'ni bitli amallar bilan yangilash"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        # instance - Curtain, pk_set - ranglar
+        queryset = Curtain.objects.filter(pk=instance.pk)
+        if action == 'post_clear':
+            queryset.update(color_mask=0)
+        else:
+            mask = bits_to_mask(Color.objects.filter(pk__in=pk_set).values_list('bit', flat=True))
+            if mask and action == 'post_add':
+                queryset.update(color_mask=F('color_mask').bitor(mask))
+            elif mask:
+                queryset.update(color_mask=F('color_mask').bitand(~mask))
+        _refresh_mask(instance)
+        return
+
+    # instance - Color, pk_set - pardalar
+    if instance.bit is None:
+        return
+    mask = 1 << instance.bit
+    if action == 'post_clear':
+        queryset = Curtain.objects.filter(GreaterThan(F('color_mask').bitand(mask), 0))
+    else:
+        queryset = Curtain.objects.filter(pk__in=pk_set)
+    if action == 'post_add':
+        queryset.update(color_mask=F('color_mask').bitor(mask))
+    else:
+        queryset.update(color_mask=F('color_mask').bitand(~mask))
+
+
+@receiver(post_delete, sender=Color)
+def color_deleted(sender, instance, **kwargs):
+    """O'chirilgan rang bitini barcha pardalardan tozalash (bit keyin qayta ishlatiladi)"""
+    if instance.bit is not None:
+        mask = 1 << instance.bit
+        Curtain.objects.filter(
+            GreaterThan(F('color_mask').bitand(mask), 0)
+        ).update(color_mask=F('color_mask').bitand(~mask))
+
+
+# Faol pardalar hisoblagichlari (Category/Color.active_curtains_count)
+
+@receiver(pre_save, sender=Curtain)
+def remember_counted_state(sender, instance, **kwargs):
+    """Bazadan yuklanmagan yoki qisman yuklangan obyekt uchun oldingi holatni olish"""
+    state = getattr(instance, '_counted_state', None)
+    if instance._state.adding or (state is not None and state[0] is not None):
+        return
+    instance._counted_state = (
+        Curtain.objects.filter(pk=instance.pk).values_list('is_active', 'category_id').first()
+    )
+
+
+@receiver(post_save, sender=Curtain)
+def curtain_counts_on_save(sender, instance, created, **kwargs):
+    new_state = (instance.is_active, instance.category_id)
+    old_state = (False, None) if created else getattr(instance, '_counted_state', None)
+    instance._counted_state = new_state
+    if old_state is None or old_state == new_state:
+        return
+
+    old_active, old_category = old_state
+    new_active, new_category = new_state
+    if old_active:
+        shift_category(old_category, -1)
+    if new_active:
+        shift_category(new_category, 1)
+    if old_active != new_active and not created:
+        color_ids = Curtain.colors.through.objects.filter(
+            curtain_id=instance.pk
+        ).values_list('color_id', flat=True)
+        shift_colors(color_ids, 1 if new_active else -1)
+
+
+@receiver(pre_delete, sender=Curtain)
+def remember_state_before_delete(sender, instance, **kwargs):
+    # Xotiradagi obyekt eskirgan bo'lishi mumkin - holat bazadan olinadi
+    instance._deleted_state = Curtain.objects.filter(pk=instance.pk).values_list(
+        'is_active', 'category_id'
+    ).first()
+    instance._deleted_color_ids = list(
+        Curtain.colors.through.objects.filter(curtain_id=instance.pk).values_list('color_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Curtain)
+def curtain_counts_on_delete(sender, instance, **kwargs):
+    state = getattr(instance, '_deleted_state', None)
+    if state and state[0]:
+        shift_category(state[1], -1)
+        shift_colors(instance._deleted_color_ids, -1)
+
+
+@receiver(m2m_changed, sender=Curtain.colors.through)
+def curtain_colors_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """Rang bog'lanishlari o'zgarganda rang hisoblagichlarini yangilash"""
+    through = Curtain.colors.through
+    if reverse:
+        own, other = 'color_id', 'curtain_id'
+    else:
+        own, other = 'curtain_id', 'color_id'
+
+    if action in ('pre_remove', 'pre_clear'):
+        # remove() pk_set'ga bog'lanmagan id'lar ham tushishi mumkin - faqat mavjudlarini olamiz
+        links = through.objects.filter(**{own: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{f'{other}__in': pk_set})
+        instance._unlinked_ids = set(links.values_list(other, flat=True))
+        return
+    if action == 'post_add':
+        sign, ids = 1, pk_set
+    elif action in ('post_remove', 'post_clear'):
+        sign, ids = -1, getattr(instance, '_unlinked_ids', set())
+    else:
+        return
+
+    if reverse:
+        shift_colors_by_curtains(instance.pk, ids, sign)
+    elif instance.is_active:
+        shift_colors(ids, sign)
+
+
+# Katalog keshini bekor qilish (invalidation.py)
+
+def _curtain_cache_tags(curtain):
+    # Saqlashdan oldin _counted_state eski, keyin yangi holatni saqlaydi - ikkala kategoriya ham kiradi
+    counted = getattr(curtain, '_counted_state', None) or (None, None)
+    deleted = getattr(curtain, '_deleted_state', None) or (None, None)
+    return curtain_tags(curtain.pk, curtain.category_id, counted[1], deleted[1])
+
+
+def _image_cache_tags(image):
+    category_id = Curtain.objects.filter(pk=image.curtain_id).values_list('category_id', flat=True).first()
+    return curtain_tags(image.curtain_id, category_id)
+
+
+track(Curtain, _curtain_cache_tags)
+track(Category, lambda category: ['category', f'category:{category.pk}'])
+track(Color, lambda color: ['color'])
+track(CurtainImage, _image_cache_tags)
+
+
+@receiver(m2m_changed, sender=Curtain.colors.through)
+def curtain_colors_cache(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # instance - Color: rangni ko'rsatadigan barcha sahifalar 'color' tegiga bog'liq
+        invalidate('curtain', 'color')
+    else:
+        invalidate(*curtain_tags(instance.pk, instance.category_id))
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    """Kirishdan oldin session'da to'plangan savat foydalanuvchi savatiga o'tadi"""
+    if request is not None and hasattr(request, 'session'):
+        merge_session_cart(request, user)
+        if hasattr(request, 'user'):
+            request._cart_summary = Cart(request)
+
+
+@receiver(user_logged_out)
+def forget_cart_summary(sender, request, **kwargs):
+    if request is not None:
+        request._cart_summary = None
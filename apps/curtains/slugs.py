@@ -0,0 +1,79 @@
+from django.utils.text import slugify
+
+DEFAULT_SLUG = 'parda'
+# Qo'shimcha uzunligining yuqori chegarasi: '-' va 10 ta raqam
+MAX_SUFFIX_LENGTH = 11
+
+
+class SlugAllocator:
+    """Unikal slug ajratuvchi.
+
+    Har bir asosiy slug uchun band qilingan slug'lar bitta prefiks so'rovi
+    bilan olinadi, keyingi bo'sh qo'shimcha (``-1``, ``-2`` ...) xotirada
+    hisoblanadi. Bir nechta obyekt uchun (import, ``fix_slugs``) bitta
+    allocator ishlatilsa, ajratilgan slug'lar ham band deb hisoblanadi.
+    """
+
+    def __init__(self, queryset, field='slug', max_length=None):
+        self.queryset = queryset
+        self.field = field
+        if max_length is None:
+            max_length = queryset.model._meta.get_field(field).max_length
+        self.max_length = max_length
+        # Turli asoslar qisqartirilganda bir xil slug'ga kelishi mumkin,
+        # shuning uchun band slug'lar umumiy: {slug: egasining pk}
+        self._taken = {}
+        self._loaded = set()
+        self._next_counter = {}
+
+    def base_slug(self, title):
+        base = slugify(title) or DEFAULT_SLUG
+        return base[:self.max_length]
+
+    def with_suffix(self, base, counter):
+        """base-N; sig'masa asos qisqartiriladi"""
+        suffix = f'-{counter}'
+        return f'{base[:self.max_length - len(suffix)]}{suffix}'
+
+    def _is_candidate(self, base, slug):
+        """slug - base yoki uning qo'shimchali (kerak bo'lsa qisqartirilgan) varianti"""
+        if slug == base:
+            return True
+        _, dash, counter = slug.rpartition('-')
+        return bool(dash) and counter.isdigit() and slug == self.with_suffix(base, counter)
+
+    def _load(self, base):
+        """Asos va uning qisqartirilgan variantlari bilan boshlanadigan slug'larni bitta so'rovda olish"""
+        if base not in self._loaded:
+            # Eng uzun qo'shimcha bilan ham qoladigan qism - har bir nomzodning prefiksi
+            prefix = base[:max(self.max_length - MAX_SUFFIX_LENGTH, 0)]
+            rows = self.queryset.filter(
+                **{f'{self.field}__startswith': prefix}
+            ).values_list('pk', self.field)
+            for pk, slug in rows:
+                if self._is_candidate(base, slug):
+                    self._taken.setdefault(slug, pk)
+            self._loaded.add(base)
+        return self._taken
+
+    def allocate(self, title, exclude_pk=None):
+        """Sarlavha uchun keyingi bo'sh slug'ni qaytarish va uni band qilish"""
+        base = self.base_slug(title)
+        taken = self._load(base)
+
+        def is_free(slug):
+            owner = taken.get(slug)
+            return owner is None or (exclude_pk is not None and owner == exclude_pk)
+
+        slug = base
+        # Band qilingan slug'lar faqat ko'payadi, shuning uchun qidiruvni
+        # oldingi to'xtagan joydan davom ettirish mumkin
+        counter = self._next_counter.get(base, 1)
+        while not is_free(slug):
+            slug = self.with_suffix(base, counter)
+            counter += 1
+        if slug != base:
+            self._next_counter[base] = counter
+
+        taken[slug] = exclude_pk if exclude_pk is not None else object()
+        return slug
@@ -0,0 +1,48 @@
+import logging
+
+import requests
+from django.conf import settings
+
+from apps.jobs.registry import task
+from .images import IMAGE_ERRORS, is_content_addressed, store_normalized_image
+from .invalidation import invalidate_curtains
+from .models import CurtainImage
+
+PURGE_TIMEOUT = 10
+
+logger = logging.getLogger(__name__)
+
+
+@task(queue='images', max_attempts=3)
+def normalize_curtain_image(image_id, delete_original=False):
+    """Bitta parda rasmini normallashtirish (normalize_images --enqueue navbatga qo'yadi)"""
+    curtain_image = CurtainImage.objects.filter(pk=image_id).only('id', 'image').first()
+    if curtain_image is None or not curtain_image.image or is_content_addressed(curtain_image.image.name):
+        return
+
+    old_name = curtain_image.image.name
+    try:
+        with curtain_image.image.open('rb') as file:
+            new_name = store_normalized_image(file)
+    except IMAGE_ERRORS as e:
+        # Buzilgan yoki juda katta rasm qayta urinishda ham o'zgarmaydi - o'tkazib yuboriladi
+        logger.warning('Rasm normallashtirilmadi: %s - %s', old_name, e)
+        return
+    CurtainImage.objects.filter(pk=image_id).update(image=new_name)
+    invalidate_curtains(list(CurtainImage.objects.filter(pk=image_id).values_list('curtain_id', flat=True)))
+
+    # Eski fayl boshqa yozuvda hali ishlatilayotgan bo'lishi mumkin
+    if delete_original and not CurtainImage.objects.filter(image=old_name).exists():
+        CurtainImage._meta.get_field('image').storage.delete(old_name)
+
+
+@task(queue='default', max_attempts=5)
+def purge_http_cache(tags):
+    """Tashqi HTTP keshdan (Varnish xkey, CDN) teglarga bog'liq sahifalarni tozalash"""
+    response = requests.request(
+        'PURGE',
+        settings.CACHE_PURGE_URL,
+        headers={'Surrogate-Key': ' '.join(tags)},
+        timeout=PURGE_TIMEOUT,
+    )
+    response.raise_for_status()
@@ -0,0 +1,53 @@
+import hashlib
+
+from django import template
+
+from apps.curtains import caching
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, name, vary_on, tags=None):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.vary_on = vary_on
+        self.tags = tags
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout.resolve(context))
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(f'swrcache: noto\'g\'ri muddat {self.timeout.token!r}')
+        vary = '|'.join(str(value.resolve(context)) for value in self.vary_on)
+        key = f'fragment:{self.name}:{hashlib.md5(vary.encode()).hexdigest()}'
+        tags = self.tags.resolve(context) if self.tags else ()
+        if isinstance(tags, str):
+            tags = tags.split()
+        return caching.get_or_set(key, lambda: self.nodelist.render(context), timeout, tags=tuple(tags or ()))
+
+
+@register.tag
+def swrcache(parser, token):
+    """Shablon bo'lagini stale-while-revalidate bilan keshlash.
+
+    {% swrcache <soniya> <nom> [o'zgaruvchi ...] [tags=<teglar>] %} ... {% endswrcache %}
+    tags - invalidation teglari (ro'yxat yoki bo'sh joy bilan ajratilgan satr).
+    Bo'lakda foydalanuvchiga xos ma'lumot (csrf_token, user) bo'lmasligi kerak.
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    tags = None
+    if bits[-1].startswith('tags='):
+        tags = parser.compile_filter(bits.pop()[len('tags='):])
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f'{bits[0]} kamida muddat va nom talab qiladi')
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+        tags,
+    )
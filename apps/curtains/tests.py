@@ -1,3 +1,1098 @@
-from django.test import TestCase
+import re
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .filters import SORT_ORDERING, filter_curtains
+from .models import CartItem, Category, Color, Curtain, CurtainImage
+from .slugs import SlugAllocator
+
+
+class SlugAllocatorTests(TestCase):
+    """Unikal slug'lar: qo'shimcha, qisqartirish va bitta allocator ichidagi band slug'lar"""
+
+    def setUp(self):
+        self.category = Category.objects.create(title='Klassik')
+
+    def create(self, slug):
+        return Curtain.objects.create(title=slug, slug=slug, price=100000, category=self.category)
+
+    def test_suffixes(self):
+        first = Curtain.objects.create(title='Oq Parda', price=100000, category=self.category)
+        second = Curtain.objects.create(title='Oq parda', price=100000, category=self.category)
+        self.assertEqual((first.slug, second.slug), ('oq-parda', 'oq-parda-1'))
+        allocator = SlugAllocator(Curtain.objects.all())
+        self.assertEqual(allocator.allocate('Oq parda', exclude_pk=first.pk), 'oq-parda')
+        self.assertEqual([allocator.allocate('Oq parda') for _ in range(2)], ['oq-parda-2', 'oq-parda-3'])
+
+    def test_max_length_title(self):
+        # Asos maydon uzunligiga teng: qo'shimchali slug'lar asosni qisqartiradi
+        self.create('abcdefghijkl')
+        self.create('abcdefghij-1')
+        self.create('abcdefghi-10')
+        allocator = SlugAllocator(Curtain.objects.all(), max_length=12)
+        slugs = [allocator.allocate('abcdefghijkl') for _ in range(9)]
+        self.assertEqual(slugs[0], 'abcdefghij-2')
+        self.assertEqual(slugs[-1], 'abcdefghi-11')
+        self.assertTrue(all(len(slug) <= 12 for slug in slugs))
+        # Boshqa uzun asos xuddi shu qisqartirilgan slug'larga keladi
+        self.assertEqual(allocator.allocate('abcdefghijkz'), 'abcdefghijkz')
+        self.assertEqual(allocator.allocate('abcdefghijkz'), 'abcdefghi-12')
+
+
+class CatalogIndexTests(TestCase):
+    """products() dagi har bir filtr va saralash indeks orqali bajarilishini EXPLAIN bilan tekshirish"""
+
+    FILTERS = [
+        {},
+        {'category': 'CATEGORY'},
+        {'fabric': 'silk'},
+        {'color': 'COLOR'},
+        {'min_price': '100000', 'max_price': '500000'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(title='Klassik')
+        cls.color = Color.objects.create(title='Oq', hex_code='#FFFFFF')
+        for i in range(20):
+            curtain = Curtain.objects.create(
+                title=f'Parda {i}', price=100000 + i * 10000, category=cls.category,
+                fabric_type='silk' if i % 2 else 'cotton', is_active=i % 5 != 0,
+            )
+            curtain.colors.add(cls.color)
+
+    def setUp(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN tekshiruvi faqat SQLite va PostgreSQL uchun')
+        if connection.vendor == 'postgresql':
+            # Kichik jadvalda rejalashtiruvchi ketma-ket o'qishni afzal ko'radi
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def resolve(self, params):
+        replacements = {'CATEGORY': str(self.category.pk), 'COLOR': str(self.color.pk)}
+        return {key: replacements.get(value, value) for key, value in params.items()}
+
+    def assert_uses_index(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            full_scan = re.search(r'SCAN curtains(?! USING (COVERING )?INDEX)', plan)
+        else:
+            full_scan = re.search(r'Seq Scan on curtains\b', plan)
+        self.assertIsNone(full_scan, f'{queryset.query}\n{plan}')
+        return plan
+
+    def test_every_filter_and_sort_uses_index(self):
+        base = Curtain.objects.filter(is_active=True).select_related('category')
+        for filters in self.FILTERS:
+            for sort in SORT_ORDERING:
+                params = dict(self.resolve(filters), sort=sort)
+                with self.subTest(**params):
+                    self.assert_uses_index(filter_curtains(base, params)[:12])
+
+    def test_unfiltered_sorts_do_not_sort_in_memory(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Tartiblash rejasi faqat SQLite uchun tekshiriladi')
+        base = Curtain.objects.filter(is_active=True)
+        for sort in SORT_ORDERING:
+            with self.subTest(sort=sort):
+                plan = self.assert_uses_index(filter_curtains(base, {'sort': sort})[:12])
+                self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_homepage_sections_use_index(self):
+        self.assert_uses_index(Curtain.objects.filter(is_active=True, is_featured=True)[:8])
+        self.assert_uses_index(Curtain.objects.filter(is_active=True, on_sale=True)[:6])
+        self.assert_uses_index(
+            Curtain.objects.filter(category=self.category, is_active=True)[:12]
+        )
+
+
+class SalePriceColumnsTests(TestCase):
+    """on_sale va effective_price bazada hisoblanadi (GeneratedField)"""
+
+    def setUp(self):
+        cache.clear()
+        self.plain = Curtain.objects.create(title='Oddiy', price=300000)
+        self.sale = Curtain.objects.create(title='Chegirma', price=500000, discount_price=100000)
+        # Chegirma narxi asl narxdan katta - chegirma hisoblanmaydi
+        self.bogus = Curtain.objects.create(title="Noto'g'ri", price=200000, discount_price=250000)
+
+    def test_columns_match_python_rule(self):
+        for curtain in Curtain.objects.all():
+            with self.subTest(curtain=curtain.title):
+                self.assertEqual(curtain.on_sale, bool(curtain.is_on_sale))
+                self.assertEqual(curtain.effective_price, curtain.final_price)
+        self.assertEqual(list(Curtain.objects.filter(on_sale=True)), [self.sale])
+        self.assertEqual(
+            set(Curtain.objects.filter(effective_price__lte=200000)), {self.sale, self.bogus}
+        )
+
+        # Narx o'zgarsa ustunlar ham qayta hisoblanadi
+        Curtain.objects.filter(pk=self.sale.pk).update(discount_price=None)
+        self.sale.refresh_from_db()
+        self.assertEqual((self.sale.on_sale, self.sale.effective_price), (False, 500000))
+
+    def test_products_sorts_by_effective_price(self):
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('curtains:products'), {'sort': 'price_low'})
+        self.assertEqual(list(response.context['page_obj']), [self.sale, self.bogus, self.plain])
+        self.assertTrue(any('ORDER BY "curtains"."effective_price" ASC' in q['sql'] for q in queries))
+
+        response = self.client.get(reverse('curtains:products'), {'sort': 'price_high'})
+        self.assertEqual(list(response.context['page_obj']), [self.plain, self.bogus, self.sale])
+
+
+class ColorMaskTests(TestCase):
+    """color_mask m2m o'zgarishlarida to'g'ri yangilanishi va rang filtri"""
+
+    def setUp(self):
+        self.white = Color.objects.create(title='Oq')
+        self.red = Color.objects.create(title='Qizil')
+        self.blue = Color.objects.create(title='Ko\'k')
+        self.curtain = Curtain.objects.create(title='Parda', price=100000)
+
+    def mask(self, *colors):
+        return sum(1 << color.bit for color in colors)
+
+    def test_mask_follows_m2m_changes(self):
+        self.curtain.colors.add(self.white, self.red)
+        self.assertEqual(self.curtain.color_mask, self.mask(self.white, self.red))
+
+        self.curtain.colors.remove(self.white)
+        self.assertEqual(self.curtain.color_mask, self.mask(self.red))
+
+        self.blue.curtains.add(self.curtain)
+        self.curtain.refresh_from_db()
+        self.assertEqual(self.curtain.color_mask, self.mask(self.red, self.blue))
+
+        self.red.delete()
+        self.curtain.refresh_from_db()
+        self.assertEqual(self.curtain.color_mask, self.mask(self.blue))
+
+        self.curtain.colors.clear()
+        self.assertEqual(self.curtain.color_mask, 0)
+
+    def test_stale_instance_does_not_overwrite_mask(self):
+        stale = Curtain.objects.get(pk=self.curtain.pk)
+        self.curtain.colors.add(self.red)
+        stale.title = 'Yangi nom'
+        stale.save()
+
+        self.curtain.refresh_from_db()
+        self.assertEqual((self.curtain.title, self.curtain.color_mask), ('Yangi nom', self.mask(self.red)))
+        self.assertEqual(
+            list(filter_curtains(Curtain.objects.all(), {'color': str(self.red.pk)})), [self.curtain]
+        )
+
+    def test_filter_any_and_all_colors(self):
+        other = Curtain.objects.create(title='Boshqa', price=100000)
+        self.curtain.colors.set([self.white, self.red])
+        other.colors.set([self.red])
+        # Bitsiz rang EXISTS orqali filtrlanadi
+        no_bit = Color.objects.create(title='Oltin')
+        Color.objects.filter(pk=no_bit.pk).update(bit=None)
+        other.colors.add(no_bit)
+
+        def titles(params):
+            return set(filter_curtains(Curtain.objects.all(), params).values_list('title', flat=True))
+
+        self.assertEqual(titles({'color': str(self.red.pk)}), {'Parda', 'Boshqa'})
+        self.assertEqual(titles({'color': f'{self.white.pk},{no_bit.pk}'}), {'Parda', 'Boshqa'})
+        self.assertEqual(titles({'color': f'{self.white.pk},{self.red.pk}', 'color_mode': 'all'}), {'Parda'})
+        self.assertEqual(titles({'color': f'{self.red.pk},{no_bit.pk}', 'color_mode': 'all'}), {'Boshqa'})
+        self.assertEqual(titles({'color': 'qizil'}), {'Parda', 'Boshqa'})
+        self.assertEqual(titles({'color': 'yo\'q'}), set())
+
+
+class ActiveCurtainsCountTests(TestCase):
+    """Kategoriya va ranglar uchun faol pardalar hisoblagichlari"""
+
+    def setUp(self):
+        self.sofa = Category.objects.create(title='Mehmonxona')
+        self.kitchen = Category.objects.create(title='Oshxona')
+        self.white = Color.objects.create(title='Oq')
+        self.red = Color.objects.create(title='Qizil')
+
+    def assert_counts(self, **expected):
+        for name, count in expected.items():
+            obj = getattr(self, name)
+            obj.refresh_from_db()
+            self.assertEqual(obj.active_curtains_count, count, name)
+
+    def test_counts_follow_curtain_changes(self):
+        curtain = Curtain.objects.create(title='Parda', price=100000, category=self.sofa)
+        curtain.colors.add(self.white, self.red)
+        self.assert_counts(sofa=1, kitchen=0, white=1, red=1)
+
+        curtain.colors.remove(self.red, Color.objects.create(title='Boshqa'))
+        self.assert_counts(white=1, red=0)
+
+        curtain.category = self.kitchen
+        curtain.save()
+        self.assert_counts(sofa=0, kitchen=1)
+
+        curtain.is_active = False
+        curtain.save()
+        self.assert_counts(kitchen=0, white=0)
+
+        reloaded = Curtain.objects.only('id', 'title', 'slug').get(pk=curtain.pk)
+        reloaded.is_active = True
+        reloaded.save(update_fields=['is_active'])
+        self.assert_counts(kitchen=1, white=1)
+
+        self.red.curtains.add(curtain)
+        self.assert_counts(red=1)
+
+        curtain.delete()
+        self.assert_counts(kitchen=0, white=0, red=0)
+
+    def test_recount_fixes_drift(self):
+        from .counters import recount_curtains
+
+        curtain = Curtain.objects.create(title='Parda', price=100000, category=self.sofa)
+        curtain.colors.add(self.white)
+        Curtain.objects.filter(pk=curtain.pk).update(is_active=False)
+        self.assertEqual(recount_curtains(), 2)
+        self.assert_counts(sofa=0, white=0)
+
+
+class BoughtTogetherTests(TestCase):
+    """Buyurtmalardan "birga xarid qilinadi" indeksini bosqichma-bosqich qurish"""
+
+    def setUp(self):
+        cache.clear()
+        self.curtains = [
+            Curtain.objects.create(title=f'Parda {i}', price=100000) for i in range(4)
+        ]
+
+    def order(self, *indexes, status='pending'):
+        from apps.orders.models import Order, OrderItem
+
+        order = Order.objects.create(
+            customer_name='Aziz', customer_phone='+998 90 123 45 67', customer_address='Navoiy', status=status,
+        )
+        for index in indexes:
+            OrderItem.objects.create(order=order, curtain=self.curtains[index], unit_price=100000)
+        return order
+
+    def ranked(self, index):
+        positions = {curtain.pk: position for position, curtain in enumerate(self.curtains)}
+        curtain = self.curtains[index]
+        curtain.refresh_from_db()
+        return [positions[pk] for pk in curtain.bought_together]
+
+    def build(self, **kwargs):
+        from unittest import mock
+        from . import bought_together
+
+        with mock.patch.object(bought_together, 'SETTLE_SECONDS', 0):
+            return bought_together.build_bought_together(**kwargs)
+
+    def test_stale_instance_does_not_revert_ranking(self):
+        stale = Curtain.objects.get(pk=self.curtains[0].pk)
+        for _ in range(2):
+            self.order(0, 1)
+        self.build()
+        stale.title = 'Yangi nom'
+        stale.save()
+        self.assertEqual(self.ranked(0), [1])
+
+    def test_incremental_build_ranks_by_lift(self):
+        from .models import CurtainPair, CurtainPairState
+
+        # 0 va 1 doim birga; 0 va 2 birga, lekin 2 ko'p buyurtmalarda yakka ham keladi
+        for _ in range(2):
+            self.order(0, 1)
+            self.order(0, 2)
+        for _ in range(4):
+            self.order(2)
+        self.order(0, 3, status='cancelled')
+
+        self.assertEqual(self.build(), (8, 3))
+        self.assertEqual(self.ranked(0), [1, 2])
+        self.assertEqual(self.ranked(1), [0])
+        self.assertEqual(self.ranked(3), [])
+        self.assertEqual(CurtainPairState.objects.get().orders_count, 8)
+
+        # Yangi buyurtmalar faqat qo'shiladi, eskilari qayta hisoblanmaydi
+        self.assertEqual(self.build(), (0, 0))
+        self.order(1, 3)
+        self.order(1, 3)
+        self.assertEqual(self.build()[0], 2)
+        self.assertEqual(CurtainPair.objects.get(first=self.curtains[1], second=self.curtains[1]).orders_count, 4)
+        self.assertEqual(self.ranked(3), [1])
+
+        full = self.build(full=True)
+        self.assertEqual(full[0], 10)
+        self.assertEqual(self.ranked(3), [1])
+
+    def test_pages_show_pairs(self):
+        from django.urls import reverse
+
+        for _ in range(2):
+            self.order(0, 1)
+        self.build()
+
+        response = self.client.get(reverse('curtains:product_detail', args=[self.curtains[0].slug]))
+        self.assertEqual(list(response.context['bought_together']), [self.curtains[1]])
+
+        self.client.post(reverse('curtains:cart_add', args=[self.curtains[1].pk]))
+        response = self.client.get(reverse('curtains:cart'))
+        self.assertEqual(list(response.context['bought_together']), [self.curtains[0]])
+
+
+class LargeTableAdminTests(TestCase):
+    """Katta jadval rejimi: taxminiy sanoq, changelist sahifalari"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        User = get_user_model()
+        cache.clear()
+        self.curtains = [Curtain.objects.create(title=f'Parda {i}', price=100000) for i in range(6)]
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'parol')
+        self.customer = User.objects.create_user('mijoz', password='parol12345')
+        self.client.force_login(self.admin)
+
+    def test_estimated_count_uses_pk_range_on_sqlite(self):
+        from .admin_scale import EstimatedCountPaginator, estimated_row_count
+
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL pg_class statistikasidan foydalanadi')
+        # Oraliqdagi teshiklar ham hisobga kiradi - bu yuqori chegara
+        Curtain.objects.filter(pk__in=[c.pk for c in self.curtains[1:3]]).delete()
+        self.assertEqual(estimated_row_count(Curtain), 6)
+        self.assertEqual(estimated_row_count(Color), 0)
+
+        with self.settings(ADMIN_COUNT_LIMIT=3):
+            self.assertEqual(EstimatedCountPaginator(Curtain.objects.all(), 2).count, 6)
+            # Filtrlangan ro'yxat - haqiqiy sanoq, lekin limitdan oshmaydi
+            self.assertEqual(EstimatedCountPaginator(Curtain.objects.filter(price=100000), 2).count, 3)
+            self.assertEqual(EstimatedCountPaginator(Curtain.objects.filter(title='Parda 0'), 2).count, 1)
+        with self.settings(ADMIN_COUNT_LIMIT=100):
+            # Taxmin limitdan kichik bo'lsa aniq sanoq
+            self.assertEqual(EstimatedCountPaginator(Curtain.objects.all(), 2).count, 4)
+
+    def test_changelists_render(self):
+        from apps.orders.models import Order
+
+        from .admin_scale import EstimatedCountPaginator, StaffUserListFilter
+
+        Order.objects.create(
+            customer_name='Aziz', customer_phone='+998 90 123 45 67', customer_address='Navoiy',
+            processed_by=self.admin,
+        )
+        for large in (False, True):
+            with self.subTest(large=large), self.settings(ADMIN_LARGE_TABLE_MODE=large):
+                response = self.client.get(reverse('admin:curtains_curtain_changelist'))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(isinstance(response.context['cl'].paginator, EstimatedCountPaginator), large)
+                self.assertContains(response, 'Parda 5')
+
+                response = self.client.get(reverse('admin:orders_order_changelist'))
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Aziz')
+                staff_filters = [
+                    spec for spec in response.context['cl'].filter_specs if isinstance(spec, StaffUserListFilter)
+                ]
+                self.assertEqual(len(staff_filters), int(large))
+                if large:
+                    self.assertEqual([pk for pk, label in staff_filters[0].lookup_choices], [self.admin.pk])
+
+
+    def test_mode_is_read_per_request(self):
+        from .admin_scale import LimitedRelatedFieldListFilter
+
+        first, second = Category.objects.create(title='A'), Category.objects.create(title='B')
+        url = reverse('admin:curtains_curtain_changelist')
+        for large in (False, True):
+            with self.subTest(large=large), self.settings(ADMIN_LARGE_TABLE_MODE=large, ADMIN_FILTER_CHOICES_LIMIT=1):
+                cl = self.client.get(url).context['cl']
+                self.assertEqual(cl.date_hierarchy, None if large else 'created_date')
+                self.assertEqual(cl.show_full_result_count, not large)
+                self.assertEqual(cl.full_result_count, None if large else 6)
+                category_filter = next(spec for spec in cl.filter_specs if spec.field_path == 'category')
+                self.assertEqual(isinstance(category_filter, LimitedRelatedFieldListFilter), large)
+                self.assertEqual(len(category_filter.lookup_choices), 1 if large else 2)
+        [(shown, _)] = category_filter.lookup_choices
+        hidden = ({first.pk, second.pk} - {shown}).pop()
+
+        with self.settings(ADMIN_LARGE_TABLE_MODE=True, ADMIN_FILTER_CHOICES_LIMIT=1):
+            # Tanlangan qiymat limitdan tashqarida bo'lsa ham ro'yxatda qoladi
+            cl = self.client.get(url, {'category__id__exact': hidden}).context['cl']
+            category_filter = next(spec for spec in cl.filter_specs if spec.field_path == 'category')
+            self.assertEqual([pk for pk, title in category_filter.lookup_choices], [shown, hidden])
+            cl = self.client.get(reverse('admin:orders_orderitem_changelist')).context['cl']
+            self.assertTrue(any(isinstance(spec, LimitedRelatedFieldListFilter) for spec in cl.filter_specs))
+
+    def test_overestimated_count_clamps_page(self):
+        from .admin_scale import EstimatedCountPaginator
+
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL pg_class statistikasidan foydalanadi')
+        Curtain.objects.filter(pk__in=[c.pk for c in self.curtains[1:3]]).delete()
+        with self.settings(ADMIN_COUNT_LIMIT=3):
+            paginator = EstimatedCountPaginator(Curtain.objects.order_by('pk'), 2)
+            self.assertEqual(paginator.num_pages, 3)
+            page = paginator.page(3)
+            self.assertEqual(page.number, 2)
+            self.assertEqual(len(page.object_list), 1)
+            self.assertEqual(paginator.page(10).number, 2)
+
+            with self.settings(ADMIN_LARGE_TABLE_MODE=True):
+                response = self.client.get(reverse('admin:curtains_curtain_changelist'), {'p': 10})
+                self.assertEqual(response.status_code, 200)
+
+
+class CatalogCacheTests(TestCase):
+    """Katalog sahifalari ma'lumotlari keshdan olinishi va warm_cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(title='Klassik')
+        self.curtains = [
+            Curtain.objects.create(
+                title=f'Parda {i}', price=100000, category=self.category, is_featured=i < 3, views=i,
+            )
+            for i in range(15)
+        ]
+
+    def test_pages_are_served_from_cache(self):
+        products = reverse('curtains:products')
+        self.client.get(reverse('curtains:index'))
+        self.client.get(products, {'sort': 'name', 'page': 2})
+        with self.assertNumQueries(0):
+            self.client.get(reverse('curtains:index'))
+            # Parametrlar tartibi va ortiqcha parametrlar kalitga ta'sir qilmaydi
+            response = self.client.get(products, {'page': 2, 'utm_source': 'x', 'sort': 'name'})
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+        detail = reverse('curtains:product_detail', args=[self.curtains[0].slug])
+        self.client.get(detail)
+        # Faqat ko'rishlar sonini oshirish
+        with self.assertNumQueries(1):
+            response = self.client.get(detail)
+        self.assertEqual(response.context['curtain'], self.curtains[0])
+        self.assertEqual(self.client.get(reverse('curtains:product_detail', args=['yoq'])).status_code, 404)
+
+    def test_warm_cache(self):
+        call_command('warm_cache', '--top=2', stdout=StringIO())
+        with self.assertNumQueries(0):
+            self.client.get(reverse('curtains:index'))
+            self.client.get(reverse('curtains:products'), {'page': 2})
+        # Kategoriya sahifasi: faqat kategoriyaning o'zi bazadan olinadi
+        with self.assertNumQueries(1):
+            self.client.get(reverse('curtains:category_detail', args=[self.category.pk]))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('curtains:product_detail', args=[self.curtains[14].slug]))
+
+
+class CachingTests(TestCase):
+    """Single-flight, stale-while-revalidate va muddatidan oldin yangilash"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        import threading
+        import time
+        from . import caching
+
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'qiymat'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.get_or_set('k', build, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['qiymat'] * 5)
+
+    def test_stale_value_served_while_refreshing(self):
+        import time
+        from . import caching
+
+        cache.set('k', ('eski', time.time() - 1, 0.01, {}), 60)
+        # Boshqa jarayon yangilayapti - eski qiymat qaytadi
+        cache.add('k:lock', 'boshqa')
+        self.assertEqual(caching.get_or_set('k', lambda: 'yangi', 60), 'eski')
+
+        cache.delete('k:lock')
+        self.assertEqual(caching.get_or_set('k', lambda: 'yangi', 60), 'yangi')
+        self.assertEqual(caching.get_or_set('k', lambda: 'keyingi', 60), 'yangi')
+
+    def test_early_refresh_and_jitter(self):
+        import time
+        from unittest import mock
+        from . import caching
+
+        # Muddatgacha 1 soniya qoldi, hisoblash 10 soniya davom etgan - oldindan yangilanadi
+        cache.set('k', ('eski', time.time() + 1, 10, {}), 60)
+        with mock.patch.object(caching.random, 'random', return_value=0.5):
+            self.assertEqual(caching.get_or_set('k', lambda: 'yangi', 60), 'yangi')
+
+        value, expires, delta, depends = cache.get('k')
+        self.assertTrue(time.time() + 60 * (1 - caching.JITTER) - 1 <= expires <= time.time() + 60)
+
+
+class CacheInvalidationTests(TestCase):
+    """Katalog o'zgarganda bog'liq kesh qiymatlari bekor qilinishi"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(title='Klassik')
+        self.white = Color.objects.create(title='Oq')
+        self.curtain = Curtain.objects.create(title='Parda', price=100000, category=self.category)
+        self.sibling = Curtain.objects.create(title='Qo\'shni', price=100000, category=self.category)
+        self.other = Curtain.objects.create(title='Boshqa', price=100000)
+
+    def detail(self, curtain):
+        return self.client.get(reverse('curtains:product_detail', args=[curtain.slug]))
+
+    def test_detail_follows_own_and_sibling_changes(self):
+        self.assertContains(self.detail(self.curtain), 'Qo&#x27;shni')
+        # Boshqa kategoriyadagi parda o'zgarishi sahifaga ta'sir qilmaydi
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.title = 'Yangi boshqa'
+            self.other.save()
+        with self.assertNumQueries(1):
+            self.detail(self.curtain)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sibling.title = 'Yangi qo\'shni'
+            self.sibling.save()
+        self.assertContains(self.detail(self.curtain), 'Yangi qo&#x27;shni')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.curtain.colors.add(self.white)
+        self.assertEqual(list(self.detail(self.curtain).context['curtain'].colors.all()), [self.white])
+
+        # Boshqa kategoriyaga o'tkazilganda eski kategoriyadagi qo'shni sahifasi ham yangilanadi
+        self.assertEqual(list(self.detail(self.sibling).context['similar_curtains']), [self.curtain])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.curtain.category = Category.objects.create(title='Zamonaviy')
+            self.curtain.save()
+        self.assertEqual(list(self.detail(self.sibling).context['similar_curtains']), [])
+
+    def test_admin_bulk_action_invalidates_lists(self):
+        from django.contrib.auth import get_user_model
+
+        self.client.get(reverse('curtains:index'))
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'parol')
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:curtains_curtain_changelist'), {
+                'action': 'make_featured', '_selected_action': [self.other.pk],
+            })
+        self.client.logout()
+        response = self.client.get(reverse('curtains:index'))
+        self.assertEqual(list(response.context['featured_curtains']), [self.other])
+        self.assertIn('curtain', response['Surrogate-Key'].split())
+
+    def test_purge_hook(self):
+        from unittest import mock
+        from django.test import override_settings
+        from .invalidation import invalidate
+
+        with override_settings(CACHE_PURGE_URL='http://varnish/', JOBS_RUN_INLINE=True), \
+                mock.patch('apps.curtains.tasks.requests.request') as request:
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate(f'curtain:{self.curtain.pk}', 'curtain')
+        request.assert_called_once()
+        self.assertEqual(request.call_args.args, ('PURGE', 'http://varnish/'))
+        self.assertEqual(
+            request.call_args.kwargs['headers'], {'Surrogate-Key': f'curtain curtain:{self.curtain.pk}'}
+        )
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / Last-Modified bo'yicha 304 javoblar"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(title='Klassik')
+        self.curtain = Curtain.objects.create(title='Parda', price=100000, category=self.category)
+        self.sibling = Curtain.objects.create(title='Qo\'shni', price=100000, category=self.category)
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, headers={'If-None-Match': response['ETag']})
+
+    def test_detail_not_modified_until_catalog_changes(self):
+        url = reverse('curtains:product_detail', args=[self.curtain.slug])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        # Render bajarilmaydi, faqat ko'rishlar soni oshiriladi (bitta UPDATE)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, headers={'If-Modified-Since': response['Last-Modified']}).status_code, 304
+        )
+        self.assertEqual(Curtain.objects.get(pk=self.curtain.pk).views, 3)
+        self.assertEqual(self.client.get(reverse('curtains:product_detail', args=['yoq'])).status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sibling.price = 90000
+            self.sibling.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_lists_and_autocomplete(self):
+        for url, params in [
+            (reverse('curtains:products'), {'sort': 'name'}),
+            (reverse('curtains:category_detail', args=[self.category.pk]), {}),
+            (reverse('curtains:search_autocomplete'), {'q': 'Par'}),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url, params)
+                self.assertEqual(self.revalidate(url, response, **params).status_code, 304)
+                # Boshqa parametrlar - boshqa validator
+                self.assertEqual(self.revalidate(url, response, page=2, q='Qo').status_code, 200)
+                with self.captureOnCommitCallbacks(execute=True):
+                    Curtain.objects.create(title='Parda yangi', price=100000, category=self.category)
+                self.assertEqual(self.revalidate(url, response, **params).status_code, 200)
+
+    def test_cart_count_follows_session_cart(self):
+        url = reverse('curtains:cart_count')
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        self.client.post(reverse('curtains:cart_add', args=[self.curtain.pk]))
+        response = self.revalidate(url, response)
+        self.assertEqual(response.json(), {'count': 1})
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+
+class CartTests(TestCase):
+    """Savat: foydalanuvchi savati bazada, kirishda birlashtirish, bitta so'rovli o'qish"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        cache.clear()
+        self.user = get_user_model().objects.create_user('mijoz', password='parol12345')
+        self.curtains = [Curtain.objects.create(title=f'Parda {i}', price=100000) for i in range(3)]
+
+    def add(self, curtain, quantity=1):
+        self.client.post(reverse('curtains:cart_add', args=[curtain.pk]), {'quantity': quantity})
+
+    def test_page_hydrates_in_one_query(self):
+        from django.test.utils import CaptureQueriesContext
+
+        from .cart import Cart
+
+        for user in (self.user, None):
+            if user:
+                self.client.force_login(user)
+            else:
+                self.client.logout()
+            for curtain in self.curtains:
+                self.add(curtain, 2)
+            response = self.client.get(reverse('curtains:cart'))
+            with self.subTest(user=user), CaptureQueriesContext(connection) as queries:
+                cart = Cart(response.wsgi_request)
+                self.assertEqual([item['curtain'] for item in cart], self.curtains)
+                self.assertEqual(cart.get_total(), 600000)
+                self.assertEqual(len(cart), 6)
+            self.assertEqual(len([q for q in queries if 'curtain' in q['sql']]), 1)
+
+    def test_logged_in_cart_is_stored_in_db(self):
+        self.client.force_login(self.user)
+        self.add(self.curtains[0], 2)
+        self.add(self.curtains[0])
+        self.client.post(reverse('curtains:cart_update', args=[self.curtains[0].pk]), {'quantity': 5})
+        self.add(self.curtains[1])
+        self.client.post(reverse('curtains:cart_remove', args=[self.curtains[1].pk]))
+        self.assertEqual(list(CartItem.objects.values_list('curtain_id', 'quantity')), [(self.curtains[0].pk, 5)])
+        self.assertNotIn('cart', self.client.session)
+        self.assertEqual(self.client.get(reverse('curtains:cart_count')).json(), {'count': 5})
+
+    def test_session_cart_merges_on_login(self):
+        CartItem.objects.create(user=self.user, curtain=self.curtains[0], quantity=1, price=100000)
+        self.add(self.curtains[0], 2)
+        self.add(self.curtains[1])
+        self.client.post(reverse('accounts:login'), {'username': 'mijoz', 'password': 'parol12345'})
+        self.assertEqual(
+            sorted(CartItem.objects.filter(user=self.user).values_list('curtain_id', 'quantity')),
+            [(self.curtains[0].pk, 3), (self.curtains[1].pk, 1)],
+        )
+        self.assertNotIn('cart', self.client.session)
+
+    def test_price_change_is_flagged(self):
+        self.client.force_login(self.user)
+        self.add(self.curtains[0])
+        Curtain.objects.filter(pk=self.curtains[0].pk).update(discount_price=80000)
+        item = self.client.get(reverse('curtains:cart')).context['cart_items'][0]
+        self.assertTrue(item['price_changed'])
+        self.assertEqual((item['saved_price'], item['price'], item['total_price']), (100000, 80000, 80000))
+
+
+class CartSummaryCookieTests(TestCase):
+    """Savat xulosasi imzolangan cookie'da - cart_count session'ni o'qimaydi"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from .cart import SUMMARY_COOKIE
+
+        cache.clear()
+        self.cookie = SUMMARY_COOKIE
+        self.user = get_user_model().objects.create_user('mijoz', password='parol12345')
+        self.curtain = Curtain.objects.create(title='Parda', price=100000)
+
+    def summary(self):
+        from django.core import signing
+
+        from .cart import SUMMARY_SALT
+
+        value = self.client.cookies[self.cookie].value
+        return value and signing.get_cookie_signer(salt=self.cookie + SUMMARY_SALT).unsign(value, max_age=None)
+
+    def test_mutations_update_cookie(self):
+        url = reverse('curtains:cart_update', args=[self.curtain.pk])
+        self.client.post(reverse('curtains:cart_add', args=[self.curtain.pk]), {'quantity': 2})
+        self.assertEqual(self.summary(), '2:200000')
+        self.client.post(url, {'quantity': 3})
+        self.assertEqual(self.summary(), '3:300000')
+        self.client.post(url, {'quantity': 0})
+        self.assertEqual(self.summary(), '0:0')
+
+    def test_cart_count_skips_session(self):
+        self.client.post(reverse('curtains:cart_add', args=[self.curtain.pk]))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('curtains:cart_count'))
+        self.assertEqual(response.json(), {'count': 1})
+
+        # Imzosi buzilgan cookie e'tiborga olinmaydi, savat session'dan o'qiladi
+        self.client.cookies[self.cookie] = '9:900000:x:y'
+        self.assertEqual(self.client.get(reverse('curtains:cart_count')).json(), {'count': 1})
+        self.assertEqual(self.summary(), '1:100000')
+
+    def test_login_and_logout(self):
+        CartItem.objects.create(user=self.user, curtain=self.curtain, quantity=4, price=100000)
+        self.client.post(reverse('curtains:cart_add', args=[self.curtain.pk]))
+        self.client.post(reverse('accounts:login'), {'username': 'mijoz', 'password': 'parol12345'})
+        self.assertEqual(self.summary(), '5:500000:u')
+        self.client.post(reverse('accounts:logout'))
+        self.assertEqual(self.summary(), '')
+
+    def test_user_cart_changed_on_another_device(self):
+        from django.test import Client
+
+        phone = Client()
+        for client in (self.client, phone):
+            client.force_login(self.user)
+        url = reverse('curtains:products')
+        self.client.get(reverse('curtains:cart_count'))
+        response = self.client.get(url)
+        self.assertEqual(self.summary(), '0:0:u')
+
+        phone.post(reverse('curtains:cart_add', args=[self.curtain.pk]), {'quantity': 2})
+        # Bu qurilmadagi cookie eskirgan: xulosa bazadan olinadi, sahifa 304 bo'lmaydi
+        self.assertEqual(self.client.get(reverse('curtains:cart_count')).json(), {'count': 2})
+        self.assertEqual(self.summary(), '2:200000:u')
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 200)
+
+
+class SessionStorageTests(TestCase):
+    """Savat session'da ixcham satr, xabarlar cookie'da, compact_sessions"""
+
+    def setUp(self):
+        cache.clear()
+        self.curtains = [Curtain.objects.create(title=f'Parda {i}', price=100000) for i in range(2)]
+
+    def test_cart_is_packed(self):
+        from .cart import pack_cart, unpack_cart
+
+        for curtain in self.curtains:
+            self.client.post(reverse('curtains:cart_add', args=[curtain.pk]), {'quantity': 2})
+        packed = self.client.session['cart']
+        self.assertEqual(packed, f'{self.curtains[0].pk}:2:100000;{self.curtains[1].pk}:2:100000')
+        self.assertEqual(pack_cart(unpack_cart(packed)), packed)
+        self.assertEqual(unpack_cart({'7': {'quantity': 1, 'price': 5}}), {7: [1, 5]})
+        # Flash xabar session'ga yozilmaydi
+        self.assertNotIn('_messages', self.client.session)
+        self.assertIn('messages', self.client.cookies)
+
+    def test_compact_sessions_deletes_expired_in_batches(self):
+        from datetime import timedelta
+
+        from django.contrib.sessions.models import Session
+        from django.utils import timezone
+
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'old{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        out = StringIO()
+        call_command('compact_sessions', batch_size=2, pause=0, stdout=out)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertIn('5', out.getvalue())
+
+
+class CatalogApiTests(TestCase):
+    """JSON katalog API: maydonlar, kursor bilan sahifalash, ETag"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(title='Klassik')
+        self.white = Color.objects.create(title='Oq', hex_code='#FFFFFF')
+        self.curtains = [
+            Curtain.objects.create(
+                title=f'Parda {i % 3}', price=100000 + (i % 4) * 10000, category=self.category,
+            )
+            for i in range(7)
+        ]
+        self.curtains[0].colors.add(self.white)
+        CurtainImage.objects.create(curtain=self.curtains[0], image='curtains/a.jpg', order=1)
+        CurtainImage.objects.create(curtain=self.curtains[0], image='curtains/main.jpg', is_main=True, order=2)
+
+    def fetch_all(self, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, limit=3, **({'cursor': cursor} if cursor else {}))
+            data = self.client.get(reverse('curtains:api_curtains'), query).json()
+            ids += [row['id'] for row in data['curtains']]
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                return ids
+
+    def test_cursor_pagination_matches_sorting(self):
+        for sort in SORT_ORDERING:
+            with self.subTest(sort=sort):
+                expected = list(
+                    filter_curtains(Curtain.objects.filter(is_active=True), {'sort': sort})
+                    .order_by(SORT_ORDERING[sort], '-pk' if SORT_ORDERING[sort].startswith('-') else 'pk')
+                    .values_list('pk', flat=True)
+                )
+                self.assertEqual(self.fetch_all(sort=sort, fields='id'), expected)
+        self.assertEqual(
+            self.client.get(reverse('curtains:api_curtains'), {'cursor': 'xyz'}).status_code, 400
+        )
+
+    def test_fields_and_main_image_in_one_query(self):
+        url = reverse('curtains:api_curtains')
+        with self.assertNumQueries(1):
+            data = self.client.get(url, {'fields': 'id,title,image', 'sort': 'name', 'limit': 1}).json()
+        self.assertEqual(list(data['curtains'][0]), ['id', 'title', 'image'])
+
+        data = self.client.get(url, {'fields': 'id,image,colors,url'}).json()
+        first = next(row for row in data['curtains'] if row['id'] == self.curtains[0].pk)
+        self.assertEqual(first['image'], '/media/curtains/main.jpg')
+        self.assertEqual(first['colors'], [self.white.pk])
+        self.assertEqual(self.client.get(url, {'fields': 'id,parol'}).status_code, 400)
+
+        detail = self.client.get(reverse('curtains:api_curtain_detail', args=[self.curtains[0].slug])).json()
+        self.assertEqual(
+            [image['url'] for image in detail['images']], ['/media/curtains/main.jpg', '/media/curtains/a.jpg']
+        )
+        self.assertEqual(self.client.get(reverse('curtains:api_curtain_detail', args=['yoq'])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('curtains:api_categories')).json(),
+            {'categories': [{'id': self.category.pk, 'title': 'Klassik', 'curtains': 7}]},
+        )
+
+    def test_etag(self):
+        url = reverse('curtains:api_colors')
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Color.objects.create(title='Qizil')
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 200)
+
+    def test_views_are_not_covered_by_etag(self):
+        # increment_views avlodni oshirmaydi: views ko'rinadigan javob 304 bilan eskirmasligi kerak
+        url = reverse('curtains:api_curtains')
+        for params in ({'fields': 'id,views'}, {'sort': 'views'}):
+            with self.subTest(params=params):
+                self.assertFalse(self.client.get(url, params).has_header('ETag'))
+        self.curtains[0].increment_views()
+        row = self.client.get(url, {'fields': 'id,views'}).json()['curtains']
+        self.assertIn({'id': self.curtains[0].pk, 'views': 1}, row)
+
+        detail_url = reverse('curtains:api_curtain_detail', args=[self.curtains[0].slug])
+        response = self.client.get(detail_url)
+        self.assertNotIn('views', response.json())
+        self.assertEqual(self.client.get(detail_url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+        self.assertFalse(self.client.get(detail_url, {'fields': 'id,views'}).has_header('ETag'))
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+
+class ImageNormalizationTests(TestCase):
+    """Rasmlarni normallashtirish: kontent xeshi bo'yicha saqlash, fon vazifasi"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.curtain = Curtain.objects.create(title='Parda', price=100000)
+
+    def image_bytes(self, size=(40, 20), color='red', fmt='PNG', exif=None):
+        from PIL import Image
+
+        output = BytesIO()
+        kwargs = {'exif': exif} if exif is not None else {}
+        Image.new('RGB', size, color).save(output, format=fmt, **kwargs)
+        return output.getvalue()
+
+    def legacy_image(self, name, data=None):
+        """Normallashtirilmagan (eski) rasm: save() chetlab o'tiladi"""
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        name = default_storage.save(name, ContentFile(data or self.image_bytes()))
+        CurtainImage.objects.bulk_create([CurtainImage(curtain=self.curtain, image=name)])
+        return CurtainImage.objects.get(image=name)
+
+    def test_task_points_row_at_normalized_file(self):
+        from django.core.files.storage import default_storage
+
+        from .images import is_content_addressed
+        from .tasks import normalize_curtain_image
+
+        image = self.legacy_image('curtains/2024/01/01/eski.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            normalize_curtain_image(image_id=image.pk, delete_original=True)
+
+        image.refresh_from_db()
+        self.assertTrue(is_content_addressed(image.image.name))
+        self.assertTrue(default_storage.exists(image.image.name))
+        self.assertFalse(default_storage.exists('curtains/2024/01/01/eski.png'))
+
+    def test_decompression_bomb_is_skipped_or_rejected(self):
+        from unittest import mock
+
+        from django.core.exceptions import ValidationError
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        from .images import is_content_addressed
+        from .tasks import normalize_curtain_image
+
+        bomb = self.legacy_image('curtains/2024/01/01/katta.png', self.image_bytes(size=(64, 64)))
+        normal = self.legacy_image('curtains/2024/01/01/oddiy.png', self.image_bytes(size=(4, 4)))
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            out, err = StringIO(), StringIO()
+            call_command('normalize_images', stdout=out, stderr=err)
+            self.assertIn('1 ta rasm normallashtirildi, 1 ta xatolik', out.getvalue())
+            self.assertIn('katta.png', err.getvalue())
+            normal.refresh_from_db()
+            self.assertTrue(is_content_addressed(normal.image.name))
+
+            # Fon vazifasi qayta urinmasdan o'tkazib yuboradi
+            with self.assertLogs('apps.curtains.tasks', 'WARNING'):
+                normalize_curtain_image(image_id=bomb.pk)
+            bomb.refresh_from_db()
+            self.assertEqual(bomb.image.name, 'curtains/2024/01/01/katta.png')
+
+            # Ruxsat chegarasidan bir oz katta (ogohlantirish darajasi) ham rad etiladi
+            upload = CurtainImage(
+                curtain=self.curtain, image=SimpleUploadedFile('a.png', self.image_bytes(size=(12, 12)))
+            )
+            with self.assertRaises(ValidationError) as raised:
+                upload.full_clean()
+            self.assertIn('image', raised.exception.message_dict)
+
+    def test_same_image_is_stored_once(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from .images import is_content_addressed
+
+        data = self.image_bytes()
+        first, second = [
+            CurtainImage.objects.create(curtain=self.curtain, image=SimpleUploadedFile(name, data))
+            for name in ('a.png', 'b.png')
+        ]
+        self.assertTrue(is_content_addressed(first.image.name))
+        self.assertEqual(first.image.name, second.image.name)
+
+    @override_settings(CURTAIN_IMAGE_MAX_SIZE=16)
+    def test_exif_orientation_and_size_are_normalized(self):
+        from PIL import Image
+
+        from .images import normalize_image
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # 90 gradga burilgan
+        data = normalize_image(BytesIO(self.image_bytes(size=(40, 20), fmt='JPEG', exif=exif)))
+        with Image.open(BytesIO(data)) as result:
+            self.assertEqual(result.format, 'JPEG')
+            self.assertEqual(result.size, (8, 16))
+            self.assertNotIn(0x0112, result.getexif())
+
+    def test_command_keeps_originals_still_in_use(self):
+        from unittest import mock
+
+        from django.core.files.storage import default_storage
+
+        from .images import store_normalized_image
+
+        only = self.legacy_image('curtains/2024/01/01/yakka.png')
+        shared = self.legacy_image('curtains/2024/01/01/umumiy.png', self.image_bytes(color='blue'))
+        CurtainImage.objects.bulk_create([CurtainImage(curtain=self.curtain, image=shared.image.name)])
+        calls = []
+
+        def flaky(file):
+            # Umumiy faylning ikkinchi yozuvi qayta ishlanmay qoladi
+            calls.append(file.name)
+            if calls.count(file.name) == 2:
+                raise OSError('o\'qib bo\'lmadi')
+            return store_normalized_image(file)
+
+        target = 'apps.curtains.management.commands.normalize_images.store_normalized_image'
+        with mock.patch(target, side_effect=flaky):
+            call_command('normalize_images', delete_originals=True, stdout=StringIO(), stderr=StringIO())
+
+        only.refresh_from_db()
+        self.assertTrue(only.image.name.startswith('curtains/ca/'))
+        self.assertFalse(default_storage.exists('curtains/2024/01/01/yakka.png'))
+        self.assertEqual(CurtainImage.objects.filter(image=shared.image.name).count(), 1)
+        self.assertTrue(default_storage.exists(shared.image.name))
+
+
+class LoadDataTests(TestCase):
+    """generate_load_data: bir xil --seed va --anchor bir xil ma'lumot beradi"""
+
+    def generate(self, tag):
+        from apps.orders.models import Order
+
+        call_command(
+            'generate_load_data', curtains=5, users=3, staff=1, orders=20, images=0,
+            seed=7, anchor='2026-01-15', tag=tag, stdout=StringIO(),
+        )
+        return list(
+            Order.objects.filter(order_number__startswith=f'{tag.upper()}-').order_by('pk')
+            .values_list('created_date', 'updated_date', 'status', 'customer_name')
+        )
+
+    def test_seed_and_anchor_are_reproducible(self):
+        first = self.generate('a')
+        self.assertEqual(len(first), 20)
+        self.assertEqual(first, self.generate('b'))
+        self.assertTrue(all(updated.date().isoformat() <= '2026-01-15' for _, updated, _, _ in first))
+
+        from django.core.management.base import CommandError
+        with self.assertRaises(CommandError):
+            call_command('generate_load_data', anchor='15.01.2026', tag='c', stdout=StringIO())
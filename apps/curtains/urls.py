@@ -16,4 +16,8 @@ urlpatterns = [
     path('cart/count/', views.cart_count, name='cart_count'),
     path('checkout/', views.checkout, name='checkout'),
     path('contact/', views.contact, name='contact'),
+    path('api/v1/curtains/', views.api_curtains_view, name='api_curtains'),
+    path('api/v1/curtains/<slug:slug>/', views.api_curtain_detail_view, name='api_curtain_detail'),
+    path('api/v1/categories/', views.api_categories_view, name='api_categories'),
+    path('api/v1/colors/', views.api_colors_view, name='api_colors'),
 ]
\ No newline at end of file
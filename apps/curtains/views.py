@@ -1,122 +1,46 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import JsonResponse
+from django.db.models import Q
+from django.http import Http404, JsonResponse
 from django.urls import reverse
-from django.views.decorators.http import require_POST
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 from django.contrib import messages
-from .models import Curtain, Category, Color
-from .cart import Cart
+from . import api, catalog, conditional
+from .models import Curtain, Category
+from .bought_together import bought_together_for
+from .cart import Cart, cart_summary
+from .filters import DEFAULT_SORT
+from .invalidation import tag_response
 
 
 def index(request):
     """Bosh sahifa - asosiy pardalar va kategoriyalarni ko'rsatish"""
-    # Faol va asosiy pardalar
-    featured_curtains = Curtain.objects.filter(
-        is_active=True, is_featured=True
-    ).select_related('category').prefetch_related('images', 'colors')[:8]
-    
-    # Yangi pardalar
-    new_curtains = Curtain.objects.filter(
-        is_active=True
-    ).select_related('category').prefetch_related('images', 'colors').order_by('-created_date')[:6]
-    
-    # Chegirmadagi pardalar
-    sale_curtains = Curtain.objects.filter(
-        is_active=True, discount_price__isnull=False
-    ).select_related('category').prefetch_related('images', 'colors')[:6]
-    
-    # Kategoriyalar
-    categories = Category.objects.annotate(
-        curtains_count=Count('curtains', filter=Q(curtains__is_active=True))
-    ).order_by('title')
-    
-    context = {
-        'featured_curtains': featured_curtains,
-        'new_curtains': new_curtains,
-        'sale_curtains': sale_curtains,
-        'categories': categories,
-    }
-    return render(request, 'index.html', context)
+    # Asosiy, yangi va chegirmadagi pardalar hamda kategoriyalar (keshdan)
+    context = dict(catalog.index_sections(), cache_tags=catalog.LIST_TAGS)
+    return tag_response(render(request, 'index.html', context), catalog.LIST_TAGS)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.list_etag)
 def products(request):
     """Barcha pardalarni sahifalab ko'rsatish"""
-    curtains = Curtain.objects.filter(is_active=True).select_related('category').prefetch_related('images', 'colors')
-    
-    # Filtrlar
     category_id = request.GET.get('category')
     color_id = request.GET.get('color')
     fabric_type = request.GET.get('fabric')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
     search = request.GET.get('search')
-    sort_by = request.GET.get('sort', 'created_date')
-    
-    if category_id:
-        # Try to convert to integer first, if fails, try to find by title
-        try:
-            curtains = curtains.filter(category_id=int(category_id))
-        except (ValueError, TypeError):
-            # If not a number, try to find category by title (case-insensitive)
-            curtains = curtains.filter(category__title__icontains=category_id)
-    
-    if color_id:
-        # Try to convert to integer first, if fails, try to find by title
-        try:
-            curtains = curtains.filter(colors__id=int(color_id))
-        except (ValueError, TypeError):
-            # If not a number, try to find color by title (case-insensitive)
-            curtains = curtains.filter(colors__title__icontains=color_id)
-    
-    if fabric_type:
-        curtains = curtains.filter(fabric_type=fabric_type)
-    
-    if min_price:
-        try:
-            curtains = curtains.filter(price__gte=int(min_price))
-        except (ValueError, TypeError):
-            min_price = None
-
-    if max_price:
-        try:
-            curtains = curtains.filter(price__lte=int(max_price))
-        except (ValueError, TypeError):
-            max_price = None
-    
-    if search:
-        curtains = curtains.filter(
-            Q(title__icontains=search) | 
-            Q(content__icontains=search) |
-            Q(category__title__icontains=search)
-        )
-    
-    # Saralash
-    if sort_by == 'price_low':
-        curtains = curtains.order_by('price')
-    elif sort_by == 'price_high':
-        curtains = curtains.order_by('-price')
-    elif sort_by == 'name':
-        curtains = curtains.order_by('title')
-    elif sort_by == 'views':
-        curtains = curtains.order_by('-views')
-    else:
-        curtains = curtains.order_by('-created_date')
-    
-    # Sahifalash
-    paginator = Paginator(curtains, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    sort_by = request.GET.get('sort', DEFAULT_SORT)
+
+    # Filtrlar, saralash va sahifalash (natija keshlanadi)
+    page_obj = catalog.products_page(request.GET, request.GET.get('page'))
     
     # Filtr uchun ma'lumotlar
-    categories = Category.objects.all()
-    colors = Color.objects.all()
+    choices = catalog.filter_choices()
     fabric_choices = Curtain.FABRIC_CHOICES
     
     context = {
         'page_obj': page_obj,
-        'categories': categories,
-        'colors': colors,
+        'categories': choices['categories'],
+        'colors': choices['colors'],
         'fabric_choices': fabric_choices,
         'current_category': category_id,
         'current_color': color_id,
@@ -124,51 +48,40 @@ def products(request):
         'current_search': search,
         'current_sort': sort_by,
     }
-    return render(request, 'products.html', context)
+    return tag_response(render(request, 'products.html', context), catalog.LIST_TAGS)
 
 
+@cache_control(private=True, no_cache=True)
+@conditional.counts_detail_view
+@condition(etag_func=conditional.detail_etag, last_modified_func=conditional.detail_last_modified)
 def product_detail(request, slug):
-    """Parda tafsilotlari"""
-    curtain = get_object_or_404(
-        Curtain.objects.select_related('category').prefetch_related('images', 'colors'),
-        slug=slug, is_active=True
-    )
-    
-    # Ko'rishlar sonini oshirish
-    curtain.increment_views()
+    """Parda tafsilotlari (ko'rishlar soni counts_detail_view'da, 304 bo'lsa ham oshadi)"""
+    # Parda, o'xshash pardalar va birga xarid qilinadiganlar (keshdan)
+    context = conditional.detail_context(request, slug)
+    if context is None:
+        raise Http404('Parda topilmadi')
     
-    # O'xshash pardalar
-    similar_curtains = Curtain.objects.filter(
-        category=curtain.category,
-        is_active=True
-    ).exclude(id=curtain.id).select_related('category').prefetch_related('images')[:4]
-    
-    context = {
-        'curtain': curtain,
-        'similar_curtains': similar_curtains,
-    }
-    return render(request, 'product-detail.html', context)
+    return tag_response(render(request, 'product-detail.html', context), catalog.detail_tags(context))
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.list_etag)
 def category_detail_view(request, pk):
     """Kategoriya bo'yicha pardalar"""
     category = get_object_or_404(Category, pk=pk)
-    curtains = Curtain.objects.filter(
-        category=category, is_active=True
-    ).select_related('category').prefetch_related('images', 'colors')
     
-    # Sahifalash
-    paginator = Paginator(curtains, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Sahifalash (natija keshlanadi)
+    page_obj = catalog.category_page(category, request.GET.get('page'))
     
     context = {
         'category': category,
         'page_obj': page_obj,
     }
-    return render(request, 'category.html', context)
+    return tag_response(render(request, 'category.html', context), catalog.LIST_TAGS)
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.autocomplete_etag)
 def search_autocomplete(request):
     """Qidiruv uchun avtomatik to'ldirish"""
     query = request.GET.get('q', '')
@@ -193,11 +106,52 @@ def search_autocomplete(request):
     return JsonResponse({'suggestions': suggestions})
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.api_etag)
+def api_curtains_view(request):
+    """Katalog API v1: pardalar (products() filtrlari, ?fields=, ?limit=, ?cursor=)"""
+    try:
+        curtains, cursor = api.curtain_list(request.GET)
+    except api.InvalidParameter as error:
+        return api.json_response({'error': str(error)}, status=400)
+    return api.json_response({'curtains': curtains, 'next_cursor': cursor, 'has_more': cursor is not None})
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.api_etag)
+def api_curtain_detail_view(request, slug):
+    """Katalog API v1: bitta parda, barcha rasmlari bilan"""
+    try:
+        curtain = api.curtain_detail(slug, request.GET.get('fields'))
+    except api.InvalidParameter as error:
+        return api.json_response({'error': str(error)}, status=400)
+    if curtain is None:
+        return api.json_response({'error': 'Parda topilmadi'}, status=404)
+    return api.json_response(curtain)
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.api_etag)
+def api_categories_view(request):
+    return api.json_response({'categories': api.category_list()})
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=conditional.api_etag)
+def api_colors_view(request):
+    return api.json_response({'colors': api.color_list()})
+
+
 def cart(request):
     """Savat sahifasi"""
     cart_obj = Cart(request)
     cart_items = list(cart_obj)
-    return render(request, 'cart.html', {'cart': cart_obj, 'cart_items': cart_items})
+    bought_together = bought_together_for([item['curtain'] for item in cart_items])
+    return render(request, 'cart.html', {
+        'cart': cart_obj,
+        'cart_items': cart_items,
+        'bought_together': bought_together,
+    })
 
 
 @require_POST
@@ -235,17 +189,25 @@ def cart_update(request, curtain_id):
     return redirect('curtains:cart')
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.cart_etag)
 def cart_count(request):
-    """Savat mahsulotlar soni (AJAX uchun)"""
-    cart = Cart(request)
-    return JsonResponse({'count': len(cart)})
+    """Savat mahsulotlar soni (AJAX uchun). Xulosa cookie'si bo'lsa session o'qilmaydi"""
+    return JsonResponse({'count': cart_summary(request)[0]})
 
 
 def checkout(request):
     """Buyurtma berish sahifasi"""
     from apps.orders.forms import OrderForm
+    from apps.orders.idempotency import existing_order, place_order
     from apps.orders.models import Order, OrderItem
-    from apps.orders.telegram import send_order_notification
+    from apps.orders.tasks import notify_new_order
+
+    if request.method == 'POST':
+        # Qayta yuborilgan forma: savat allaqachon bo'shatilgan, buyurtma bor
+        order = existing_order(request.POST.get('idempotency_key'))
+        if order is not None:
+            return redirect('orders:order_success', order_number=order.order_number)
 
     cart_obj = Cart(request)
     cart_items = list(cart_obj)
@@ -257,21 +219,28 @@ def checkout(request):
     if request.method == 'POST':
         form = OrderForm(request.POST)
         if form.is_valid():
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                customer_name=form.cleaned_data['customer_name'],
-                customer_phone=form.cleaned_data['customer_phone'],
-                customer_address=form.cleaned_data['customer_address'],
-                notes=form.cleaned_data.get('notes', ''),
-            )
-            for item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    curtain=item['curtain'],
-                    quantity=item['quantity'],
-                    unit_price=item['price'],
+            def create(key):
+                order = Order.objects.create(
+                    user=request.user if request.user.is_authenticated else None,
+                    customer_name=form.cleaned_data['customer_name'],
+                    customer_phone=form.cleaned_data['customer_phone'],
+                    customer_address=form.cleaned_data['customer_address'],
+                    notes=form.cleaned_data.get('notes', ''),
+                    idempotency_key=key,
                 )
-            send_order_notification(order)
+                for item in cart_items:
+                    OrderItem.objects.create(
+                        order=order,
+                        curtain=item['curtain'],
+                        quantity=item['quantity'],
+                        unit_price=item['price'],
+                    )
+                return order
+
+            order, created = place_order(form.cleaned_data['idempotency_key'], create)
+            if not created:
+                return redirect('orders:order_success', order_number=order.order_number)
+            notify_new_order.delay(order_id=order.pk)
             cart_obj.clear()
             messages.success(
                 request,
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'queue', 'priority', 'status', 'attempts', 'run_at', 'finished_date']
+    list_filter = ['status', 'queue']
+    search_fields = ['task']
+    readonly_fields = ['locked_by', 'locked_at', 'last_error', 'created_date', 'finished_date']
+    ordering = ['-created_date']
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, run_at=timezone.now(), attempts=0, finished_date=None
+        )
+        self.message_user(request, f'{updated} ta vazifa qayta navbatga qo\'yildi.')
+    retry_now.short_description = 'Tanlangan vazifalarni hozir qayta bajarish'
@@ -0,0 +1,42 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Ma\'lumotlar bazasidagi navbatdan fon vazifalarini bajarish'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', default='default',
+                            help='Vergul bilan ajratilgan navbatlar (masalan: default,notifications)')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Parallel bajariladigan vazifalar soni (oqimlar)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Navbat bo\'sh bo\'lganda tekshirish oralig\'i (soniya)')
+        parser.add_argument('--burst', action='store_true',
+                            help='Navbat bo\'shagach to\'xtash (cron va testlar uchun)')
+
+    def handle(self, *args, **options):
+        queues = [queue.strip() for queue in options['queues'].split(',') if queue.strip()]
+        worker = Worker(
+            queues=queues,
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+        )
+
+        def shutdown(signum, frame):
+            if worker.stopping:
+                return
+            self.stdout.write('To\'xtatilmoqda: bajarilayotgan vazifalar tugashi kutilmoqda...')
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.stdout.write(
+            f'Worker ishga tushdi: navbatlar={",".join(queues)}, oqimlar={worker.concurrency}'
+        )
+        worker.run()
+        self.stdout.write(self.style.SUCCESS('Worker to\'xtadi.'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(default='default', max_length=50, verbose_name='Navbat')),
+                ('task', models.CharField(max_length=200, verbose_name='Vazifa')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='Argumentlar')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Kattaroq qiymat oldinroq bajariladi', verbose_name='Muhimlik')),
+                ('status', models.CharField(choices=[('queued', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Bajarildi'), ('failed', 'Xatolik')], default='queued', max_length=10, verbose_name='Holati')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Urinishlar')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Maksimal urinishlar')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Bajarish vaqti')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Olingan vaqt')),
+                ('last_error', models.TextField(blank=True, verbose_name='Oxirgi xatolik')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan vaqt')),
+                ('finished_date', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan vaqt')),
+            ],
+            options={
+                'verbose_name': 'Fon vazifasi',
+                'verbose_name_plural': 'Fon vazifalari',
+                'db_table': 'jobs_job',
+                'ordering': ['-created_date'],
+                'indexes': [models.Index(condition=models.Q(('status', 'queued')), fields=['queue', '-priority', 'run_at', 'id'], name='jobs_ready_idx'), models.Index(condition=models.Q(('status', 'running')), fields=['locked_at'], name='jobs_running_idx'), models.Index(fields=['status', 'finished_date'], name='jobs_finished_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    """Ma'lumotlar bazasidagi fon vazifasi (run_worker buyrug'i bajaradi)"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, _('Navbatda')),
+        (RUNNING, _('Bajarilmoqda')),
+        (DONE, _('Bajarildi')),
+        (FAILED, _('Xatolik')),
+    ]
+
+    queue = models.CharField(_('Navbat'), max_length=50, default='default')
+    task = models.CharField(_('Vazifa'), max_length=200)
+    kwargs = models.JSONField(_('Argumentlar'), default=dict, blank=True)
+    priority = models.SmallIntegerField(_('Muhimlik'), default=0,
+                                        help_text=_('Kattaroq qiymat oldinroq bajariladi'))
+    status = models.CharField(_('Holati'), max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(_('Urinishlar'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('Maksimal urinishlar'), default=5)
+    run_at = models.DateTimeField(_('Bajarish vaqti'), default=timezone.now)
+    locked_by = models.CharField(_('Worker'), max_length=100, blank=True)
+    locked_at = models.DateTimeField(_('Olingan vaqt'), null=True, blank=True)
+    last_error = models.TextField(_('Oxirgi xatolik'), blank=True)
+    created_date = models.DateTimeField(_('Yaratilgan vaqt'), auto_now_add=True)
+    finished_date = models.DateTimeField(_('Tugagan vaqt'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Fon vazifasi')
+        verbose_name_plural = _('Fon vazifalari')
+        db_table = 'jobs_job'
+        ordering = ['-created_date']
+        indexes = [
+            # Worker navbatdagi eng muhim, vaqti kelgan vazifani shu indeks orqali oladi
+            models.Index(fields=['queue', '-priority', 'run_at', 'id'], condition=Q(status='queued'),
+                         name='jobs_ready_idx'),
+            # Osilib qolgan (worker o'lgan) vazifalarni topish
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='jobs_running_idx'),
+            models.Index(fields=['status', 'finished_date'], name='jobs_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.queue}] - {self.get_status_display()}"
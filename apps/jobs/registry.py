@@ -0,0 +1,81 @@
+"""Fon vazifalarini ro'yxatdan o'tkazish va navbatga qo'yish.
+
+    @task(queue='notifications', max_attempts=8)
+    def notify(order_id):
+        ...
+
+    notify.delay(order_id=order.pk)                       # darhol
+    notify.enqueue({'order_id': order.pk}, delay=60)      # 60 soniyadan keyin
+
+Argumentlar JSON'ga aylanadigan bo'lishi kerak. Vazifa qatori joriy
+tranzaksiya ichida yoziladi: tranzaksiya bekor bo'lsa vazifa ham yo'qoladi,
+worker esa uni faqat commit'dan keyin ko'radi.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, func, name, queue, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def delay(self, **kwargs):
+        return self.enqueue(kwargs)
+
+    def enqueue(self, kwargs=None, *, run_at=None, delay=None, queue=None, priority=None):
+        """Vazifani navbatga qo'yish. delay - soniya yoki timedelta, run_at - aniq vaqt (ETA)"""
+        kwargs = kwargs or {}
+        if getattr(settings, 'JOBS_RUN_INLINE', False):
+            # Worker ishlatilmaydigan muhit: so'rov ichida bajariladi, xatolik so'rovni buzmaydi
+            try:
+                self.func(**kwargs)
+            except Exception:
+                logger.exception('Fon vazifasi bajarilmadi: %s', self.name)
+            return None
+
+        if run_at is None:
+            run_at = timezone.now()
+            if delay:
+                run_at += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+        return Job.objects.create(
+            task=self.name,
+            kwargs=kwargs,
+            queue=queue or self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=run_at,
+        )
+
+
+def task(func=None, *, name=None, queue='default', priority=0, max_attempts=5):
+    """Funksiyani fon vazifasi sifatida ro'yxatdan o'tkazish"""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        _tasks[task_name] = Task(func, task_name, queue, priority, max_attempts)
+        return _tasks[task_name]
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    """Nom bo'yicha vazifa; ilovalarning tasks.py modullari kerak bo'lganda yuklanadi"""
+    if name not in _tasks:
+        autodiscover_modules('tasks')
+    return _tasks[name]
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .registry import task
+from .worker import claim, release_stale, run_pending
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.flaky', max_attempts=2)
+def flaky():
+    raise RuntimeError('tarmoq xatosi')
+
+
+class JobQueueTests(TestCase):
+    """Navbatga qo'yish, muhimlik, ETA va qayta urinishlar"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_by_priority_and_respects_eta(self):
+        record.delay(value='oddiy')
+        record.enqueue({'value': 'muhim'}, priority=5)
+        later = record.enqueue({'value': 'keyinroq'}, delay=60)
+        record.enqueue({'value': 'boshqa navbat'}, queue='images')
+
+        self.assertEqual(run_pending(['default']), 2)
+        self.assertEqual(calls, ['muhim', 'oddiy'])
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+
+    def test_retry_with_backoff_then_fail(self):
+        job = flaky.delay()
+
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertIn('tarmoq xatosi', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_claim_is_exclusive_and_stale_jobs_return(self):
+        job = record.delay(value='bir marta')
+        self.assertEqual(claim(['default'], 'a').pk, job.pk)
+        self.assertIsNone(claim(['default'], 'b'))
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(release_stale(), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, ['bir marta'])
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_inline_mode(self):
+        self.assertIsNone(record.delay(value='darhol'))
+        self.assertIsNone(flaky.delay())
+        self.assertEqual(calls, ['darhol'])
+        self.assertFalse(Job.objects.exists())
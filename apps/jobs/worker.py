@@ -0,0 +1,202 @@
+"""Navbatdagi vazifalarni olish (claim) va bajarish.
+
+PostgreSQL'da vazifa SELECT ... FOR UPDATE SKIP LOCKED bilan olinadi: bir
+nechta worker bir-birini kutmasdan turli qatorlarni oladi. SQLite'da yozuvlar
+baribir ketma-ket bajariladi, shu sababli vazifa shartli
+UPDATE ... WHERE status='queued' bilan band qilinadi. Faqat bitta worker
+muvaffaqiyatli bo'ladi, qolganlari keyingi nomzodga o'tadi.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+# Qayta urinishlar orasidagi kutish: 10s, 20s, 40s, ... ko'pi bilan 1 soat
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 3600
+# Shuncha vaqtdan beri "bajarilmoqda" holatidagi vazifa worker o'lgan deb qaytariladi
+LOCK_TIMEOUT = timedelta(minutes=15)
+# Bajarilgan vazifalar shuncha vaqt saqlanadi
+DONE_RETENTION = timedelta(days=7)
+SQLITE_CLAIM_CANDIDATES = 5
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+    # Bir vaqtda yiqilgan vazifalar bir vaqtda qaytmasligi uchun tasodifiy siljish
+    return timedelta(seconds=delay * random.uniform(1, 1.2))
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def ready_jobs(queues):
+    return Job.objects.filter(
+        status=Job.QUEUED, queue__in=queues, run_at__lte=timezone.now()
+    ).order_by('-priority', 'run_at', 'id')
+
+
+def claim(queues, worker_id):
+    """Navbatdan bitta vazifani olish; bo'lmasa None"""
+    now = timezone.now()
+    running = {'status': Job.RUNNING, 'locked_by': worker_id, 'locked_at': now}
+    connection = connections[Job.objects.db]
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = ready_jobs(queues).select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            Job.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1, **running)
+        job.refresh_from_db()
+        return job
+
+    for pk in ready_jobs(queues).values_list('pk', flat=True)[:SQLITE_CLAIM_CANDIDATES]:
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(attempts=F('attempts') + 1, **running):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def execute(job):
+    """Vazifani bajarish va natijani yozish: done, qayta navbat (backoff) yoki failed"""
+    try:
+        task = get_task(job.task)
+    except KeyError:
+        _finish(job, status=Job.FAILED, last_error=f'Noma\'lum vazifa: {job.task}')
+        logger.error('Noma\'lum vazifa: %s (#%s)', job.task, job.pk)
+        return False
+
+    try:
+        task.func(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            _finish(job, status=Job.QUEUED, run_at=timezone.now() + retry_delay(job.attempts),
+                    last_error=error, finished_date=None)
+            logger.warning('Vazifa %s (#%s) %s-urinishda yiqildi, qayta navbatga qo\'yildi',
+                           job.task, job.pk, job.attempts)
+        else:
+            _finish(job, status=Job.FAILED, last_error=error)
+            logger.error('Vazifa %s (#%s) %s urinishdan keyin bajarilmadi', job.task, job.pk, job.attempts)
+        return False
+
+    _finish(job, status=Job.DONE, last_error='')
+    return True
+
+
+def _finish(job, **values):
+    values.setdefault('finished_date', timezone.now())
+    # Faqat hali shu worker'ga tegishli bo'lsa (osilib qolgan deb qaytarilmagan bo'lsa)
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by).update(
+        locked_by='', locked_at=None, **values
+    )
+
+
+def run_pending(queues=('default',), worker_id=None, limit=None):
+    """Vaqti kelgan vazifalarni joriy oqimda navbat bo'shaguncha bajarish; bajarilganlar soni"""
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim(queues, worker_id)
+        if job is None:
+            break
+        execute(job)
+        processed += 1
+    return processed
+
+
+def release_stale(timeout=LOCK_TIMEOUT):
+    """Worker o'lib, osilib qolgan vazifalarni navbatga qaytarish"""
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=timezone.now() - timeout
+    ).update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def purge_finished(retention=DONE_RETENTION):
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, finished_date__lt=timezone.now() - retention
+    ).delete()
+    return deleted
+
+
+class Worker:
+    """Bir nechta oqimda vazifalarni bajaruvchi worker.
+
+    stop() chaqirilganda yangi vazifa olinmaydi, bajarilayotganlari
+    tugashi kutiladi (graceful shutdown).
+    """
+
+    HOUSEKEEPING_INTERVAL = 60
+
+    def __init__(self, queues=('default',), concurrency=1, poll_interval=1.0, burst=False):
+        self.queues = list(queues)
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.worker_id = default_worker_id()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._loop, args=(f'{self.worker_id}:{n}',), name=f'job-worker-{n}')
+            for n in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                self._housekeeping()
+                self._stop.wait(self.HOUSEKEEPING_INTERVAL if not self.burst else self.poll_interval)
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+            connections.close_all()
+
+    def _housekeeping(self):
+        try:
+            released = release_stale()
+            if released:
+                logger.warning('%s ta osilib qolgan vazifa navbatga qaytarildi', released)
+            purge_finished()
+        except DatabaseError:
+            logger.exception('Navbatni tozalashda xatolik')
+
+    def _loop(self, worker_id):
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim(self.queues, worker_id)
+                except DatabaseError:
+                    # Masalan, SQLite "database is locked" - biroz kutib qayta urinish
+                    logger.exception('Vazifani olishda xatolik')
+                    job = None
+                if job is None:
+                    if self.burst:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                execute(job)
+        finally:
+            connections.close_all()
@@ -2,12 +2,15 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from apps.curtains.admin_scale import LargeTableAdminMixin, StaffUserListFilter
 from .models import Order, OrderItem, OrderStatusHistory
+from .transitions import apply_transition
 
 
-class OrderItemInline(admin.TabularInline):
+class OrderItemInline(LargeTableAdminMixin, admin.TabularInline):
     model = OrderItem
     extra = 0
+    large_table_autocomplete_fields = ('curtain',)
     readonly_fields = ['created_date', 'get_total_price']
     fields = ['curtain', 'quantity', 'unit_price', 'custom_width', 'custom_height', 
              'custom_notes', 'get_total_price', 'created_date']
@@ -33,8 +36,10 @@ class OrderStatusHistoryInline(admin.TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     inlines = [OrderItemInline, OrderStatusHistoryInline]
+    large_table_autocomplete_fields = ('user', 'processed_by')
+    large_table_list_filters = {'processed_by': StaffUserListFilter}
     
     list_display = ['order_number', 'customer_name', 'customer_phone', 'get_status_badge', 
                    'get_total_amount_display', 'get_items_count', 'created_date', 'processed_by']
@@ -87,7 +92,8 @@ class OrderAdmin(admin.ModelAdmin):
     get_total_amount_display.short_description = 'Jami summa'
     
     def get_items_count(self, obj):
-        count = obj.get_total_items_count()
+        # Oldindan yuklangan items'dan hisoblanadi (har bir qator uchun alohida so'rovsiz)
+        count = sum(item.quantity for item in obj.items.all())
         return f'{count} ta'
     get_items_count.short_description = 'Mahsulotlar soni'
     
@@ -97,29 +103,29 @@ class OrderAdmin(admin.ModelAdmin):
         ).prefetch_related('items__curtain')
     
     # Bulk actions
+    def _transition(self, request, queryset, new_status, message):
+        updated = apply_transition(queryset, new_status, user=request.user)
+        self.message_user(request, message.format(count=len(updated)))
+    
     def mark_as_confirmed(self, request, queryset):
-        updated = queryset.filter(status='pending').update(status='confirmed')
-        self.message_user(request, f'{updated} ta buyurtma tasdiqlandi.')
+        self._transition(request, queryset, 'confirmed', '{count} ta buyurtma tasdiqlandi.')
     mark_as_confirmed.short_description = 'Tanlangan buyurtmalarni tasdiqlash'
     
     def mark_as_in_progress(self, request, queryset):
-        updated = queryset.filter(status='confirmed').update(status='in_progress')
-        self.message_user(request, f'{updated} ta buyurtma ishga tushirildi.')
+        self._transition(request, queryset, 'in_progress', '{count} ta buyurtma ishga tushirildi.')
     mark_as_in_progress.short_description = 'Tanlangan buyurtmalarni ishga tushirish'
     
     def mark_as_ready(self, request, queryset):
-        updated = queryset.filter(status='in_progress').update(status='ready')
-        self.message_user(request, f'{updated} ta buyurtma tayyor deb belgilandi.')
+        self._transition(request, queryset, 'ready', '{count} ta buyurtma tayyor deb belgilandi.')
     mark_as_ready.short_description = 'Tanlangan buyurtmalarni tayyor deb belgilash'
     
     def mark_as_delivered(self, request, queryset):
-        updated = queryset.filter(status='ready').update(status='delivered')
-        self.message_user(request, f'{updated} ta buyurtma yetkazildi deb belgilandi.')
+        self._transition(request, queryset, 'delivered', '{count} ta buyurtma yetkazildi deb belgilandi.')
     mark_as_delivered.short_description = 'Tanlangan buyurtmalarni yetkazilgan deb belgilash'
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['order', 'curtain', 'quantity', 'unit_price', 'get_total_price', 
                    'get_custom_size', 'created_date']
     
@@ -153,6 +159,8 @@ class OrderItemAdmin(admin.ModelAdmin):
         return 'Standart'
     get_custom_size.short_description = 'O\'lcham'
     
+    large_table_autocomplete_fields = ('order', 'curtain')
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
             'order', 'curtain'
@@ -160,13 +168,15 @@ class OrderItemAdmin(admin.ModelAdmin):
 
 
 @admin.register(OrderStatusHistory)
-class OrderStatusHistoryAdmin(admin.ModelAdmin):
+class OrderStatusHistoryAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['order', 'old_status', 'new_status', 'changed_by', 'created_date']
     
     list_filter = ['old_status', 'new_status', 'created_date', 'changed_by']
     
     search_fields = ['order__order_number', 'order__customer_name', 'comment']
     
+    large_table_list_filters = {'changed_by': StaffUserListFilter}
+    
     readonly_fields = ['created_date']
     
     date_hierarchy = 'created_date'
@@ -0,0 +1,219 @@
+"""Savdo hisobotlari - OrderItem ma'lumotlari ustida NumPy bilan guruhlash.
+
+Ma'lumotlar bazadan bo'laklab (values_list + iterator) ustun massivlariga
+o'qiladi. Barcha kesimlar (kun, kategoriya, mato, rang, eng ko'p sotilganlar,
+holatlar) shu massivlar ustida bincount/unique orqali bir o'tishda hisoblanadi.
+Har bir o'lchov uchun alohida ORM agregatsiyasi bajarilmaydi.
+"""
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db.models.functions import TruncDate
+
+from apps.curtains import caching
+from apps.curtains.models import Category, Color, Curtain
+from .models import Order, OrderItem
+
+CHUNK_SIZE = 5000
+TOP_SELLERS = 10
+
+STATUSES = [value for value, label in Order.STATUS_CHOICES]
+STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+FABRICS = [value for value, label in Curtain.FABRIC_CHOICES]
+FABRIC_INDEX = {fabric: index for index, fabric in enumerate(FABRICS)}
+# Bekor qilingan buyurtmalar tushumga qo'shilmaydi
+CANCELLED = STATUS_INDEX['cancelled']
+
+
+def _chunks(iterable, size=CHUNK_SIZE):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _codes(values, index):
+    """Satr qiymatlarni (holat, mato) butun kodlarga o'tkazish; noma'lumlari -1"""
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    lookup = np.array([index.get(value, -1) for value in uniques], dtype=np.int64)
+    return lookup[inverse]
+
+
+def _group_sum(keys, weights):
+    """keys bo'yicha weights yig'indisi: (noyob kalitlar, yig'indilar)"""
+    if not len(keys):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    return uniques, np.bincount(inverse, weights=weights, minlength=len(uniques))
+
+
+def _ranked(keys, sums, labels, limit=None):
+    order = np.argsort(-sums, kind='stable')
+    if limit is not None:
+        order = order[:limit]
+    return [
+        {'key': int(keys[i]), 'label': labels.get(int(keys[i]), '—'), 'value': int(round(sums[i]))}
+        for i in order
+        if sums[i] > 0
+    ]
+
+
+def load_items(date_from, date_to):
+    """Sana oralig'idagi buyurtma elementlarini ustun massivlariga o'qish"""
+    queryset = (
+        OrderItem.objects.filter(
+            order__created_date__date__gte=date_from,
+            order__created_date__date__lte=date_to,
+        )
+        .annotate(day=TruncDate('order__created_date'))
+        .values_list('order_id', 'day', 'order__status', 'curtain_id', 'quantity', 'unit_price')
+        .order_by()
+    )
+    parts = {name: [] for name in ('order', 'day', 'status', 'curtain', 'quantity', 'price')}
+    for chunk in _chunks(queryset.iterator(chunk_size=CHUNK_SIZE)):
+        order_ids, days, statuses, curtain_ids, quantities, prices = zip(*chunk)
+        parts['order'].append(np.fromiter(order_ids, dtype=np.int64, count=len(chunk)))
+        parts['day'].append(np.array(days, dtype='datetime64[D]'))
+        parts['status'].append(_codes(statuses, STATUS_INDEX))
+        parts['curtain'].append(np.fromiter(curtain_ids, dtype=np.int64, count=len(chunk)))
+        parts['quantity'].append(np.fromiter(quantities, dtype=np.int64, count=len(chunk)))
+        parts['price'].append(np.fromiter(prices, dtype=np.int64, count=len(chunk)))
+
+    empty = {'day': np.empty(0, dtype='datetime64[D]')}
+    return {
+        name: np.concatenate(arrays) if arrays else empty.get(name, np.empty(0, dtype=np.int64))
+        for name, arrays in parts.items()
+    }
+
+
+def load_order_statuses(date_from, date_to):
+    """Oraliqdagi buyurtmalar soni holatlar bo'yicha (elementsiz buyurtmalar ham)"""
+    statuses = (
+        Order.objects.filter(created_date__date__gte=date_from, created_date__date__lte=date_to)
+        .values_list('status', flat=True)
+        .order_by()
+    )
+    counts = np.zeros(len(STATUSES), dtype=np.int64)
+    for chunk in _chunks(statuses.iterator(chunk_size=CHUNK_SIZE)):
+        codes = _codes(chunk, STATUS_INDEX)
+        counts += np.bincount(codes[codes >= 0], minlength=len(STATUSES))
+    return counts
+
+
+def load_catalog():
+    """Parda id -> kategoriya/mato kodi jadvallari va parda-rang juftliklari"""
+    rows = list(Curtain.objects.values_list('id', 'category_id', 'fabric_type').order_by())
+    size = max((row[0] for row in rows), default=0) + 1
+    category_of = np.full(size, -1, dtype=np.int64)
+    fabric_of = np.full(size, -1, dtype=np.int64)
+    if rows:
+        ids, categories, fabrics = zip(*rows)
+        ids = np.array(ids, dtype=np.int64)
+        category_of[ids] = [-1 if category is None else category for category in categories]
+        fabric_of[ids] = _codes(fabrics, FABRIC_INDEX)
+
+    pairs = list(Curtain.colors.through.objects.values_list('curtain_id', 'color_id').order_by())
+    pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+    return category_of, fabric_of, pairs
+
+
+def build_report(date_from, date_to):
+    items = load_items(date_from, date_to)
+    order_counts = load_order_statuses(date_from, date_to)
+    category_of, fabric_of, color_pairs = load_catalog()
+
+    paid = items['status'] != CANCELLED
+    revenue = (items['quantity'] * items['price']).astype(np.float64)
+    paid_revenue = np.where(paid, revenue, 0)
+    # Katalogdan o'chirilgan pardalar uchun indekslar chegaradan chiqmasligi kerak
+    known = items['curtain'] < len(category_of)
+    curtains = np.where(known, items['curtain'], 0)
+
+    # Kunlar bo'yicha (oraliqdagi har bir kun, bo'sh kunlar 0)
+    start = np.datetime64(date_from, 'D')
+    days = (date_to - date_from).days + 1
+    day_index = (items['day'] - start).astype(np.int64)
+    in_range = (day_index >= 0) & (day_index < days)
+    by_day = np.bincount(day_index[in_range], weights=paid_revenue[in_range], minlength=days)
+
+    # Kategoriya va mato
+    categories = np.where(known, category_of[curtains], -1)
+    keys, sums = _group_sum(categories[categories >= 0], paid_revenue[categories >= 0])
+    category_labels = dict(Category.objects.filter(pk__in=keys.tolist()).values_list('id', 'title'))
+    by_category = _ranked(keys, sums, category_labels)
+
+    fabrics = np.where(known, fabric_of[curtains], -1)
+    keys, sums = _group_sum(fabrics[fabrics >= 0], paid_revenue[fabrics >= 0])
+    fabric_labels = {index: str(label) for index, (value, label) in enumerate(Curtain.FABRIC_CHOICES)}
+    by_fabric = _ranked(keys, sums, fabric_labels)
+
+    # Rang: parda tushumi uning har bir rangiga to'liq yoziladi
+    curtain_keys, curtain_revenue = _group_sum(items['curtain'], paid_revenue)
+    by_color = []
+    if len(curtain_keys) and len(color_pairs):
+        positions = np.searchsorted(curtain_keys, color_pairs[:, 0])
+        positions = np.minimum(positions, len(curtain_keys) - 1)
+        sold = curtain_keys[positions] == color_pairs[:, 0]
+        keys, sums = _group_sum(color_pairs[sold, 1], curtain_revenue[positions[sold]])
+        color_labels = dict(Color.objects.filter(pk__in=keys.tolist()).values_list('id', 'title'))
+        by_color = _ranked(keys, sums, color_labels)
+
+    # Eng ko'p sotilganlar (dona bo'yicha)
+    keys, quantities = _group_sum(items['curtain'][paid], items['quantity'][paid].astype(np.float64))
+    top = _ranked(keys, quantities, {}, limit=TOP_SELLERS)
+    titles = dict(Curtain.objects.filter(pk__in=[row['key'] for row in top]).values_list('id', 'title'))
+    revenue_of = dict(zip(curtain_keys.tolist(), curtain_revenue.tolist()))
+    for row in top:
+        row['label'] = titles.get(row['key'], '—')
+        row['revenue'] = int(round(revenue_of.get(row['key'], 0)))
+
+    # Holatlar bo'yicha konversiya
+    total_orders = int(order_counts.sum())
+    status_revenue = np.bincount(
+        items['status'][items['status'] >= 0], weights=revenue[items['status'] >= 0], minlength=len(STATUSES)
+    )
+    status_labels = dict(Order.STATUS_CHOICES)
+    conversion = [
+        {
+            'status': status,
+            'label': str(status_labels[status]),
+            'orders': int(order_counts[index]),
+            'share': float(order_counts[index] / total_orders * 100) if total_orders else 0.0,
+            'revenue': int(round(status_revenue[index])),
+        }
+        for index, status in enumerate(STATUSES)
+    ]
+
+    paid_orders = len(np.unique(items['order'][paid]))
+    total_revenue = int(round(paid_revenue.sum()))
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'total_revenue': total_revenue,
+        'total_orders': total_orders,
+        'paid_orders': paid_orders,
+        'items_sold': int(items['quantity'][paid].sum()),
+        'average_order': total_revenue // paid_orders if paid_orders else 0,
+        'delivered_rate': float(
+            order_counts[STATUS_INDEX['delivered']] / total_orders * 100
+        ) if total_orders else 0.0,
+        'by_day': [
+            {'day': date_from + timedelta(days=offset), 'value': int(round(value))}
+            for offset, value in enumerate(by_day)
+        ],
+        'max_day': int(round(by_day.max())) if days else 0,
+        'by_category': by_category,
+        'by_fabric': by_fabric,
+        'by_color': by_color,
+        'top_sellers': top,
+        'conversion': conversion,
+    }
+
+
+def sales_report(date_from, date_to):
+    """Sana oralig'i bo'yicha keshlangan hisobot"""
+    key = f'orders:sales_report:{date_from.isoformat()}:{date_to.isoformat()}'
+    return caching.get_or_set(
+        key, lambda: build_report(date_from, date_to), getattr(settings, 'SALES_REPORT_CACHE_TIMEOUT', 600)
+    )
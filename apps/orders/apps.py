@@ -6,3 +6,6 @@ class OrdersConfig(AppConfig):
     name = 'apps.orders'
     label = 'orders'
     verbose_name = 'Buyurtmalar'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,115 @@
+"""Tashqi tizimlar (ERP/buxgalteriya) uchun buyurtmalar o'zgarishlar lentasi.
+
+Lenta (updated_date, id) juftligi bo'yicha tartiblangan va shu ikki ustunli
+indeks orqali o'qiladi. Mijoz har bir javobdagi next_cursor'ni saqlab,
+keyingi so'rovda yuboradi. Shunday qilib har safar faqat oxirgi
+sinxronizatsiyadan keyin o'zgargan buyurtmalar qaytadi.
+
+Holat o'zgarishlari (transitions) updated_date'ni ham yangilaydi, shuning
+uchun holat tarixi o'zgargan buyurtma bilan birga keladi.
+"""
+import base64
+import binascii
+import hmac
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .models import Order, OrderItem, OrderStatusHistory
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+# Commit qilinmagan tranzaksiyalar updated_date'ni o'tmishdagi vaqt bilan yozishi
+# mumkin. Oxirgi soniyalar keyingi so'rovga qoldiriladi, aks holda ular o'tkazib yuboriladi.
+# Lenta faqat quyidagilar bajarilsa to'liq:
+# - updated_date yozgan tranzaksiya shu vaqt ichida commit qilinadi (ommaviy holat
+#   o'zgarishi har bir bo'lakni alohida commit qiladi - transitions.apply_transition);
+# - OrderItem save()/delete() buyurtmaning updated_date'ini yangilaydi (signals). Mahsulotlarni
+#   bulk_create/update() bilan o'zgartiradigan kod buyurtmani o'zi yangilashi kerak
+SETTLE_SECONDS = 5
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def token_is_valid(request):
+    """Authorization: Bearer <token> sarlavhasini ORDER_FEED_TOKENS bilan solishtirish"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+    return any(
+        hmac.compare_digest(token.encode(), allowed.encode())
+        for allowed in getattr(settings, 'ORDER_FEED_TOKENS', [])
+        if allowed
+    )
+
+
+def encode_cursor(updated_date, pk):
+    raw = f'{updated_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, pk = raw.split('|')
+        updated_date = datetime.fromisoformat(stamp)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if timezone.is_naive(updated_date):
+        raise InvalidCursor(cursor)
+    return updated_date, pk
+
+
+def serialize_order(order):
+    return {
+        'id': order.pk,
+        'number': order.order_number,
+        'status': order.status,
+        'user_id': order.user_id,
+        'customer': [order.customer_name, order.customer_phone, order.customer_address],
+        'notes': order.notes,
+        'created': order.created_date.isoformat(),
+        'updated': order.updated_date.isoformat(),
+        'confirmed': order.confirmed_date.isoformat() if order.confirmed_date else None,
+        'processed_by_id': order.processed_by_id,
+        # [parda id, miqdor, birlik narxi, maxsus eni, maxsus balandligi]
+        'items': [
+            [item.curtain_id, item.quantity, item.unit_price, item.custom_width, item.custom_height]
+            for item in order.items.all()
+        ],
+        # [oldingi holat, yangi holat, vaqt, kim o'zgartirgan]
+        'history': [
+            [entry.old_status, entry.new_status, entry.created_date.isoformat(), entry.changed_by_id]
+            for entry in order.status_history.all()
+        ],
+    }
+
+
+def changes_since(cursor=None, limit=DEFAULT_LIMIT):
+    """Kursordan keyingi o'zgargan buyurtmalar: (buyurtmalar, keyingi kursor, yana bormi)"""
+    limit = max(1, min(limit, MAX_LIMIT))
+    orders = Order.objects.filter(
+        updated_date__lt=timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    )
+    if cursor:
+        updated_date, pk = decode_cursor(cursor)
+        orders = orders.filter(
+            Q(updated_date__gt=updated_date) | Q(updated_date=updated_date, pk__gt=pk)
+        )
+
+    orders = list(
+        orders.order_by('updated_date', 'pk').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.order_by('pk')),
+            Prefetch('status_history', queryset=OrderStatusHistory.objects.order_by('created_date', 'pk')),
+        )[:limit + 1]
+    )
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    if orders:
+        cursor = encode_cursor(orders[-1].updated_date, orders[-1].pk)
+    return [serialize_order(order) for order in orders], cursor, has_more
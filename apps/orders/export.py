@@ -0,0 +1,187 @@
+"""Buyurtmalarni CSV/XLSX ko'rinishida oqim (streaming) bilan eksport qilish.
+
+Buyurtmalar .iterator(chunk_size=...) bilan bo'laklab o'qiladi. Har bir bo'lak
+uchun elementlar va pardalar bitta prefetch so'rovida olinadi. Qatorlar
+tayyor bo'lishi bilan javobga yoziladi, shuning uchun xotira sarfi eksport
+hajmiga bog'liq emas.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import OrderItem
+
+CHUNK_SIZE = 500
+
+COLUMNS = [
+    'Buyurtma raqami', 'Holati', 'Yaratilgan vaqt', 'Mijoz ismi', 'Telefon raqami', 'Manzil',
+    'Parda', 'Miqdori', 'Birlik narxi', 'Jami', 'Maxsus eni (sm)', 'Maxsus balandligi (sm)',
+]
+# XLSX'da son sifatida yoziladigan ustunlar
+NUMERIC_COLUMNS = {7, 8, 9, 10, 11}
+
+# XML 1.0 da ruxsat etilmagan boshqaruv belgilari
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Jadval dasturi formula deb qabul qiladigan boshlang'ich belgilar (CSV/formula injection)
+_FORMULA_START = ('=', '+', '-', '@', '\t', '\r')
+# Telefon raqami kabi faqat raqamlardan iborat qiymat formula emas
+_PLAIN_NUMBER = re.compile(r'^\+?[\d\s()-]+$')
+
+
+def safe_text(value):
+    """Mijoz kiritgan matn formula sifatida bajarilmasligi uchun oldiga ' qo'yiladi"""
+    if value and value.startswith(_FORMULA_START) and not _PLAIN_NUMBER.match(value):
+        return "'" + value
+    return value
+
+
+def order_rows(orders):
+    """Har bir buyurtma elementi uchun bitta qator (elementsiz buyurtma - bitta qator)"""
+    items = OrderItem.objects.select_related('curtain').only(
+        'order_id', 'quantity', 'unit_price', 'custom_width', 'custom_height', 'curtain__title',
+    ).order_by('pk')
+    orders = orders.select_related(None).prefetch_related(None).prefetch_related(
+        Prefetch('items', queryset=items)
+    ).only(
+        'order_number', 'status', 'created_date', 'customer_name', 'customer_phone', 'customer_address',
+    )
+    status_labels = dict(orders.model.STATUS_CHOICES)
+
+    for order in orders.iterator(chunk_size=CHUNK_SIZE):
+        head = [
+            order.order_number,
+            str(status_labels.get(order.status, order.status)),
+            timezone.localtime(order.created_date).strftime('%Y-%m-%d %H:%M'),
+            safe_text(order.customer_name),
+            safe_text(order.customer_phone),
+            safe_text(order.customer_address),
+        ]
+        items = order.items.all()
+        if not items:
+            yield head + [''] * (len(COLUMNS) - len(head))
+        for item in items:
+            yield head + [
+                safe_text(item.curtain.title),
+                item.quantity,
+                item.unit_price,
+                item.quantity * item.unit_price,
+                item.custom_width or '',
+                item.custom_height or '',
+            ]
+
+
+class _Echo:
+    """csv.writer yozgan satrni saqlamasdan qaytaradi"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    # Excel UTF-8 ni to'g'ri ochishi uchun BOM
+    yield '\ufeff' + writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _ZipBuffer:
+    """zipfile yozayotgan baytlarni yig'ib, oqimga berish uchun (seek qilinmaydi)"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Buyurtmalar" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values, numeric=frozenset()):
+    cells = []
+    for index, value in enumerate(values):
+        if value == '' or value is None:
+            cells.append('<c/>')
+        elif index in numeric:
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = escape(_ILLEGAL_XML.sub('', str(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+def stream_xlsx(rows, flush_rows=200):
+    """Minimal XLSX (inline satrlar) - zip oqim tarzida, butun fayl xotirada yig'ilmaydi"""
+    buffer = _ZipBuffer()
+    archive = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+    for name, content in XLSX_PARTS.items():
+        archive.writestr(name, content)
+    yield buffer.drain()
+
+    with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+        sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        sheet.write(_xlsx_row(COLUMNS).encode())
+        for count, row in enumerate(rows, 1):
+            sheet.write(_xlsx_row(row, NUMERIC_COLUMNS).encode())
+            if count % flush_rows == 0:
+                yield buffer.drain()
+        sheet.write(b'</sheetData></worksheet>')
+    archive.close()
+    yield buffer.drain()
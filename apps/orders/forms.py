@@ -1,3 +1,5 @@
+import uuid
+
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from .models import Order, OrderItem
@@ -19,8 +21,15 @@ def validate_uzbek_phone(phone):
     return f"+{cleaned[:3]} {cleaned[3:5]} {cleaned[5:8]} {cleaned[8:10]} {cleaned[10:12]}"
 
 
+def idempotency_key_field():
+    """Yashirin bir martalik kalit: har bir ochilgan forma uchun yangi UUID (idempotency.py)"""
+    return forms.UUIDField(required=False, initial=uuid.uuid4, widget=forms.HiddenInput())
+
+
 class OrderForm(forms.ModelForm):
     """Buyurtma berish formasi"""
+
+    idempotency_key = idempotency_key_field()
     
     customer_name = forms.CharField(
         max_length=100,
@@ -71,6 +80,7 @@ class QuickOrderForm(forms.Form):
     """Tez buyurtma berish formasi - bitta mahsulot uchun"""
     
     curtain_id = forms.IntegerField(widget=forms.HiddenInput())
+    idempotency_key = idempotency_key_field()
     quantity = forms.IntegerField(
         initial=1,
         min_value=1,
@@ -209,4 +219,36 @@ class OrderSearchForm(forms.Form):
             'type': 'date'
         }),
         label='Sanagacha'
-    )
\ No newline at end of file
+    )
+
+class SalesReportForm(forms.Form):
+    """Savdo hisoboti uchun sana oralig'i"""
+
+    MAX_DAYS = 731
+
+    date_from = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Sanadan'
+    )
+
+    date_to = forms.DateField(
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        }),
+        label='Sanagacha'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to:
+            if date_from > date_to:
+                raise forms.ValidationError('Boshlanish sanasi tugash sanasidan keyin bo\'lishi mumkin emas.')
+            if (date_to - date_from).days >= self.MAX_DAYS:
+                raise forms.ValidationError(f'Oraliq {self.MAX_DAYS} kundan oshmasligi kerak.')
+        return cleaned_data
@@ -0,0 +1,39 @@
+"""Buyurtma formasini qayta yuborishdan himoya (idempotentlik kaliti).
+
+Forma har safar ochilganda yashirin maydonda yangi UUID beriladi va u
+buyurtma bilan birga saqlanadi (Order.idempotency_key, unique). Ikki marta
+bosilgan yoki sekin tarmoqda qayta yuborilgan forma xuddi shu kalit bilan
+keladi: yangi buyurtma, elementlar va Telegram xabari yaratilmaydi, mavjud
+buyurtma qaytariladi. Ikki so'rov bir vaqtda kelsa, ikkinchisi unique
+cheklovga urilib, birinchisining buyurtmasini oladi.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+
+from .models import Order
+
+
+def existing_order(key):
+    """Kalit bilan yaratilgan buyurtma yoki None (kalit noto'g'ri bo'lsa ham None)"""
+    try:
+        key = uuid.UUID(str(key))
+    except (TypeError, ValueError):
+        return None
+    return Order.objects.filter(idempotency_key=key).first()
+
+
+def place_order(key, create):
+    """create(key) buyurtmani elementlari bilan yaratadi. (buyurtma, yaratildimi) qaytaradi"""
+    if key:
+        order = existing_order(key)
+        if order is not None:
+            return order, False
+    try:
+        with transaction.atomic():
+            return create(key), True
+    except IntegrityError:
+        order = existing_order(key) if key else None
+        if order is None:
+            raise
+        return order, False
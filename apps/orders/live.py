@@ -0,0 +1,161 @@
+"""Xodimlar paneli uchun jonli buyurtma hodisalari.
+
+Buyurtma yaratilganda yoki holati o'zgarganda hodisa commit'dan keyin
+orders_event jadvaliga yoziladi. Jadval barcha worker va jarayonlar uchun
+umumiy kanal: hodisa id'si hamma joyda bir xil, shuning uchun boshqa
+jarayonga qayta ulangan mijoz Last-Event-ID bilan davom etadi.
+
+Har bir jarayondagi OrderBroadcaster jadvalni ORDER_EVENTS_POLL_INTERVAL
+oralig'ida bitta so'rov bilan o'qiydi va oxirgi hodisalarni xotirada saqlaydi.
+Ochiq tablar soni bazaga qo'shimcha so'rov qo'shmaydi.
+
+Oqim va long-polling ASGI ostida ishlaydi (Procfile'dagi events jarayoni,
+proksi /orders/api/events/ yo'llarini unga yo'naltiradi). WSGI worker'lari
+ulanishni ushlab turmaydi: SSE 204 qaytaradi, polling darhol javob beradi.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OrderEvent
+
+# Long-polling va qayta ulanish uchun saqlanadigan oxirgi hodisalar soni
+HISTORY_SIZE = 500
+# Kichikroq id'li hodisa hali commit qilinmagan bo'lishi mumkin: oradagi id
+# bo'sh qolsa, keyingi hodisalar shuncha soniya kutiladi (keyin id bekor
+# qilingan tranzaksiyaniki deb hisoblanadi)
+SETTLE_SECONDS = 5
+# Har shuncha hodisada bir marta eski yozuvlar o'chiriladi
+PRUNE_EVERY = 1000
+RETENTION = timedelta(days=1)
+
+
+class OrderBroadcaster:
+    """Umumiy hodisalar jadvalini o'qib, jarayon ichidagi obunachilarga tarqatish"""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._events = deque(maxlen=history_size)
+        # None - jadval hali o'qilmagan
+        self._last_id = None
+        # Bundan keyingi hodisalar xotirada to'liq
+        self._floor = 0
+        self._refreshed = None
+
+    @property
+    def last_id(self):
+        return self._last_id or 0
+
+    def refresh(self, force=False):
+        """Yangi hodisalarni o'qish: jarayonda oraliq ichida ko'pi bilan bitta so'rov"""
+        if not self._refresh_lock.acquire(blocking=False):
+            # Boshqa oqim hozir o'qiyapti
+            return
+        try:
+            now = time.monotonic()
+            interval = settings.ORDER_EVENTS_POLL_INTERVAL
+            if not force and self._refreshed is not None and now - self._refreshed < interval:
+                return
+            self._refreshed = now
+            self._read()
+        finally:
+            self._refresh_lock.release()
+
+    def _read(self):
+        if self._last_id is None:
+            rows = list(OrderEvent.objects.order_by('-pk')[:self._events.maxlen])[::-1]
+            if not rows:
+                # Keyingi id noma'lum - birinchi hodisa paydo bo'lguncha kutiladi
+                return
+            self._reset(rows[0].pk - 1)
+        else:
+            # Oxirgi o'qilgan hodisa ham olinadi: u yo'q bo'lsa jadval tozalangan yoki tiklangan
+            rows = list(OrderEvent.objects.filter(pk__gte=self._last_id).order_by('pk')[:self._events.maxlen])
+            if self._last_id:
+                if not rows or rows[0].pk != self._last_id:
+                    self._last_id = None
+                    return self._read()
+                rows = rows[1:]
+
+        settled = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+        with self._lock:
+            for row in rows:
+                if row.pk != self._last_id + 1 and row.created_date > settled:
+                    break
+                if len(self._events) == self._events.maxlen:
+                    self._floor = self._events[0]['id']
+                self._events.append({'id': row.pk, 'type': row.event_type, 'data': row.data})
+                self._last_id = row.pk
+
+    def _reset(self, last_id):
+        with self._lock:
+            self._events.clear()
+            self._last_id = self._floor = last_id
+
+    def since(self, last_id):
+        """last_id'dan keyingi hodisalar va oradagi hodisalar yo'qolganmi (missed)"""
+        with self._lock:
+            events = [event for event in self._events if event['id'] > last_id]
+            # Bufer to'lib eski hodisalar o'chgan yoki id bu kanalga tegishli emas
+            missed = last_id < self._floor or last_id > self.last_id
+        return events, missed
+
+    async def await_events(self, last_id, timeout):
+        """last_id'dan keyingi hodisani timeout soniyagacha kutish (thread band qilinmaydi)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Mijoz boshqa jarayondan kelgan va bu jarayon hali ortda bo'lishi mumkin
+        await sync_to_async(self.refresh)(force=last_id > self.last_id)
+        while True:
+            events, missed = self.since(last_id)
+            remaining = deadline - loop.time()
+            if events or missed or remaining <= 0:
+                return events, missed
+            await asyncio.sleep(min(settings.ORDER_EVENTS_POLL_INTERVAL, remaining))
+            await sync_to_async(self.refresh)()
+
+
+broadcaster = OrderBroadcaster()
+
+
+def publish_order_created(order):
+    publish_on_commit('created', {
+        'order_id': order.pk,
+        'order_number': order.order_number,
+        'customer_name': order.customer_name,
+        'status': order.status,
+    })
+
+
+def publish_status_changed(new_status, old_statuses):
+    """old_statuses - {buyurtma id: oldingi holat}; ommaviy o'zgarish bitta hodisa bo'ladi"""
+    if old_statuses:
+        publish_on_commit('status', {
+            'status': new_status,
+            'orders': [
+                {'order_id': pk, 'old_status': old_status} for pk, old_status in old_statuses.items()
+            ],
+        })
+
+
+def publish(event_type, data):
+    event = OrderEvent.objects.create(event_type=event_type, data=data)
+    if event.pk % PRUNE_EVERY == 0:
+        OrderEvent.objects.filter(created_date__lt=timezone.now() - RETENTION).delete()
+    return event
+
+
+def publish_on_commit(event_type, data):
+    """Tranzaksiya muvaffaqiyatli yakunlangandan keyin hodisani yozish.
+
+    Qisqa alohida INSERT id'lar commit tartibidan deyarli chetlashmasligini ta'minlaydi.
+    """
+    transaction.on_commit(lambda: publish(event_type, data))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=20, verbose_name='Turi')),
+                ('data', models.JSONField(verbose_name="Ma'lumot")),
+                ('created_date', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Yaratilgan vaqt')),
+            ],
+            options={
+                'verbose_name': 'Buyurtma hodisasi',
+                'verbose_name_plural': 'Buyurtma hodisalari',
+                'db_table': 'orders_event',
+            },
+        ),
+    ]
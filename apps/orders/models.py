@@ -44,6 +44,10 @@ class Order(models.Model):
     processed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
                                    related_name='processed_orders', 
                                    verbose_name=_('Kim tomonidan qaralgan'))
+
+    # Formaning bir martalik kaliti: qayta yuborilgan forma ikkinchi buyurtma yaratmaydi
+    idempotency_key = models.UUIDField(_('Idempotentlik kaliti'), null=True, blank=True, unique=True,
+                                       editable=False)
     
     class Meta:
         verbose_name = _('Buyurtma')
@@ -54,11 +58,20 @@ class Order(models.Model):
             models.Index(fields=['status', 'created_date']),
             models.Index(fields=['customer_phone']),
             models.Index(fields=['order_number']),
+            # O'zgarishlar lentasi (changefeed) kursori
+            models.Index(fields=['updated_date', 'id'], name='orders_updated_id_idx'),
         ]
     
     def __str__(self):
         return f"#{self.order_number} - {self.customer_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Jonli hodisalar uchun bazadagi holatni eslab qolish
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.order_number:
             from datetime import datetime
@@ -166,3 +179,19 @@ class OrderStatusHistory(models.Model):
     
     def __str__(self):
         return f"#{self.order.order_number}: {self.old_status} → {self.new_status}"
+
+
+class OrderEvent(models.Model):
+    """Xodimlar paneli jonli lentasi hodisasi (barcha jarayonlar uchun umumiy kanal)"""
+
+    event_type = models.CharField(_('Turi'), max_length=20)
+    data = models.JSONField(_('Ma\'lumot'))
+    created_date = models.DateTimeField(_('Yaratilgan vaqt'), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('Buyurtma hodisasi')
+        verbose_name_plural = _('Buyurtma hodisalari')
+        db_table = 'orders_event'
+
+    def __str__(self):
+        return f"{self.pk}: {self.event_type}"
@@ -0,0 +1,25 @@
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .live import publish_order_created, publish_status_changed
+from .models import Order, OrderItem
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Yangi buyurtma va save() orqali holat o'zgarishini jonli lentaga yuborish"""
+    if created:
+        publish_order_created(instance)
+    elif update_fields is None or 'status' in update_fields:
+        old_status = getattr(instance, '_loaded_status', None)
+        if old_status is not None and old_status != instance.status:
+            publish_status_changed(instance.status, {instance.pk: old_status})
+    instance._loaded_status = instance.status
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    """Mahsulot o'zgarishi buyurtmaning updated_date'ini yangilaydi - o'zgarishlar lentasi uni ko'radi"""
+    Order.objects.filter(pk=instance.order_id).update(updated_date=Now())
@@ -0,0 +1,11 @@
+from apps.jobs.registry import task
+from .models import Order
+from .telegram import send_order_notification
+
+
+@task(queue='notifications', priority=10, max_attempts=8)
+def notify_new_order(order_id):
+    """Yangi buyurtma haqida Telegram xabari (xatolikda worker qayta urinadi)"""
+    order = Order.objects.filter(pk=order_id).first()
+    if order is not None:
+        send_order_notification(order, fail_silently=False)
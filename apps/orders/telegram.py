@@ -5,8 +5,11 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 
-def send_order_notification(order):
-    """Yangi buyurtma haqida Telegram ga xabar yuborish"""
+def send_order_notification(order, fail_silently=True):
+    """Yangi buyurtma haqida Telegram ga xabar yuborish.
+
+    fail_silently=False bo'lsa tarmoq xatosi qayta ko'tariladi (fon vazifasi qayta urinishi uchun).
+    """
     token = getattr(settings, 'TELEGRAM_BOT_TOKEN', '')
     chat_id = getattr(settings, 'TELEGRAM_CHAT_ID', '')
 
@@ -38,3 +41,5 @@ def send_order_notification(order):
         response.raise_for_status()
     except requests.RequestException as e:
         logger.error("Telegram xabar yuborishda xatolik: %s", e)
+        if not fail_silently:
+            raise
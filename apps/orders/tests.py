@@ -1,3 +1,449 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .live import OrderBroadcaster, publish
+from .models import Order, OrderEvent, OrderItem, OrderStatusHistory
+from .transitions import apply_transition, change_status
+
+User = get_user_model()
+
+
+def create_order(**kwargs):
+    defaults = {
+        'customer_name': 'Aziz Karimov',
+        'customer_phone': '+998 90 123 45 67',
+        'customer_address': 'Navoiy sh.',
+    }
+    defaults.update(kwargs)
+    return Order.objects.create(**defaults)
+
+
+class StatusTransitionTests(TestCase):
+    """Buyurtmalar holatini ommaviy o'zgartirish"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        self.pending = create_order()
+        self.confirmed = create_order(status='confirmed')
+        self.delivered = create_order(status='delivered')
+
+    def test_only_allowed_orders_change(self):
+        updated = apply_transition(Order.objects.all(), 'confirmed', user=self.staff, comment='OK')
+
+        self.assertEqual(updated, [self.pending.pk])
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, 'confirmed')
+        self.assertEqual(self.pending.processed_by, self.staff)
+        self.assertIsNotNone(self.pending.confirmed_date)
+
+        history = OrderStatusHistory.objects.get()
+        self.assertEqual((history.order_id, history.old_status, history.new_status),
+                         (self.pending.pk, 'pending', 'confirmed'))
+
+    def test_cancel_from_several_statuses(self):
+        updated = apply_transition(Order.objects.all(), 'cancelled', user=self.staff)
+
+        self.assertCountEqual(updated, [self.pending.pk, self.confirmed.pk])
+        self.assertCountEqual(
+            OrderStatusHistory.objects.values_list('old_status', flat=True), ['pending', 'confirmed']
+        )
+
+    def test_batches_commit_separately(self):
+        # Har bir bo'lak o'z tranzaksiyasida: keyingi bo'lakdagi xato oldingisini bekor qilmaydi
+        second = create_order()
+        real_bulk_create = OrderStatusHistory.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            calls.append(objs)
+            if len(calls) == 2:
+                raise RuntimeError('ikkinchi bo\'lak')
+            return real_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch('apps.orders.transitions.BATCH_SIZE', 1), \
+                mock.patch.object(OrderStatusHistory.objects, 'bulk_create', failing_bulk_create), \
+                self.captureOnCommitCallbacks() as callbacks, self.assertRaises(RuntimeError):
+            apply_transition(Order.objects.all(), 'confirmed', user=self.staff)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Order.objects.get(pk=self.pending.pk).status, 'confirmed')
+        self.assertEqual(Order.objects.get(pk=second.pk).status, 'pending')
+
+    def test_bulk_endpoint(self):
+        url = reverse('orders:bulk_update_status')
+        body = {'order_ids': [self.confirmed.pk, self.delivered.pk], 'status': 'in_progress'}
+
+        self.client.force_login(User.objects.create_user('client', password='pass12345'))
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.staff)
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        data = response.json()
+        self.assertEqual(data['updated'], [self.confirmed.pk])
+        self.assertEqual(data['skipped'], [self.delivered.pk])
+
+        for order_ids in (str(self.pending.pk), [str(self.pending.pk)], [1.5], [True], {'1': 1}):
+            with self.subTest(order_ids=order_ids):
+                response = self.client.post(
+                    url, json.dumps({'order_ids': order_ids, 'status': 'confirmed'}), content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.get(pk=self.pending.pk).status, 'pending')
+
+
+class OptimisticStatusUpdateTests(TestCase):
+    """Bitta buyurtma holati WHERE status=? sharti bilan o'zgartiriladi"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        self.order = create_order(notes='Eski izoh')
+        self.client.force_login(self.staff)
+
+    def test_stale_status_gets_conflict(self):
+        url = reverse('orders:update_status', args=[self.order.pk])
+        response = self.client.post(url, {'status': 'confirmed', 'expected_status': 'pending'})
+        self.assertTrue(response.json()['success'])
+
+        # Ikkinchi xodim hali "kutilmoqda" holatini ko'rmoqda
+        response = self.client.post(url, {'status': 'cancelled', 'expected_status': 'pending'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'confirmed')
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'confirmed')
+        self.assertEqual(OrderStatusHistory.objects.count(), 1)
+
+    def test_only_status_fields_are_written(self):
+        # Boshqa so'rov izohni o'zgartirgan - holat yangilanishi uni qayta yozmasligi kerak
+        Order.objects.filter(pk=self.order.pk).update(notes='Yangi izoh')
+        response = self.client.post(
+            reverse('orders:cancel_order', args=[self.order.order_number]),
+            {'expected_status': 'pending'},
+        )
+        self.assertEqual(response.status_code, 302)
+
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.notes), ('cancelled', 'Yangi izoh'))
+
+
+    def test_forbidden_transition_is_rejected(self):
+        url = reverse('orders:update_status', args=[self.order.pk])
+        Order.objects.filter(pk=self.order.pk).update(status='delivered')
+        response = self.client.post(url, {'status': 'pending'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'delivered')
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_customer_cancel_keeps_processed_by(self):
+        customer = User.objects.create_user('client', password='pass12345')
+        order = create_order(user=customer, processed_by=self.staff)
+        self.client.force_login(customer)
+        self.client.post(reverse('orders:cancel_order', args=[order.order_number]))
+
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.processed_by), ('cancelled', self.staff))
+        self.assertEqual(OrderStatusHistory.objects.get().changed_by, customer)
+
+
+@override_settings(ORDER_EVENTS_POLL_INTERVAL=0)
+class LiveOrderFeedTests(TestCase):
+    """Buyurtma hodisalari umumiy jadval orqali SSE/polling'ga yetib borishi"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user('staff', password='pass12345', is_staff=True)
+        self.client.force_login(self.staff)
+        # Har bir test o'z jarayonidagidek yangi broadcaster bilan boshlanadi
+        patcher = mock.patch('apps.orders.views.broadcaster', OrderBroadcaster())
+        self.broadcaster = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.start = self.broadcaster.last_id
+
+    def poll(self, after):
+        return self.client.get(reverse('orders:order_events_poll'), {'after': after}).json()
+
+    def test_created_and_status_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = create_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_transition(Order.objects.filter(pk=order.pk), 'confirmed', user=self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.get(pk=order.pk)
+            order.status = 'cancelled'
+            order.save()
+
+        data = self.poll(self.start)
+        self.assertEqual([event['type'] for event in data['events']], ['created', 'status', 'status'])
+        self.assertEqual(data['events'][1]['data'], {
+            'status': 'confirmed', 'orders': [{'order_id': order.pk, 'old_status': 'pending'}],
+        })
+        self.assertEqual(data['events'][2]['data']['orders'][0]['old_status'], 'confirmed')
+        self.assertEqual(data['last_id'], self.broadcaster.last_id)
+        # WSGI worker'i kutib turmaydi
+        self.assertFalse(data['held'])
+
+    def test_processes_share_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_order()
+        first = self.poll(self.start)['last_id']
+
+        # Boshqa jarayon: hodisa faqat jadval orqali ko'rinadi
+        other = OrderBroadcaster()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_order()
+        other.refresh()
+        events, missed = other.since(first)
+        self.assertFalse(missed)
+        self.assertEqual([event['type'] for event in events], ['created'])
+        self.assertEqual(self.poll(first)['events'], events)
+
+    def test_gap_waits_for_commit(self):
+        first = publish('created', {})
+        # first.pk + 1 hali commit qilinmagan tranzaksiyaga tegishli bo'lishi mumkin
+        late = OrderEvent.objects.create(pk=first.pk + 2, event_type='created', data={})
+        self.broadcaster.refresh()
+        self.assertEqual(self.broadcaster.last_id, first.pk)
+
+        OrderEvent.objects.filter(pk=late.pk).update(created_date=timezone.now() - timedelta(seconds=10))
+        self.broadcaster.refresh()
+        self.assertEqual(self.broadcaster.last_id, late.pk)
+
+    async def test_asgi_poll_waits_for_event(self):
+        await self.async_client.aforce_login(self.staff)
+        first = await sync_to_async(publish)('created', {})
+        response = await self.async_client.get(reverse('orders:order_events_poll'), {'after': first.pk - 1})
+        data = response.json()
+        self.assertTrue(data['held'])
+        self.assertEqual([event['id'] for event in data['events']], [first.pk])
+
+    def test_unknown_cursor_asks_for_reset(self):
+        publish('created', {})
+        self.assertTrue(self.poll(self.broadcaster.last_id + 100)['reset'])
+
+    def test_sse_falls_back_under_wsgi(self):
+        response = self.client.get(reverse('orders:order_events'))
+        self.assertEqual(response.status_code, 204)
+
+        self.client.force_login(User.objects.create_user('client', password='pass12345'))
+        self.assertEqual(self.client.get(reverse('orders:order_events')).status_code, 403)
+
+
+class SalesReportTests(TestCase):
+    """NumPy hisoboti ORM agregatsiyalari bilan bir xil natija berishi"""
+
+    def setUp(self):
+        from apps.curtains.models import Category, Color, Curtain
+
+        self.category = Category.objects.create(title='Klassik')
+        self.white = Color.objects.create(title='Oq')
+        self.silk = Curtain.objects.create(title='Ipak', price=200000, category=self.category, fabric_type='silk')
+        self.cotton = Curtain.objects.create(title='Paxta', price=100000, fabric_type='cotton')
+        self.silk.colors.add(self.white)
+
+        paid = create_order(status='delivered')
+        OrderItem.objects.create(order=paid, curtain=self.silk, quantity=2, unit_price=200000)
+        OrderItem.objects.create(order=paid, curtain=self.cotton, quantity=1, unit_price=100000)
+        cancelled = create_order(status='cancelled')
+        OrderItem.objects.create(order=cancelled, curtain=self.silk, quantity=5, unit_price=200000)
+        create_order()
+
+    def test_report_totals(self):
+        from .analytics import build_report
+
+        today = timezone.localdate()
+        report = build_report(today - timedelta(days=6), today)
+
+        self.assertEqual(report['total_revenue'], 500000)
+        self.assertEqual((report['total_orders'], report['paid_orders'], report['items_sold']), (3, 1, 3))
+        self.assertEqual(len(report['by_day']), 7)
+        self.assertEqual(report['by_day'][-1]['value'], 500000)
+        self.assertEqual([(row['label'], row['value']) for row in report['by_category']], [('Klassik', 400000)])
+        self.assertEqual([row['value'] for row in report['by_fabric']], [400000, 100000])
+        self.assertEqual([(row['label'], row['value']) for row in report['by_color']], [('Oq', 400000)])
+        self.assertEqual(report['top_sellers'][0]['label'], 'Ipak')
+        conversion = {row['status']: row for row in report['conversion']}
+        self.assertEqual(conversion['cancelled']['revenue'], 1000000)
+        self.assertEqual(conversion['pending']['orders'], 1)
+
+    def test_staff_page(self):
+        self.client.force_login(User.objects.create_user('staff', password='pass12345', is_staff=True))
+        response = self.client.get(reverse('orders:sales_report'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report']['total_revenue'], 500000)
+
+
+class OrderExportTests(TestCase):
+    """Buyurtmalarni CSV/XLSX eksport qilish boshqaruv sahifasi filtrlari bilan"""
+
+    def setUp(self):
+        from apps.curtains.models import Curtain
+
+        curtain = Curtain.objects.create(title='Ipak parda', price=150000)
+        self.order = create_order(customer_name='Ali Valiyev')
+        OrderItem.objects.create(order=self.order, curtain=curtain, quantity=2, unit_price=150000)
+        create_order(customer_name='Boshqa mijoz', status='cancelled')
+        self.client.force_login(User.objects.create_user('staff', password='pass12345', is_staff=True))
+
+    def test_csv_uses_search_filters(self):
+        import csv
+        import io
+
+        response = self.client.get(reverse('orders:export_orders'), {'status': 'pending'})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], self.order.order_number)
+        self.assertEqual(rows[1][6:10], ['Ipak parda', '2', '150000', '300000'])
+
+    def test_xlsx_is_valid_archive(self):
+        import io
+        import zipfile
+
+        response = self.client.get(reverse('orders:export_orders'), {'format': 'xlsx'})
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 3)
+        self.assertIn('Ali Valiyev', sheet)
+
+
+    def test_formulas_are_neutralized(self):
+        import csv
+        import io
+        import zipfile
+
+        Order.objects.filter(pk=self.order.pk).update(
+            customer_name='=HYPERLINK("http://x","y")', customer_address='@SUM(1)',
+        )
+        response = self.client.get(reverse('orders:export_orders'), {'status': 'pending'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(rows[1][3:6], ["'=HYPERLINK(\"http://x\",\"y\")", '+998 90 123 45 67', "'@SUM(1)"])
+
+        response = self.client.get(reverse('orders:export_orders'), {'status': 'pending', 'format': 'xlsx'})
+        sheet = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))).read('xl/worksheets/sheet1.xml')
+        self.assertIn(b"'@SUM(1)", sheet)
+
+@override_settings(ORDER_FEED_TOKENS=['sync-token'])
+class OrderChangeFeedTests(TestCase):
+    """ERP uchun (updated_date, id) kursorli o'zgarishlar lentasi"""
+
+    def setUp(self):
+        self.orders = [create_order() for _ in range(3)]
+        # Hamma buyurtmalar "settle" oralig'idan oldin o'zgargan bo'lsin
+        past = timezone.now() - timedelta(minutes=5)
+        Order.objects.update(updated_date=past)
+
+    def fetch(self, cursor=None, limit=2, token='sync-token'):
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get(
+            reverse('orders:order_changes_api'), params, HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+    def test_requires_token(self):
+        self.assertEqual(self.fetch(token='wrong').status_code, 401)
+        self.assertEqual(self.client.get(reverse('orders:order_changes_api')).status_code, 401)
+
+    def test_resumes_from_cursor(self):
+        first = self.fetch().json()
+        self.assertEqual([order['id'] for order in first['orders']], [o.pk for o in self.orders[:2]])
+        self.assertTrue(first['has_more'])
+
+        second = self.fetch(first['next_cursor']).json()
+        self.assertEqual([order['id'] for order in second['orders']], [self.orders[2].pk])
+        self.assertFalse(second['has_more'])
+
+        # Hech narsa o'zgarmagan - bo'sh javob, kursor o'sha-o'sha
+        idle = self.fetch(second['next_cursor']).json()
+        self.assertEqual((idle['orders'], idle['next_cursor']), ([], second['next_cursor']))
+
+        # Holat o'zgarishi buyurtmani tarixi bilan lentaga qaytaradi
+        change_status(self.orders[0].pk, 'pending', 'confirmed', comment='OK')
+        Order.objects.filter(pk=self.orders[0].pk).update(updated_date=timezone.now() - timedelta(minutes=1))
+        changed = self.fetch(second['next_cursor']).json()['orders']
+        self.assertEqual([order['id'] for order in changed], [self.orders[0].pk])
+        self.assertEqual(changed[0]['history'][0][:2], ['pending', 'confirmed'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.fetch('bad!!').status_code, 400)
+
+    def test_transition_stamps_after_lock(self):
+        from unittest import mock
+
+        # Qulfni uzoq kutgan jarayon: Python'dagi soat allaqachon o'tmishda qolgan
+        stale = timezone.now() - timedelta(minutes=10)
+        with mock.patch('django.utils.timezone.now', return_value=stale):
+            apply_transition(Order.objects.filter(pk=self.orders[0].pk), 'confirmed')
+            change_status(self.orders[1].pk, 'pending', 'cancelled')
+        for order in Order.objects.filter(pk__in=[self.orders[0].pk, self.orders[1].pk]):
+            self.assertGreater(order.updated_date, stale + timedelta(minutes=9))
+        self.assertGreater(Order.objects.get(pk=self.orders[0].pk).confirmed_date, stale + timedelta(minutes=9))
+
+
+    def test_item_changes_touch_order(self):
+        from apps.curtains.models import Curtain
+
+        curtain = Curtain.objects.create(title='Parda', price=100000)
+        item = OrderItem.objects.create(order=self.orders[1], curtain=curtain, quantity=1, unit_price=100000)
+        Order.objects.update(updated_date=timezone.now() - timedelta(minutes=5))
+        cursor = self.fetch(limit=10).json()['next_cursor']
+
+        for change in (lambda: item.save(), lambda: item.delete()):
+            change()
+            order = Order.objects.get(pk=self.orders[1].pk)
+            self.assertGreater(order.updated_date, timezone.now() - timedelta(minutes=1))
+            # "settle" oralig'ini o'tkazib yuborish
+            Order.objects.filter(pk=order.pk).update(updated_date=timezone.now() - timedelta(minutes=1))
+            changed = self.fetch(cursor, limit=10).json()
+            self.assertEqual([row['id'] for row in changed['orders']], [order.pk])
+            cursor = changed['next_cursor']
+
+
+class IdempotentOrderTests(TestCase):
+    """Qayta yuborilgan buyurtma formasi ikkinchi buyurtma yaratmaydi"""
+
+    def setUp(self):
+        from apps.curtains.models import Curtain
+
+        self.curtain = Curtain.objects.create(title='Parda', price=100000)
+        self.data = {
+            'customer_name': 'Aziz Karimov',
+            'customer_phone': '+998 90 123 45 67',
+            'customer_address': 'Navoiy sh.',
+            'idempotency_key': '1b4e28ba-2fa1-11d2-883f-0016cb4ad5f2',
+        }
+
+    def assertSingleOrder(self, responses):
+        from apps.jobs.models import Job
+
+        order = Order.objects.get()
+        for response in responses:
+            self.assertRedirects(response, reverse('orders:order_success', args=[order.order_number]))
+        self.assertEqual(str(order.idempotency_key), self.data['idempotency_key'])
+        self.assertEqual(OrderItem.objects.count(), 1)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_checkout_replay(self):
+        self.client.post(reverse('curtains:cart_add', args=[self.curtain.pk]))
+        url = reverse('curtains:checkout')
+        self.assertSingleOrder([self.client.post(url, self.data) for _ in range(2)])
+
+    def test_quick_order_replay(self):
+        url = reverse('orders:quick_order', args=[self.curtain.pk])
+        data = {**self.data, 'curtain_id': self.curtain.pk, 'quantity': 1}
+        self.assertSingleOrder([self.client.post(url, data) for _ in range(2)])
+
+    def test_forms_get_fresh_keys(self):
+        url = reverse('orders:quick_order', args=[self.curtain.pk])
+        keys = [self.client.get(url).context['form']['idempotency_key'].value() for _ in range(2)]
+        self.assertNotEqual(keys[0], keys[1])
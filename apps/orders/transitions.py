@@ -0,0 +1,125 @@
+from django.db import transaction
+from django.db.models.functions import Now
+
+from .live import publish_status_changed
+from .models import Order, OrderStatusHistory
+
+# Qaysi holatdan qaysi holatlarga o'tish mumkin
+TRANSITIONS = {
+    'pending': ('confirmed', 'cancelled'),
+    'confirmed': ('in_progress', 'cancelled'),
+    'in_progress': ('ready',),
+    'ready': ('delivered',),
+    'delivered': (),
+    'cancelled': (),
+}
+
+# O'tish bajarilganda qo'shimcha yoziladigan sana maydonlari
+TIMESTAMP_FIELDS = {
+    'confirmed': 'confirmed_date',
+}
+
+BATCH_SIZE = 1000
+
+
+def source_statuses(new_status):
+    """new_status'ga o'tish mumkin bo'lgan holatlar"""
+    return [status for status, targets in TRANSITIONS.items() if new_status in targets]
+
+
+def can_transition(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status, ())
+
+
+def transition_values(new_status, user=None):
+    """Holat o'zgarganda yoziladigan maydonlar (faqat shular UPDATE qilinadi).
+
+    Vaqt bazada UPDATE bajarilayotganda olinadi (Now()), qulf kutilgandan
+    keyin: aks holda uzoq kutgan tranzaksiya updated_date'ni o'zgarishlar
+    lentasi kursori allaqachon o'tib ketgan vaqt bilan yozib qo'yadi.
+    """
+    now = Now()
+    values = {'status': new_status, 'updated_date': now}
+    # processed_by - buyurtmani ko'rib chiqqan xodim; mijoz bekor qilsa o'zgarmaydi
+    if user is not None and user.is_staff:
+        values['processed_by'] = user
+    if new_status in TIMESTAMP_FIELDS:
+        values[TIMESTAMP_FIELDS[new_status]] = now
+    return values
+
+
+def change_status(order_id, expected_status, new_status, user=None, comment=''):
+    """Bitta buyurtma holatini optimistik tekshiruv bilan o'zgartirish.
+
+    UPDATE ... WHERE id=? AND status=expected_status bajariladi: boshqa
+    xodim holatni oldinroq o'zgartirgan bo'lsa hech narsa yozilmaydi va
+    False qaytadi. Qatorlar qulflanmaydi, faqat o'zgargan maydonlar yoziladi.
+    """
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order_id, status=expected_status).update(
+            **transition_values(new_status, user)
+        )
+        if not updated:
+            return False
+        OrderStatusHistory.objects.create(
+            order_id=order_id,
+            old_status=expected_status,
+            new_status=new_status,
+            changed_by=user,
+            comment=comment,
+        )
+        publish_status_changed(new_status, {order_id: expected_status})
+    return True
+
+
+def apply_transition(orders, new_status, user=None, comment=''):
+    """Buyurtmalar to'plamini yangi holatga o'tkazish.
+
+    Faqat TRANSITIONS bo'yicha ruxsat etilgan buyurtmalar o'zgaradi; qolganlari
+    o'tkazib yuboriladi. Har bir bo'lak alohida tranzaksiyada qulflanadi va
+    yoziladi (bitta shartli UPDATE va bitta bulk_create), shuning uchun katta
+    ommaviy amal ham updated_date'ni changefeed.SETTLE_SECONDS'dan uzoq commit
+    qilinmagan holda ushlab turmaydi. O'zgartirilgan buyurtmalar id'lari qaytariladi.
+    """
+    if new_status not in TRANSITIONS:
+        raise ValueError(f'Noma\'lum holat: {new_status}')
+
+    sources = source_statuses(new_status)
+    if not sources:
+        return []
+
+    values = transition_values(new_status, user)
+    # Admin queryset'idagi select_related/prefetch FOR UPDATE bilan mos emas -
+    # qatorlar toza so'rov orqali olinadi
+    candidate_ids = list(
+        Order.objects.filter(pk__in=orders.values('pk'), status__in=sources)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    changed_ids = []
+    for start in range(0, len(candidate_ids), BATCH_SIZE):
+        with transaction.atomic():
+            # Holat qulf olingandan keyin qayta tekshiriladi: orada o'zgargan buyurtmalar tushib qoladi
+            batch = list(
+                Order.objects.filter(pk__in=candidate_ids[start:start + BATCH_SIZE], status__in=sources)
+                .select_for_update()
+                .order_by('pk')
+                .values_list('pk', 'status')
+            )
+            if not batch:
+                continue
+            old_statuses = dict(batch)
+            Order.objects.filter(pk__in=old_statuses).update(**values)
+            OrderStatusHistory.objects.bulk_create([
+                OrderStatusHistory(
+                    order_id=pk,
+                    old_status=old_status,
+                    new_status=new_status,
+                    changed_by=user,
+                    comment=comment,
+                )
+                for pk, old_status in batch
+            ])
+            publish_status_changed(new_status, old_statuses)
+        changed_ids.extend(old_statuses)
+    return changed_ids
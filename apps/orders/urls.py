@@ -13,6 +13,14 @@ urlpatterns = [
     
     # Staff/Admin uchun URL'lar
     path('management/', views.orders_management_view, name='orders_management'),
+    path('management/export/', views.export_orders_view, name='export_orders'),
     path('update-status/<int:order_id>/', views.update_order_status_view, name='update_status'),
+    path('bulk-update-status/', views.bulk_update_status_view, name='bulk_update_status'),
+    path('sales-report/', views.sales_report_view, name='sales_report'),
     path('api/stats/', views.order_stats_api_view, name='order_stats_api'),
+    path('api/events/', views.order_events_view, name='order_events'),
+    path('api/events/poll/', views.order_events_poll_view, name='order_events_poll'),
+
+    # Tashqi tizimlar uchun (Bearer token)
+    path('api/changes/', views.order_changes_api_view, name='order_changes_api'),
 ]
\ No newline at end of file
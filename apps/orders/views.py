@@ -1,15 +1,30 @@
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
 from apps.curtains.models import Curtain
 from .models import Order, OrderItem
-from .forms import QuickOrderForm, OrderForm, OrderSearchForm
-from .telegram import send_order_notification
+from .forms import QuickOrderForm, OrderForm, OrderSearchForm, SalesReportForm
+from .idempotency import place_order
+from .tasks import notify_new_order
+from .changefeed import DEFAULT_LIMIT, InvalidCursor, changes_since, token_is_valid
+from .export import order_rows, stream_csv, stream_xlsx
+from .live import broadcaster
+from .transitions import apply_transition, can_transition, change_status
+
+BULK_STATUS_MAX_ORDERS = 5000
+
+# Jonli lenta: SSE ulanishida "ping" oralig'i va long-polling kutish vaqti (soniya)
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_POLL_TIMEOUT = 25
 
 
 def quick_order_view(request, curtain_id):
@@ -19,27 +34,35 @@ def quick_order_view(request, curtain_id):
     if request.method == 'POST':
         form = QuickOrderForm(request.POST)
         if form.is_valid():
-            # Buyurtma yaratish
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                customer_name=form.cleaned_data['customer_name'],
-                customer_phone=form.cleaned_data['customer_phone'],
-                customer_address=form.cleaned_data['customer_address'],
-                notes=form.cleaned_data['notes']
-            )
-            
-            # Buyurtma elementi yaratish
-            OrderItem.objects.create(
-                order=order,
-                curtain=curtain,
-                quantity=form.cleaned_data['quantity'],
-                unit_price=curtain.final_price,
-                custom_width=form.cleaned_data.get('custom_width'),
-                custom_height=form.cleaned_data.get('custom_height'),
-                custom_notes=form.cleaned_data.get('custom_notes')
-            )
-            
-            send_order_notification(order)
+            def create(key):
+                # Buyurtma yaratish
+                order = Order.objects.create(
+                    user=request.user if request.user.is_authenticated else None,
+                    customer_name=form.cleaned_data['customer_name'],
+                    customer_phone=form.cleaned_data['customer_phone'],
+                    customer_address=form.cleaned_data['customer_address'],
+                    notes=form.cleaned_data['notes'],
+                    idempotency_key=key,
+                )
+
+                # Buyurtma elementi yaratish
+                OrderItem.objects.create(
+                    order=order,
+                    curtain=curtain,
+                    quantity=form.cleaned_data['quantity'],
+                    unit_price=curtain.final_price,
+                    custom_width=form.cleaned_data.get('custom_width'),
+                    custom_height=form.cleaned_data.get('custom_height'),
+                    custom_notes=form.cleaned_data.get('custom_notes')
+                )
+                return order
+
+            order, created = place_order(form.cleaned_data['idempotency_key'], create)
+            if not created:
+                # Qayta yuborilgan forma - buyurtma allaqachon qabul qilingan
+                return redirect('orders:order_success', order_number=order.order_number)
+
+            notify_new_order.delay(order_id=order.pk)
 
             messages.success(
                 request,
@@ -111,41 +134,66 @@ def order_detail_view(request, order_number):
 @require_POST
 def cancel_order_view(request, order_number):
     """Buyurtmani bekor qilish"""
-    order = get_object_or_404(Order, order_number=order_number)
+    order = get_object_or_404(
+        Order.objects.only('id', 'order_number', 'status', 'user_id'), order_number=order_number
+    )
     
     # Foydalanuvchi tekshiruvi (faqat o'zining buyurtmasini bekor qila oladi yoki admin)
     if not (request.user.is_authenticated and 
-            (order.user == request.user or request.user.is_staff)):
+            (order.user_id == request.user.pk or request.user.is_staff)):
         messages.error(request, 'Sizda bu buyurtmani bekor qilish huquqi yo\'q.')
         return redirect('curtains:index')
     
+    # Sahifa ochilgandagi holat; forma uni yubormasa bazadan o'qilgani olinadi
+    expected_status = request.POST.get('expected_status') or order.status
+
     # Faqat "kutilmoqda" va "tasdiqlangan" holatdagi buyurtmalarni bekor qilish mumkin
-    if order.status in ['pending', 'confirmed']:
-        old_status = order.status
-        order.status = 'cancelled'
-        order.save()
-
-        # Status tarixi yaratish
-        from .models import OrderStatusHistory
-        OrderStatusHistory.objects.create(
-            order=order,
-            old_status=old_status,
-            new_status='cancelled',
-            changed_by=request.user,
-            comment='Mijoz tomonidan bekor qilindi'
-        )
-        
+    if not can_transition(expected_status, 'cancelled'):
+        messages.error(request, 'Bu buyurtmani bekor qilib bo\'lmaydi.')
+    elif change_status(order.pk, expected_status, 'cancelled', user=request.user,
+                       comment='Mijoz tomonidan bekor qilindi'):
         messages.success(request, f'Buyurtma #{order.order_number} bekor qilindi.')
     else:
-        messages.error(request, 'Bu buyurtmani bekor qilib bo\'lmaydi.')
+        messages.error(
+            request,
+            f'Buyurtma #{order.order_number} holati shu orada o\'zgargan. Iltimos, qaytadan tekshiring.'
+        )
     
-    if request.user.is_authenticated and order.user == request.user:
+    if request.user.is_authenticated and order.user_id == request.user.pk:
         return redirect('orders:my_orders')
     else:
         return redirect('curtains:index')
 
 
 # Staff foydalanuvchilar uchun view'lar
+def filter_orders(orders, form):
+    """OrderSearchForm filtrlarini queryset'ga qo'llash (boshqaruv sahifasi va eksport uchun)"""
+    if not form.is_valid():
+        return orders
+
+    search = form.cleaned_data.get('search')
+    status = form.cleaned_data.get('status')
+    date_from = form.cleaned_data.get('date_from')
+    date_to = form.cleaned_data.get('date_to')
+    
+    if search:
+        orders = orders.filter(
+            Q(order_number__icontains=search) |
+            Q(customer_name__icontains=search) |
+            Q(customer_phone__icontains=search)
+        )
+    
+    if status:
+        orders = orders.filter(status=status)
+    
+    if date_from:
+        orders = orders.filter(created_date__date__gte=date_from)
+    
+    if date_to:
+        orders = orders.filter(created_date__date__lte=date_to)
+    return orders
+
+
 @login_required
 def orders_management_view(request):
     """Buyurtmalarni boshqarish (staff uchun)"""
@@ -154,30 +202,9 @@ def orders_management_view(request):
         return redirect('curtains:index')
     
     form = OrderSearchForm(request.GET)
-    orders = Order.objects.all().prefetch_related('items__curtain').order_by('-created_date')
-    
-    # Filtrlar
-    if form.is_valid():
-        search = form.cleaned_data.get('search')
-        status = form.cleaned_data.get('status')
-        date_from = form.cleaned_data.get('date_from')
-        date_to = form.cleaned_data.get('date_to')
-        
-        if search:
-            orders = orders.filter(
-                Q(order_number__icontains=search) |
-                Q(customer_name__icontains=search) |
-                Q(customer_phone__icontains=search)
-            )
-        
-        if status:
-            orders = orders.filter(status=status)
-        
-        if date_from:
-            orders = orders.filter(created_date__date__gte=date_from)
-        
-        if date_to:
-            orders = orders.filter(created_date__date__lte=date_to)
+    orders = filter_orders(
+        Order.objects.all().prefetch_related('items__curtain').order_by('-created_date'), form
+    )
     
     # Sahifalash
     paginator = Paginator(orders, 20)
@@ -197,10 +224,43 @@ def orders_management_view(request):
         'page_obj': page_obj,
         'form': form,
         'stats': stats,
+        # Sahifa shu hodisadan keyingi o'zgarishlarni jonli lentadan oladi
+        'last_event_id': _refreshed_last_id(),
     }
     return render(request, 'orders/orders_management.html', context)
 
 
+def _refreshed_last_id():
+    """Jonli lentaning joriy hodisa id'si (jadval oraliq ichida bir marta o'qiladi)"""
+    broadcaster.refresh()
+    return broadcaster.last_id
+
+
+@login_required
+def export_orders_view(request):
+    """Filtrlangan buyurtmalarni CSV yoki XLSX ko'rinishida oqim bilan yuklab berish (staff uchun)"""
+    if not request.user.is_staff:
+        messages.error(request, 'Bu sahifaga kirish huquqingiz yo\'q.')
+        return redirect('curtains:index')
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'xlsx'):
+        return HttpResponse('Noto\'g\'ri format', status=400)
+
+    orders = filter_orders(Order.objects.order_by('-created_date'), OrderSearchForm(request.GET))
+    rows = order_rows(orders)
+    filename = f"buyurtmalar-{timezone.localdate():%Y%m%d}.{export_format}"
+    if export_format == 'xlsx':
+        response = StreamingHttpResponse(
+            stream_xlsx(rows),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    else:
+        response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 @require_POST
 def update_order_status_view(request, order_id):
@@ -208,37 +268,114 @@ def update_order_status_view(request, order_id):
     if not request.user.is_staff:
         return JsonResponse({'success': False, 'message': 'Ruxsat yo\'q'})
     
-    order = get_object_or_404(Order, id=order_id)
+    current_status = get_object_or_404(
+        Order.objects.values_list('status', flat=True), id=order_id
+    )
     new_status = request.POST.get('status')
     comment = request.POST.get('comment', '')
+    # Xodim ko'rgan holat - boshqa xodimning o'zgarishini ustidan yozib yubormaslik uchun
+    expected_status = request.POST.get('expected_status') or current_status
+    status_labels = dict(Order.STATUS_CHOICES)
     
-    if new_status in dict(Order.STATUS_CHOICES):
-        old_status = order.status
-        order.status = new_status
-        order.processed_by = request.user
-        
-        if new_status == 'confirmed':
-            from django.utils import timezone
-            order.confirmed_date = timezone.now()
-        
-        order.save()
-        
-        # Status tarixi yaratish
-        from .models import OrderStatusHistory
-        OrderStatusHistory.objects.create(
-            order=order,
-            old_status=old_status,
-            new_status=new_status,
-            changed_by=request.user,
-            comment=comment
-        )
-        
+    if new_status not in status_labels:
+        return JsonResponse({'success': False, 'message': 'Noto\'g\'ri holat'})
+    # Ommaviy o'zgartirish bilan bir xil qoida: faqat TRANSITIONS'dagi o'tishlar
+    if not can_transition(expected_status, new_status):
+        return JsonResponse({
+            'success': False,
+            'message': (
+                f'{status_labels.get(expected_status, expected_status)} holatidan '
+                f'{status_labels[new_status]} holatiga o\'tib bo\'lmaydi'
+            ),
+        }, status=400)
+
+    if change_status(order_id, expected_status, new_status, user=request.user, comment=comment):
         return JsonResponse({
             'success': True, 
-            'message': f'Buyurtma holati {order.get_status_display()} ga o\'zgartirildi.'
+            'status': new_status,
+            'message': f'Buyurtma holati {status_labels[new_status]} ga o\'zgartirildi.'
         })
-    
-    return JsonResponse({'success': False, 'message': 'Noto\'g\'ri holat'})
+
+    current_status = Order.objects.filter(id=order_id).values_list('status', flat=True).first()
+    return JsonResponse({
+        'success': False,
+        'conflict': True,
+        'status': current_status,
+        'message': (
+            f'Buyurtma holati shu orada {status_labels.get(current_status, current_status)} '
+            'ga o\'zgartirilgan. Sahifa yangilanadi.'
+        ),
+    }, status=409)
+
+
+@login_required
+@require_POST
+def bulk_update_status_view(request):
+    """Bir nechta buyurtma holatini bitta so'rovda o'zgartirish (staff uchun, JSON)"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'Ruxsat yo\'q'}, status=403)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        order_ids = payload.get('order_ids', [])
+    except (ValueError, AttributeError):
+        return JsonResponse({'success': False, 'message': 'Noto\'g\'ri JSON'}, status=400)
+    # Faqat butun sonlar ro'yxati: satr harflarga bo'linib ketmasin, bool ham id emas
+    if not isinstance(order_ids, list) or not all(
+        isinstance(pk, int) and not isinstance(pk, bool) for pk in order_ids
+    ):
+        return JsonResponse({
+            'success': False, 'message': 'order_ids butun sonlar ro\'yxati bo\'lishi kerak',
+        }, status=400)
+
+    new_status = payload.get('status')
+    if new_status not in dict(Order.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Noto\'g\'ri holat'}, status=400)
+    if not order_ids or len(order_ids) > BULK_STATUS_MAX_ORDERS:
+        return JsonResponse({
+            'success': False,
+            'message': f'1 dan {BULK_STATUS_MAX_ORDERS} tagacha buyurtma tanlang',
+        }, status=400)
+
+    updated = apply_transition(
+        Order.objects.filter(pk__in=order_ids),
+        new_status,
+        user=request.user,
+        comment=str(payload.get('comment', '')),
+    )
+    skipped = sorted(set(order_ids) - set(updated))
+    return JsonResponse({
+        'success': True,
+        'updated': updated,
+        'skipped': skipped,
+        'message': f'{len(updated)} ta buyurtma holati o\'zgartirildi, {len(skipped)} tasi o\'tkazib yuborildi.',
+    })
+
+
+@login_required
+def sales_report_view(request):
+    """Savdo hisoboti: kunlar, kategoriya, mato, rang kesimlari va konversiya (staff uchun)"""
+    if not request.user.is_staff:
+        messages.error(request, 'Bu sahifaga kirish huquqingiz yo\'q.')
+        return redirect('curtains:index')
+
+    from datetime import timedelta
+    from .analytics import sales_report
+
+    today = timezone.localdate()
+    form = SalesReportForm(request.GET or {
+        'date_from': today - timedelta(days=29),
+        'date_to': today,
+    })
+    report = None
+    if form.is_valid():
+        report = sales_report(form.cleaned_data['date_from'], form.cleaned_data['date_to'])
+
+    context = {
+        'form': form,
+        'report': report,
+    }
+    return render(request, 'orders/sales_report.html', context)
 
 
 @login_required
@@ -266,3 +403,100 @@ def order_stats_api_view(request):
     }
     
     return JsonResponse(stats)
+
+
+def _last_event_id(request):
+    """Mijoz oxirgi olgan hodisa id'si (EventSource Last-Event-ID sarlavhasi yoki ?after=)"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _sse_message(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+@login_required
+async def order_events_view(request):
+    """Buyurtma hodisalari SSE oqimi (staff uchun, ASGI ostida)"""
+    user = await request.auser()
+    if not user.is_staff:
+        return JsonResponse({'error': 'Ruxsat yo\'q'}, status=403)
+
+    if not isinstance(request, ASGIRequest):
+        # WSGI ostida cheksiz oqim worker'ni to'liq band qiladi. 204 javobi
+        # EventSource'ni qayta ulanishdan to'xtatadi va sahifa long-pollingga o'tadi
+        return HttpResponse(status=204)
+
+    last_id = _last_event_id(request)
+    if last_id is None:
+        last_id = await sync_to_async(_refreshed_last_id)()
+
+    async def stream():
+        nonlocal last_id
+        yield 'retry: 3000\n\n'
+        while True:
+            events, missed = await broadcaster.await_events(last_id, EVENTS_HEARTBEAT_SECONDS)
+            if missed:
+                # Oradagi hodisalar yo'qolgan - sahifa hisoblagichlarni qayta yuklaydi
+                last_id = events[-1]['id'] if events else broadcaster.last_id
+                yield f'id: {last_id}\nevent: reset\ndata: {{}}\n\n'
+                continue
+            if not events:
+                yield ': ping\n\n'
+                continue
+            for event in events:
+                yield _sse_message(event)
+            last_id = events[-1]['id']
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+async def order_events_poll_view(request):
+    """Jonli lentaning long-polling varianti (SSE ishlamaganda)"""
+    user = await request.auser()
+    if not user.is_staff:
+        return JsonResponse({'error': 'Ruxsat yo\'q'}, status=403)
+
+    # WSGI ostida so'rov ushlab turilmaydi: worker band bo'lmasligi uchun darhol
+    # javob qaytadi, sahifa keyingi so'rovni "held" false bo'lsa kechiktirib yuboradi
+    held = isinstance(request, ASGIRequest)
+    last_id = _last_event_id(request)
+    if last_id is None:
+        last_id = await sync_to_async(_refreshed_last_id)()
+        return JsonResponse({'events': [], 'last_id': last_id, 'reset': False, 'held': held})
+
+    events, missed = await broadcaster.await_events(last_id, EVENTS_POLL_TIMEOUT if held else 0)
+    if missed:
+        return JsonResponse({'events': [], 'last_id': broadcaster.last_id, 'reset': True, 'held': held})
+    return JsonResponse({
+        'events': events,
+        'last_id': events[-1]['id'] if events else last_id,
+        'reset': False,
+        'held': held,
+    })
+
+
+def order_changes_api_view(request):
+    """Buyurtmalar o'zgarishlar lentasi - ERP uchun, Bearer token bilan (?cursor=&limit=)"""
+    if not token_is_valid(request):
+        return JsonResponse({'error': 'Token noto\'g\'ri'}, status=401)
+
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+        orders, cursor, has_more = changes_since(request.GET.get('cursor') or None, limit)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Noto\'g\'ri kursor'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'Noto\'g\'ri limit'}, status=400)
+
+    return JsonResponse(
+        {'orders': orders, 'next_cursor': cursor, 'has_more': has_more},
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
     'apps.curtains',
     'apps.accounts',
     'apps.orders',
+    'apps.jobs',
 ]
 
 MIDDLEWARE = [
@@ -44,6 +46,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.curtains.middleware.CartSummaryMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -92,6 +95,47 @@ else:
     }
 
 
+# Cache
+# locmem - har bir worker jarayonining o'z keshi (ishlab chiqish uchun),
+# file - bitta serverdagi barcha worker'lar uchun umumiy papka,
+# redis - Redis protokolidagi server (Redis, Valkey, KeyDB ...)
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'curtains'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND={CACHE_BACKEND!r} noma'lum, quyidagilardan biri bo'lishi kerak: {', '.join(CACHE_BACKENDS)}"
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default='') or CACHE_BACKENDS[CACHE_BACKEND][1],
+        'TIMEOUT': config('CACHE_TIMEOUT', cast=int, default=300),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='curtains'),
+    }
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', cast=int, default=10000)}
+
+
+# Sessions
+# cached_db - session keshdan o'qiladi, bazaga faqat o'zgarganda yoziladi.
+# locmem keshi har bir jarayonda alohida: boshqa worker eski session'ni
+# ko'rmasligi uchun bu holda oddiy db ishlatiladi. Muddati o'tgan qatorlar
+# compact_sessions buyrug'i bilan tozalanadi.
+SESSION_ENGINE = config('SESSION_ENGINE', default='') or (
+    'django.contrib.sessions.backends.cached_db' if CACHE_BACKEND in ('file', 'redis')
+    else 'django.contrib.sessions.backends.db'
+)
+SESSION_COOKIE_AGE = config('SESSION_COOKIE_AGE', cast=int, default=60 * 60 * 24 * 14)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -137,6 +181,10 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Yuklangan parda rasmlari shu o'lchamgacha kichraytiriladi va qayta kodlanadi
+CURTAIN_IMAGE_MAX_SIZE = config('CURTAIN_IMAGE_MAX_SIZE', cast=int, default=1600)
+CURTAIN_IMAGE_QUALITY = config('CURTAIN_IMAGE_QUALITY', cast=int, default=82)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -150,6 +198,28 @@ LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Admin: katta jadvallar rejimi (taxminiy sanoq, date_hierarchy'siz, FK autocomplete)
+ADMIN_LARGE_TABLE_MODE = config('ADMIN_LARGE_TABLE_MODE', cast=bool, default=False)
+ADMIN_COUNT_LIMIT = config('ADMIN_COUNT_LIMIT', cast=int, default=10000)
+ADMIN_FILTER_CHOICES_LIMIT = config('ADMIN_FILTER_CHOICES_LIMIT', cast=int, default=100)
+
+# Savdo hisoboti keshda saqlanish vaqti (soniya)
+SALES_REPORT_CACHE_TIMEOUT = config('SALES_REPORT_CACHE_TIMEOUT', cast=int, default=600)
+
+# Katalog sahifalari ma'lumotlari keshda saqlanish vaqti (soniya)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', cast=int, default=3600)
+# Katalog o'zgarganda tashqi HTTP keshga (Varnish xkey, CDN) Surrogate-Key bilan PURGE yuboriladigan manzil
+CACHE_PURGE_URL = config('CACHE_PURGE_URL', default='')
+
+# Buyurtmalar o'zgarishlar lentasi (ERP sinxronizatsiyasi) uchun Bearer tokenlar, vergul bilan
+ORDER_FEED_TOKENS = config('ORDER_FEED_TOKENS', cast=Csv(), default='')
+
+# Jonli buyurtma lentasi: har bir jarayon orders_event jadvalini shu oraliqda (soniya) o'qiydi
+ORDER_EVENTS_POLL_INTERVAL = config('ORDER_EVENTS_POLL_INTERVAL', cast=float, default=1.0)
+
+# Fon vazifalari: True bo'lsa navbatga qo'yilmasdan so'rov ichida bajariladi (worker'siz muhit)
+JOBS_RUN_INLINE = config('JOBS_RUN_INLINE', cast=bool, default=False)
+
 # Telegram
 TELEGRAM_BOT_TOKEN = config('TELEGRAM_BOT_TOKEN', default='')
 TELEGRAM_CHAT_ID = config('TELEGRAM_CHAT_ID', default='')
@@ -166,6 +236,8 @@ CSRF_COOKIE_SECURE = config('CSRF_COOKIE_SECURE', cast=bool, default=False)
 
 # Message Framework
 from django.contrib.messages import constants as messages
+# Xabarlar cookie'da: flash xabar uchun session yozilmaydi
+MESSAGE_STORAGE = config('MESSAGE_STORAGE', default='django.contrib.messages.storage.cookie.CookieStorage')
 MESSAGE_TAGS = {
     messages.DEBUG: 'debug',
     messages.INFO: 'info',
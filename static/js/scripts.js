@@ -11,18 +11,26 @@
     });
 })();
 
-/* ===== CART BADGE (reads from Django session) ===== */
+/* ===== CART BADGE (cart_summary cookie, otherwise /cart/count/) ===== */
 (function () {
     const badge = document.getElementById('cartCount');
     if (!badge) return;
 
+    function show(count) {
+        badge.textContent = count;
+        badge.style.display = count > 0 ? 'flex' : 'none';
+    }
+
+    // Cookie: "soni:jami[:u]:vaqt:imzo" - imzoni server tekshiradi, bu yerda faqat soni kerak
+    const cookie = document.cookie.split('; ').find(c => c.startsWith('cart_summary='));
+    if (cookie) {
+        const count = parseInt(cookie.split('=')[1].replace(/"/g, '').split(':')[0], 10);
+        if (!isNaN(count)) return show(count);
+    }
+
     fetch('/cart/count/', { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
         .then(r => r.json())
-        .then(data => {
-            const count = data.count || 0;
-            badge.textContent = count;
-            badge.style.display = count > 0 ? 'flex' : 'none';
-        })
+        .then(data => show(data.count || 0))
         .catch(() => { badge.style.display = 'none'; });
 })();
 